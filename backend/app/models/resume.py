@@ -0,0 +1,194 @@
+import re
+from typing import Any, Dict, List
+from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_validator
+
+_SCORE_RE = re.compile(r"-?\d+(\.\d+)?")
+
+
+def skills_to_mapping(value: Any) -> Any:
+    """
+    Convert skills in structured-output form, `[{"category": ..., "skills": [...]}]`,
+    back to the `{"Category": [...]}` mapping the templates use.
+    """
+    if not isinstance(value, list):
+        return value
+    mapping: Dict[str, List[str]] = {}
+    for group in value:
+        if isinstance(group, dict) and group.get("category"):
+            mapping.setdefault(str(group["category"]), []).extend(group.get("skills") or [])
+    return mapping
+
+
+def _string_list(value: Any) -> Any:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    return value
+
+
+class _Entry(BaseModel):
+    # Unknown fields are kept so templates can use anything the model returns
+    model_config = ConfigDict(extra="allow")
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def _coerce_text(cls, value: Any, info: ValidationInfo) -> Any:
+        """Models often answer `"year": 2021` or `null` for text fields."""
+        if cls.model_fields[info.field_name].annotation is not str:
+            return value
+        if value is None:
+            return ""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        return value
+
+
+class ContactInfo(_Entry):
+    location: str = ""
+    email: str = ""
+    phone: str = ""
+    linkedin: str = ""
+    github: str = ""
+
+
+class ExperienceEntry(_Entry):
+    title: str = ""
+    company: str = ""
+    location: str = ""
+    dates: str = ""
+    description: List[str] = []
+
+    _normalize_description = field_validator("description", mode="before")(_string_list)
+
+
+class ProjectEntry(_Entry):
+    name: str = ""
+    dates: str = ""
+    link: str = ""
+    description: List[str] = []
+
+    _normalize_description = field_validator("description", mode="before")(_string_list)
+
+
+class EducationEntry(_Entry):
+    degree: str = ""
+    institution: str = ""
+    year: str = ""
+
+
+class CertificationEntry(_Entry):
+    name: str = ""
+    issuer: str = ""
+    year: str = ""
+
+
+class StructuredResume(_Entry):
+    name: str = ""
+    contact_info: ContactInfo = Field(default_factory=ContactInfo)
+    summary: str = ""
+    experience: List[ExperienceEntry] = []
+    projects: List[ProjectEntry] = []
+    skills: Dict[str, List[str]] = {}
+    education: List[EducationEntry] = []
+    certifications: List[CertificationEntry] = []
+
+    @field_validator("contact_info", mode="before")
+    @classmethod
+    def _default_contact_info(cls, value: Any) -> Any:
+        return value or {}
+
+    @field_validator("experience", "projects", "education", "certifications", mode="before")
+    @classmethod
+    def _default_list(cls, value: Any) -> Any:
+        return value or []
+
+    @field_validator("skills", mode="before")
+    @classmethod
+    def _normalize_skills(cls, value: Any) -> Any:
+        value = skills_to_mapping(value) or {}
+        if isinstance(value, dict):
+            return {category: _string_list(skills) for category, skills in value.items()}
+        return value
+
+
+class ResumeAnalysis(BaseModel):
+    analysis: str = ""
+    overall_match_score: int = 0
+    key_improvement_areas: List[str] = []
+    suggestions: List[str] = []
+    optimized_resume_data: StructuredResume
+
+    @field_validator("overall_match_score", mode="before")
+    @classmethod
+    def _parse_score(cls, value: Any) -> Any:
+        """Accept 85, 85.0, "85", "85%" or "85/100", clamped to 0-100."""
+        if isinstance(value, str):
+            match = _SCORE_RE.search(value)
+            value = float(match.group()) if match else 0
+        if isinstance(value, float):
+            value = round(value)
+        if isinstance(value, int):
+            return min(max(value, 0), 100)
+        return value
+
+    @field_validator("key_improvement_areas", "suggestions", mode="before")
+    @classmethod
+    def _normalize_lists(cls, value: Any) -> Any:
+        return _string_list(value)
+
+
+# Gemini response schemas (OpenAPI subset). Schemas cannot express maps
+# with free-form keys, so skills are requested as a list of category
+# groups and converted back with skills_to_mapping.
+def _string() -> Dict[str, Any]:
+    return {"type": "STRING"}
+
+
+def _strings() -> Dict[str, Any]:
+    return {"type": "ARRAY", "items": _string()}
+
+
+def _object(properties: Dict[str, Any], required: List[str]) -> Dict[str, Any]:
+    schema = {"type": "OBJECT", "properties": properties}
+    if required:
+        schema["required"] = required
+    return schema
+
+
+RESUME_RESPONSE_SCHEMA = _object(
+    {
+        "name": _string(),
+        "contact_info": _object(
+            {key: _string() for key in ("location", "email", "phone", "linkedin", "github")}, []
+        ),
+        "summary": _string(),
+        "experience": {"type": "ARRAY", "items": _object(
+            {"title": _string(), "company": _string(), "location": _string(), "dates": _string(), "description": _strings()},
+            ["title", "company", "description"],
+        )},
+        "projects": {"type": "ARRAY", "items": _object(
+            {"name": _string(), "dates": _string(), "link": _string(), "description": _strings()},
+            ["name", "description"],
+        )},
+        "skills": {"type": "ARRAY", "items": _object({"category": _string(), "skills": _strings()}, ["category", "skills"])},
+        "education": {"type": "ARRAY", "items": _object(
+            {"degree": _string(), "institution": _string(), "year": _string()}, ["degree", "institution"]
+        )},
+        "certifications": {"type": "ARRAY", "items": _object(
+            {"name": _string(), "issuer": _string(), "year": _string()}, ["name"]
+        )},
+    },
+    ["name", "contact_info", "summary", "experience", "projects", "skills", "education", "certifications"],
+)
+
+ANALYSIS_RESPONSE_SCHEMA = _object(
+    {
+        "analysis": _string(),
+        "overall_match_score": {"type": "INTEGER"},
+        "key_improvement_areas": _strings(),
+        "suggestions": _strings(),
+        "optimized_resume_data": RESUME_RESPONSE_SCHEMA,
+    },
+    ["analysis", "overall_match_score", "key_improvement_areas", "suggestions", "optimized_resume_data"],
+)
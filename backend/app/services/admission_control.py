@@ -0,0 +1,157 @@
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+from app.utils.errors import ServiceBusyError
+from app.utils.logger import setup_logger
+from app.utils.metrics import record_stage
+
+logger = setup_logger('admission_control')
+
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_MAX_QUEUE = int(os.getenv("GEMINI_MAX_QUEUE", "64"))
+
+# Priority lanes, most urgent first. A lane's deadline is how long a call
+# may wait for a model slot before it is shed.
+LANE_INTERACTIVE = "interactive"
+LANE_BATCH = "batch"
+LANE_BACKGROUND = "background"
+LANE_PRIORITIES = {LANE_INTERACTIVE: 0, LANE_BATCH: 1, LANE_BACKGROUND: 2}
+LANE_DEADLINES = {
+    LANE_INTERACTIVE: float(os.getenv("GEMINI_QUEUE_DEADLINE_INTERACTIVE", "30")),
+    LANE_BATCH: float(os.getenv("GEMINI_QUEUE_DEADLINE_BATCH", "120")),
+    LANE_BACKGROUND: float(os.getenv("GEMINI_QUEUE_DEADLINE_BACKGROUND", "60")),
+}
+
+# Weight of the newest sample in the moving averages
+EWMA_ALPHA = 0.2
+
+
+class AdmissionRejectedError(ServiceBusyError):
+    """Raised when a model call is shed instead of queued, or its queue deadline passes."""
+
+
+class AdmissionController:
+    """
+    Bounds concurrent model calls and sheds load before it piles up.
+
+    At most `max_concurrency` calls hold a slot; the rest wait in a
+    priority queue ordered by lane, then arrival. A call is rejected up
+    front with AdmissionRejectedError (503 + Retry-After) when the queue is
+    full or when the estimated wait, derived from a moving average of slot
+    hold times, already exceeds its lane deadline. Calls that are queued
+    but not admitted by their deadline are rejected the same way.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = GEMINI_MAX_CONCURRENCY,
+        max_queue: int = GEMINI_MAX_QUEUE,
+        deadlines: Optional[Dict[str, float]] = None,
+    ):
+        self.max_concurrency = max(max_concurrency, 1)
+        self.max_queue = max(max_queue, 0)
+        self.deadlines = dict(LANE_DEADLINES, **(deadlines or {}))
+        self._active = 0
+        self._queue: List[List[Any]] = []  # heap of [priority, sequence, future]
+        self._sequence = itertools.count()
+        self.admitted = 0
+        self.rejected = 0
+        self.expired = 0
+        self.avg_wait = 0.0
+        self.avg_hold = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future in self._queue if not future.done())
+
+    def estimate_wait(self, lane: str = LANE_INTERACTIVE) -> float:
+        """Seconds a new call in `lane` would likely wait for a slot."""
+        if self._active < self.max_concurrency and not self.queue_depth:
+            return 0.0
+        priority = LANE_PRIORITIES[lane]
+        ahead = sum(1 for p, _, future in self._queue if p <= priority and not future.done())
+        return (ahead + 1) / self.max_concurrency * self.avg_hold
+
+    @asynccontextmanager
+    async def slot(self, lane: str = LANE_INTERACTIVE) -> AsyncIterator[None]:
+        """Hold one model slot for the duration of the block."""
+        if lane not in LANE_PRIORITIES:
+            raise ValueError(f"Unknown admission lane: {lane}")
+        queued_at = time.monotonic()
+        await self._acquire(lane)
+        waited = time.monotonic() - queued_at
+        self._record_wait(waited)
+        record_stage("model_queue", waited)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            held = time.monotonic() - started
+            self.avg_hold = held if not self.avg_hold else (1 - EWMA_ALPHA) * self.avg_hold + EWMA_ALPHA * held
+            self._release()
+
+    async def _acquire(self, lane: str) -> None:
+        if self._active < self.max_concurrency and not self.queue_depth:
+            self._active += 1
+            self.admitted += 1
+            return
+
+        deadline = self.deadlines[lane]
+        estimate = self.estimate_wait(lane)
+        if self.queue_depth >= self.max_queue or estimate > deadline:
+            self.rejected += 1
+            logger.warning(f"🚦 Shedding {lane} model call: queue {self.queue_depth}, estimated wait {estimate:.1f}s")
+            raise AdmissionRejectedError(
+                "The AI model is at capacity. Please try again shortly.", retry_after=math.ceil(max(estimate, 1))
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, [LANE_PRIORITIES[lane], next(self._sequence), future])
+        try:
+            await asyncio.wait_for(future, timeout=deadline)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Admitted in the same tick the deadline fired; hand the slot on
+                self._release()
+            self.expired += 1
+            raise AdmissionRejectedError(
+                "The AI model is at capacity. Please try again shortly.",
+                retry_after=math.ceil(max(self.estimate_wait(lane), 1)),
+            )
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+        self.admitted += 1
+
+    def _release(self) -> None:
+        self._active -= 1
+        while self._queue and self._active < self.max_concurrency:
+            _, _, future = heapq.heappop(self._queue)
+            if future.done():
+                # Waiter expired or was cancelled while queued
+                continue
+            self._active += 1
+            future.set_result(None)
+
+    def _record_wait(self, waited: float) -> None:
+        self.avg_wait = waited if not self.avg_wait else (1 - EWMA_ALPHA) * self.avg_wait + EWMA_ALPHA * waited
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self._active,
+            "queue_depth": self.queue_depth,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "avg_wait_seconds": round(self.avg_wait, 3),
+            "avg_hold_seconds": round(self.avg_hold, 3),
+            "estimated_wait_seconds": {lane: round(self.estimate_wait(lane), 3) for lane in LANE_PRIORITIES},
+        }
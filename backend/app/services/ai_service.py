@@ -1,158 +1,326 @@
-import google.generativeai as genai
 import os
 import json
 import asyncio
-import fitz  # PyMuPDF
-from typing import Any, Dict, List
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+from pydantic import ValidationError
+from app.models.resume import (
+    ANALYSIS_RESPONSE_SCHEMA,
+    RESUME_RESPONSE_SCHEMA,
+    ResumeAnalysis,
+    StructuredResume,
+    skills_to_mapping,
+)
+from app.services.admission_control import LANE_INTERACTIVE, AdmissionController
+from app.services.llm_providers import LLMProvider, create_provider
+from app.utils.json_repair import JSONRepairError, repair_json
+from app.utils.json_stream import IncrementalJSONParser, JSONPath
 from app.utils.logger import setup_logger
+from app.utils.metrics import record_stage, stage_timer
+from app.utils.text_compaction import compact_job_description, compact_resume_text
 
 logger = setup_logger('ai_service')
 
+GEMINI_TIMEOUT = float(os.getenv('GEMINI_TIMEOUT', '300'))
+
+# Experience and project lists are streamed entry by entry; every other
+# field is streamed once it is complete.
+STREAMED_LIST_SECTIONS = ('experience', 'projects')
+
+
+def is_streamed_section(path: JSONPath) -> bool:
+    if not path:
+        return False
+    if path[0] != 'optimized_resume_data':
+        return len(path) == 1
+    if len(path) == 2:
+        return path[1] not in STREAMED_LIST_SECTIONS
+    return len(path) == 3 and path[1] in STREAMED_LIST_SECTIONS
+
+RESUME_JSON_STRUCTURE = """{
+    "name": "Full Name",
+    "contact_info": {
+        "location": "City, Country",
+        "email": "email@address.com",
+        "phone": "+123456789",
+        "linkedin": "linkedin.com/in/username",
+        "github": "github.com/username"
+    },
+    "summary": "SUMMARY_HINT",
+    "experience": [
+        {
+            "title": "Job Title",
+            "company": "Company Name",
+            "location": "City, USA",
+            "dates": "Month Year - Month Year or Present",
+            "description": ["BULLET_HINT 1.", "BULLET_HINT 2."]
+        }
+    ],
+    "projects": [
+        {
+            "name": "Project Name | Technologies Used",
+            "dates": "Month Year - Month Year",
+            "link": "github.com/link/to/project",
+            "description": ["BULLET_HINT 1.", "BULLET_HINT 2."]
+        }
+    ],
+    "skills": {
+        "AI & ML": ["Skill 1", "Skill 2"],
+        "Programming": ["Python", "JavaScript"],
+        "APIs & DBs": ["Stripe API", "PostgreSQL"]
+    },
+    "education": [
+        {
+            "degree": "Degree or Diploma Name",
+            "institution": "School or University Name",
+            "year": "Year of Completion"
+        }
+    ],
+    "certifications": [
+        {
+            "name": "Certification Name",
+            "issuer": "Issuing Body",
+            "year": "Year of Completion"
+        }
+    ]
+}"""
+
+
+def _resume_structure(summary_hint: str, bullet_hint: str, indent: str) -> str:
+    structure = RESUME_JSON_STRUCTURE.replace("SUMMARY_HINT", summary_hint).replace("BULLET_HINT", bullet_hint)
+    return structure.replace("\n", "\n" + indent)
+
+
 class AIService:
-    def __init__(self):
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable not set")
+    # Bump whenever a prompt or expected output structure changes so
+    # cached results produced by an older prompt are not served.
+    PROMPT_VERSION = "5"
+    PARSE_PROMPT_VERSION = "3"
+
+    def __init__(self, provider: Optional[LLMProvider] = None, admission: Optional[AdmissionController] = None):
+        # The backend (Gemini, recording proxy, replay/stub) comes from LLM_PROVIDER
+        self.provider = provider or create_provider()
+        self.model_name = self.provider.model_name
+        # Every model call must hold an admission slot
+        self.admission = admission or AdmissionController()
+        self.timeout = GEMINI_TIMEOUT
+        logger.info(f"🤖 AI service using {self.provider.name} provider ({self.model_name})")
 
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+    async def warm_up(self) -> None:
+        """Load the model client and open its connection before the first request."""
+        await asyncio.wait_for(self.provider.warm_up(), timeout=self.timeout)
 
     async def analyze_resume(self, resume_text: str, job_description: str) -> Dict[str, Any]:
         """
         Parses the resume, optimizes it for the job description, and returns structured JSON.
+
+        Runs both stages back to back without caching; callers that tailor
+        the same resume repeatedly should cache `parse_resume` themselves.
+        """
+        structured_resume = await self.parse_resume(resume_text)
+        return await self.tailor_resume(structured_resume, job_description)
+
+    async def parse_resume(self, resume_text: str, lane: str = LANE_INTERACTIVE) -> Dict[str, Any]:
+        """
+        Stage 1: parse raw resume text into the canonical structured resume JSON,
+        without rewriting any content.
         """
-        logger.info("🔍 Analyzing resume and job description with ADVANCED structured output...")
+        logger.info("🔍 Parsing resume into structured JSON...")
+        with stage_timer("prompt_build"):
+            prompt = self._build_parse_prompt(resume_text)
+        response_text = await self._generate(prompt, "Resume parsing", lane, RESUME_RESPONSE_SCHEMA)
+        with stage_timer("json_parse"):
+            structured_resume = self._parse_structured_resume(response_text)
+        logger.info(f"✅ Resume parsed - {len(structured_resume.get('experience') or [])} jobs, {len(structured_resume.get('projects') or [])} projects")
+        return structured_resume
 
-        if not self.model:
-            raise ValueError("AI model not available.")
+    async def tailor_resume(
+        self, structured_resume: Dict[str, Any], job_description: str, lane: str = LANE_INTERACTIVE
+    ) -> Dict[str, Any]:
+        """
+        Stage 2: tailor an already structured resume to the job description.
+        """
+        logger.info("🔍 Tailoring structured resume to job description...")
+        with stage_timer("prompt_build"):
+            prompt = self._build_tailor_prompt(structured_resume, job_description)
+        response_text = await self._generate(prompt, "Resume tailoring", lane, ANALYSIS_RESPONSE_SCHEMA)
+        with stage_timer("json_parse"):
+            analysis = self._parse_analysis_response(response_text)
+        logger.info(f"✅ Analysis complete - Match Score: {analysis.get('overall_match_score', 0)}%")
+        return analysis
 
+    async def stream_tailored_resume(
+        self, structured_resume: Dict[str, Any], job_description: str, lane: str = LANE_INTERACTIVE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the tailoring stage as the model produces it.
+
+        Yields `{"type": "section", "path": [...], "value": ...}` for every
+        completed top-level field and every experience/project entry, then a
+        final `{"type": "analysis", "analysis": {...}}` with the full result.
+        """
+        logger.info("🔍 Streaming resume tailoring...")
+
+        with stage_timer("prompt_build"):
+            prompt = self._build_tailor_prompt(structured_resume, job_description)
+        parser = IncrementalJSONParser(is_streamed_section)
+        chunks: List[str] = []
+        loop = asyncio.get_running_loop()
+
+        async with self.admission.slot(lane):
+            deadline = loop.time() + self.timeout
+            started = time.perf_counter()
+            stream = self.provider.stream(prompt, ANALYSIS_RESPONSE_SCHEMA).__aiter__()
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), timeout=max(deadline - loop.time(), 0))
+                    except StopAsyncIteration:
+                        break
+                    if not chunks:
+                        record_stage("model_first_chunk", time.perf_counter() - started)
+                    chunks.append(chunk)
+                    for path, value in parser.feed(chunk):
+                        if path == ('optimized_resume_data', 'skills'):
+                            value = skills_to_mapping(value)
+                        yield {"type": "section", "path": list(path), "value": value}
+            except asyncio.TimeoutError:
+                logger.error(f"❌ AI streaming timed out after {self.timeout:.0f} seconds.")
+                raise ValueError("The AI model took too long to respond. Please try again later.")
+            except Exception as e:
+                logger.error(f"❌ Streaming analysis failed: {str(e)}")
+                raise ValueError(f"AI analysis failed: {e}")
+            finally:
+                await stream.aclose()
+                record_stage("model_generate", time.perf_counter() - started)
+
+        with stage_timer("json_parse"):
+            analysis = self._parse_analysis_response("".join(chunks))
+        logger.info(f"✅ Streamed analysis complete - Match Score: {analysis.get('overall_match_score', 0)}%")
+        yield {"type": "analysis", "analysis": analysis}
+
+    async def _generate(
+        self, prompt: str, label: str, lane: str = LANE_INTERACTIVE, schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Run one model call under admission control and return the raw response text."""
+        async with self.admission.slot(lane):
+            try:
+                logger.info(f"📊 {label}: generating from AI (timeout: {self.timeout:.0f}s)...")
+                with stage_timer("model_generate"):
+                    return await asyncio.wait_for(self.provider.generate(prompt, schema), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"❌ {label} timed out after {self.timeout:.0f} seconds.")
+                raise ValueError("The AI model took too long to respond. Please try again later.")
+            except Exception as e:
+                logger.error(f"❌ {label} failed: {str(e)}")
+                raise ValueError(f"AI analysis failed: {e}")
+
+    def _build_parse_prompt(self, resume_text: str) -> str:
+        structure = _resume_structure(
+            "The summary exactly as written, or an empty string.",
+            "Original bullet point",
+            "        ",
+        )
+        resume_text = compact_resume_text(resume_text)
+        return f"""
+        You are an expert resume parser. Your task is to transform a raw resume text, which may have OCR errors or inconsistent formatting, into a faithful, structured JSON object.
+
+        **Core Instructions:**
+
+        1.  **INTELLIGENT PARSING:**
+            *   Read the entire `RESUME` text. Act like a human expert to deduce the structure.
+            *   Differentiate between professional `experience` (jobs at companies) and `projects` (personal, freelance, or academic work). A GitHub link often indicates a project.
+            *   Correctly group all bullet points under their respective job or project.
+            *   Ignore OCR artifacts and placeholder text like "Unspecified".
+
+        2.  **PRESERVE CONTENT:**
+            *   Do NOT rewrite, embellish or summarize. Keep every bullet point and its wording, fixing only obvious extraction errors.
+            *   Use empty strings or empty lists for sections that are not present.
+
+        3.  **FORMAT OUTPUT:**
+            *   You MUST provide a single, valid JSON object as your response.
+            *   Do NOT include markdown formatting (e.g., ```json), comments, or any text outside of the JSON structure.
+
+        **RESUME TEXT:**
+        ---
+        {resume_text}
+        ---
+
+        **JSON OUTPUT STRUCTURE (Strictly follow this):**
+        {structure}
+        """
+
+    def _build_tailor_prompt(self, structured_resume: Dict[str, Any], job_description: str) -> str:
+        structure = _resume_structure(
+            "The rewritten, optimized summary.",
+            "Optimized bullet point",
+            "            ",
+        )
+        resume_json = json.dumps(structured_resume, ensure_ascii=False, separators=(",", ":"))
+        job_description = compact_job_description(job_description)
+        return f"""
+        You are an expert career coach. Your task is to optimize an already structured resume (JSON) for a specific job description.
+
+        **Core Instructions:**
+
+        1.  **ANALYZE & OPTIMIZE:**
+            *   Scrutinize the `JOB DESCRIPTION` for key skills, technologies, and qualifications.
+            *   Rewrite the content for each section to align with the job description. Emphasize quantifiable achievements (e.g., "reduced workflow to 5-7 minutes") and use strong action verbs. Weave in keywords from the job description naturally.
+            *   Ensure every bullet point from the structured resume is represented and optimized in the final output.
+            *   Keep the facts (employers, titles, dates, links, contact details) unchanged.
+
+        2.  **FORMAT OUTPUT:**
+            *   You MUST provide a single, valid JSON object as your response.
+            *   Do NOT include markdown formatting (e.g., ```json), comments, or any text outside of the JSON structure.
+
+        **STRUCTURED RESUME (JSON):**
+        ---
+        {resume_json}
+        ---
+
+        **JOB DESCRIPTION:**
+        ---
+        {job_description}
+        ---
+
+        **JSON OUTPUT STRUCTURE (Strictly follow this):**
+        {{
+            "analysis": "A brief, 2-3 sentence analysis of the original resume's strengths and weaknesses against the job description.",
+            "overall_match_score": "An integer score from 0-100 representing how well the optimized resume matches the job.",
+            "key_improvement_areas": ["A list of the most critical improvements you made."],
+            "suggestions": ["A list of further changes the candidate could make, such as experience or skills to add."],
+            "optimized_resume_data": {structure}
+        }}
+        """
+
+    def _parse_structured_resume(self, response_text: str) -> Dict[str, Any]:
+        """
+        Parse the AI resume parsing response into the canonical structure.
+
+        Defects that can be repaired locally (code fences, trailing commas,
+        truncation) are fixed here rather than by calling the model again.
+        """
         try:
-            prompt = f"""
-            You are an expert resume parser and career coach. Your task is to intelligently transform a raw resume text, which may have OCR errors or inconsistent formatting, into a structured, optimized JSON object tailored for a specific job description.
-
-            **Core Instructions:**
-
-            1.  **INTELLIGENT PARSING:**
-                *   Read the entire `RESUME` text. Act like a human expert to deduce the structure.
-                *   Differentiate between professional `experience` (jobs at companies) and `projects` (personal, freelance, or academic work). A GitHub link often indicates a project.
-                *   Correctly group all bullet points under their respective job or project.
-                *   Ignore OCR artifacts and placeholder text like "Unspecified".
-
-            2.  **ANALYZE & OPTIMIZE:**
-                *   Scrutinize the `JOB DESCRIPTION` for key skills, technologies, and qualifications.
-                *   Rewrite the content for each section to align with the job description. Emphasize quantifiable achievements (e.g., "reduced workflow to 5-7 minutes") and use strong action verbs. Weave in keywords from the job description naturally.
-                *   Ensure every bullet point from the original resume is represented and optimized in the final output.
-
-            3.  **FORMAT OUTPUT:**
-                *   You MUST provide a single, valid JSON object as your response.
-                *   Do NOT include markdown formatting (e.g., ```json), comments, or any text outside of the JSON structure.
-
-            **RESUME TEXT:**
-            ---
-            {resume_text}
-            ---
-
-            **JOB DESCRIPTION:**
-            ---
-            {job_description}
-            ---
-
-            **JSON OUTPUT STRUCTURE (Strictly follow this):**
-            {{
-                "analysis": "A brief, 2-3 sentence analysis of the original resume's strengths and weaknesses against the job description.",
-                "overall_match_score": "An integer score from 0-100 representing how well the optimized resume matches the job.",
-                "key_improvement_areas": ["A list of the most critical improvements you made."],
-                "optimized_resume_data": {{
-                    "name": "Full Name",
-                    "contact_info": {{
-                        "location": "City, Country",
-                        "email": "email@address.com",
-                        "phone": "+123456789",
-                        "linkedin": "linkedin.com/in/username",
-                        "github": "github.com/username"
-                    }},
-                    "summary": "The rewritten, optimized summary.",
-                    "experience": [
-                        {{
-                            "title": "Job Title",
-                            "company": "Company Name",
-                            "location": "City, USA",
-                            "dates": "Month Year - Month Year or Present",
-                            "description": ["Optimized bullet point 1.", "Optimized bullet point 2."]
-                        }}
-                    ],
-                    "projects": [
-                        {{
-                            "name": "Project Name | Technologies Used",
-                            "dates": "Month Year - Month Year",
-                            "link": "github.com/link/to/project",
-                            "description": ["Optimized bullet point 1.", "Optimized bullet point 2."]
-                        }}
-                    ],
-                    "skills": {{
-                        "AI & ML": ["Skill 1", "Skill 2"],
-                        "Programming": ["Python", "JavaScript"],
-                        "APIs & DBs": ["Stripe API", "PostgreSQL"]
-                    }},
-                    "education": [
-                        {{
-                            "degree": "Degree or Diploma Name",
-                            "institution": "School or University Name",
-                            "year": "Year of Completion"
-                        }}
-                    ],
-                    "certifications": [
-                        {{
-                            "name": "Certification Name",
-                            "issuer": "Issuing Body",
-                            "year": "Year of Completion"
-                        }}
-                    ]
-                }}
-            }}
-            """
-
-            logger.info("📊 Generating structured optimization from AI (timeout: 300s)...")
-            
-            ai_task = self.model.generate_content_async(prompt)
-            response = await asyncio.wait_for(ai_task, timeout=300.0)
-            
-            analysis = self._parse_analysis_response(response.text)
-            logger.info(f"✅ Analysis complete - Match Score: {analysis.get('overall_match_score', 0)}%")
-            return analysis
-        
-        except asyncio.TimeoutError:
-            logger.error("❌ AI generation timed out after 300 seconds.")
-            raise ValueError("The AI model took too long to respond. Please try again later.")
-        except Exception as e:
-            logger.error(f"❌ Analysis failed: {str(e)}")
-            raise ValueError(f"AI analysis failed: {e}")
-
-    def _extract_text_from_pdf(self, pdf_content: bytes) -> str:
-        """Extract text from PDF content."""
-        try:
-            doc = fitz.open(stream=pdf_content, filetype="pdf")
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            return text
-        except Exception as e:
-            logger.error(f"Error extracting text from PDF: {str(e)}")
-            raise ValueError(f"Failed to extract text from PDF: {str(e)}")
+            data = repair_json(response_text)
+            if not isinstance(data, dict):
+                raise ValueError("Structured resume must be a JSON object")
+            return StructuredResume.model_validate(data).model_dump()
+        except (JSONRepairError, ValidationError, ValueError) as e:
+            logger.error(f"Error parsing structured resume JSON: {str(e)}")
+            raise ValueError(f"Could not parse AI response: {e}")
 
     def _parse_analysis_response(self, response_text: str) -> Dict[str, Any]:
         """
-        Parse the AI analysis response into a structured format
+        Parse the AI analysis response into a structured format, repairing
+        local defects and normalizing scores such as "85" or "85%".
         """
-        cleaned_response = response_text.strip().strip('`').strip('json').strip()
-
         try:
-            result = json.loads(cleaned_response)
-            required_fields = ['analysis', 'overall_match_score', 'key_improvement_areas', 'optimized_resume_data']
-            for field in required_fields:
-                if field not in result:
-                    raise ValueError(f"Missing required field in analysis: {field}")
-            return result
-        except Exception as e:
+            data = repair_json(response_text)
+            if not isinstance(data, dict):
+                raise ValueError("Analysis must be a JSON object")
+            if "optimized_resume_data" not in data:
+                raise ValueError("Missing required field in analysis: optimized_resume_data")
+            return ResumeAnalysis.model_validate(data).model_dump()
+        except (JSONRepairError, ValidationError, ValueError) as e:
             logger.error(f"Error parsing analysis JSON: {str(e)}")
-            raise ValueError(f"Could not parse AI response: {e}")
\ No newline at end of file
+            raise ValueError(f"Could not parse AI response: {e}")
@@ -0,0 +1,252 @@
+import asyncio
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, BinaryIO, Dict, Optional
+from app.utils.logger import setup_logger
+
+logger = setup_logger('artifact_service')
+
+ARTIFACT_STORE = os.getenv("ARTIFACT_STORE", "disk")  # disk | memory (single process only)
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "artifacts")
+ARTIFACT_MEMORY_MAX_BYTES = int(os.getenv("ARTIFACT_MEMORY_MAX_BYTES", str(256 * 1024 * 1024)))  # 256MB
+ARTIFACT_DISK_MAX_BYTES = int(os.getenv("ARTIFACT_DISK_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))  # 2GB
+ARTIFACT_DISK_TTL = int(os.getenv("ARTIFACT_DISK_TTL", str(7 * 86400)))  # 7 days since last use
+ARTIFACT_SWEEP_INTERVAL = int(os.getenv("ARTIFACT_SWEEP_INTERVAL", "300"))
+
+_ARTIFACT_ID_RE = re.compile(r"^[0-9a-f]{64}$")
+_EXTENSION_RE = re.compile(r"^[a-z0-9]{1,8}$")
+CHUNK_SIZE = 64 * 1024
+
+
+def is_valid_artifact_id(artifact_id: str) -> bool:
+    return bool(_ARTIFACT_ID_RE.match(artifact_id or ""))
+
+
+class ArtifactReader:
+    """
+    An opened artifact. Its content stays readable until close(), even if
+    the store evicts the artifact meanwhile: memory readers hold the bytes
+    and disk readers hold an open file, which outlives its unlinking.
+    """
+
+    def __init__(self, size: int, data: Optional[bytes] = None, file: Optional[BinaryIO] = None):
+        self.size = size
+        self._data = data
+        self._file = file
+
+    async def iter_range(self, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield bytes start..end (inclusive) in chunks."""
+        if self._data is not None:
+            for offset in range(start, end + 1, CHUNK_SIZE):
+                yield self._data[offset:min(offset + CHUNK_SIZE, end + 1)]
+            return
+
+        await asyncio.to_thread(self._file.seek, start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await asyncio.to_thread(self._file.read, min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    async def close(self) -> None:
+        self._data = None
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for generated binaries such as rendered PDFs.
+
+    The artifact id is the SHA-256 of the content, so identical renders are
+    stored once and an id can double as a strong ETag. The `disk` backend
+    (the default) writes files under ARTIFACT_DIR and is shared by every
+    worker; the `memory` backend evicts least recently used artifacts above
+    a byte budget and only suits a single process, because an id returned
+    by one worker is unknown to the others.
+    Disk files are touched when read, and a sweep at most every
+    `sweep_interval` seconds removes files unused for `disk_ttl` seconds,
+    then the least recently used ones until all of them (PDFs and
+    thumbnails alike) fit in `max_disk_bytes`. Evicted PDFs are rendered
+    again on demand by their owners.
+    """
+
+    def __init__(
+        self,
+        backend: str = ARTIFACT_STORE,
+        directory: str = ARTIFACT_DIR,
+        max_memory_bytes: int = ARTIFACT_MEMORY_MAX_BYTES,
+        max_disk_bytes: int = ARTIFACT_DISK_MAX_BYTES,
+        disk_ttl: int = ARTIFACT_DISK_TTL,
+        sweep_interval: int = ARTIFACT_SWEEP_INTERVAL,
+    ):
+        if backend not in ("memory", "disk"):
+            raise ValueError(f"Unsupported ARTIFACT_STORE: {backend}")
+        self.backend = backend
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_ttl = disk_ttl
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+        self._disk_entries = 0
+        self._disk_bytes = 0
+        self.evicted = 0
+
+        if backend == "disk":
+            os.makedirs(directory, exist_ok=True)
+        logger.info(f"📦 Artifact store initialized ({backend})")
+
+    async def put(self, data: bytes, extension: str = "pdf") -> str:
+        """Store data and return its artifact id."""
+        artifact_id = hashlib.sha256(data).hexdigest()
+        name = self._name(artifact_id, extension)
+        if self.backend == "memory":
+            if name not in self._memory:
+                self._memory[name] = data
+                self._memory_bytes += len(data)
+                self._evict()
+            self._memory.move_to_end(name)
+        else:
+            await asyncio.to_thread(self._write_file, name, data)
+            now = time.time()
+            if now - self._last_sweep >= self.sweep_interval:
+                self._last_sweep = now
+                try:
+                    await asyncio.to_thread(self.sweep, now)
+                except OSError as e:
+                    logger.warning(f"⚠️ Artifact sweep failed: {e}")
+        return artifact_id
+
+    async def get(self, artifact_id: str, extension: str = "pdf") -> Optional[bytes]:
+        """Return the full artifact content, or None if it is unknown."""
+        name = self._name(artifact_id, extension)
+        if self.backend == "memory":
+            data = self._memory.get(name)
+            if data is not None:
+                self._memory.move_to_end(name)
+            return data
+        try:
+            return await asyncio.to_thread(self._read_file, name)
+        except FileNotFoundError:
+            return None
+
+    async def size(self, artifact_id: str, extension: str = "pdf") -> Optional[int]:
+        """Return the artifact size in bytes, or None if it is unknown."""
+        name = self._name(artifact_id, extension)
+        if self.backend == "memory":
+            data = self._memory.get(name)
+            return len(data) if data is not None else None
+        try:
+            return await asyncio.to_thread(os.path.getsize, os.path.join(self.directory, name))
+        except OSError:
+            return None
+
+    async def open(self, artifact_id: str, extension: str = "pdf") -> Optional[ArtifactReader]:
+        """Open the artifact for reading, or return None if it is unknown. Close the reader when done."""
+        name = self._name(artifact_id, extension)
+        if self.backend == "memory":
+            data = self._memory.get(name)
+            if data is None:
+                return None
+            self._memory.move_to_end(name)
+            return ArtifactReader(len(data), data=data)
+        try:
+            return await asyncio.to_thread(self._open_file, name)
+        except FileNotFoundError:
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"backend": self.backend}
+        if self.backend == "memory":
+            stats.update(entries=len(self._memory), bytes=self._memory_bytes, max_bytes=self.max_memory_bytes)
+        else:
+            # As of the last sweep; other workers write to the same directory
+            stats.update(
+                entries=self._disk_entries, bytes=self._disk_bytes, max_bytes=self.max_disk_bytes,
+                ttl=self.disk_ttl, evicted=self.evicted,
+            )
+        return stats
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Remove expired disk artifacts, then the least recently used above the byte budget; returns files removed."""
+        now = time.time() if now is None else now
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # removed by another worker meanwhile
+                if entry.is_file():
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for mtime, size, path in files:
+            if mtime > now - self.disk_ttl and total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+            total -= size
+
+        self._disk_entries = len(files) - removed
+        self._disk_bytes = total
+        self.evicted += removed
+        if removed:
+            logger.info(f"🧹 Evicted {removed} artifact(s), {total / (1024 * 1024):.1f}MB kept")
+        return removed
+
+    def _name(self, artifact_id: str, extension: str) -> str:
+        if not is_valid_artifact_id(artifact_id) or not _EXTENSION_RE.match(extension):
+            raise ValueError("Invalid artifact id")
+        return f"{artifact_id}.{extension}"
+
+    def _evict(self) -> None:
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _write_file(self, name: str, data: bytes) -> None:
+        path = os.path.join(self.directory, name)
+        if os.path.exists(path):
+            self._touch(path)
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _open_file(self, name: str) -> ArtifactReader:
+        path = os.path.join(self.directory, name)
+        f = open(path, "rb")
+        size = os.fstat(f.fileno()).st_size
+        self._touch(path)
+        return ArtifactReader(size, file=f)
+
+    def _read_file(self, name: str) -> bytes:
+        path = os.path.join(self.directory, name)
+        with open(path, "rb") as f:
+            data = f.read()
+        self._touch(path)
+        return data
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        # The modification time doubles as the last-use time for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
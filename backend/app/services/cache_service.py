@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from app.utils.logger import setup_logger
+
+logger = setup_logger('cache_service')
+
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256"))
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "86400"))  # 24 hours
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "")  # empty disables the disk tier
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so cosmetic edits do not change the cache key."""
+    return _WHITESPACE_RE.sub(" ", text or "").strip()
+
+
+def make_cache_key(*parts: str) -> str:
+    """Build a content-addressed key from the given parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = (part or "").encode("utf-8")
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") never collide
+        digest.update(str(len(encoded)).encode("ascii") + b":" + encoded)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier result cache: a bounded in-memory LRU with TTL in front of an
+    optional on-disk tier that survives restarts.
+
+    Values must be JSON serializable; binary payloads should be stored
+    as base64 strings or elsewhere and referenced by id.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        ttl: int = RESULT_CACHE_TTL,
+        disk_dir: Optional[str] = RESULT_CACHE_DIR,
+        namespace: str = "optimize",
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.namespace = namespace
+        self.disk_dir = os.path.join(disk_dir, namespace) if disk_dir else None
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            logger.info(f"🗄️ Result cache '{namespace}' disk tier at {self.disk_dir}")
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for key, or None on a miss."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self._entries.pop(key, None)
+
+        if self.disk_dir:
+            stored = await asyncio.to_thread(self._read_disk, key, now)
+            if stored is not None:
+                expires_at, value = stored
+                self._remember(key, expires_at, value)
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store value under key in memory and, if enabled, on disk."""
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, value)
+        if self.disk_dir:
+            try:
+                await asyncio.to_thread(self._write_disk, key, expires_at, value)
+            except Exception as e:
+                # The disk tier is best effort; the in-memory entry is still valid
+                logger.warning(f"⚠️ Failed to persist cache entry {key[:12]}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "disk_enabled": bool(self.disk_dir),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _remember(self, key: str, expires_at: float, value: Dict[str, Any]) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Discarding unreadable cache entry {key[:12]}: {e}")
+            self._remove_disk(path)
+            return None
+
+        expires_at = stored.get("expires_at", 0)
+        if expires_at <= now:
+            self._remove_disk(path)
+            return None
+        return expires_at, stored.get("value")
+
+    def _write_disk(self, key: str, expires_at: float, value: Dict[str, Any]) -> None:
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"expires_at": expires_at, "value": value}, f)
+        # Atomic rename so concurrent readers never see a partial file
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _remove_disk(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -1,177 +1,341 @@
-# File Service - PDF and DOCX processing
+# File Service - PDF and DOCX text extraction engine
+import asyncio
+import hashlib
 import io
+import multiprocessing
 import os
-from typing import Optional, Tuple
+import tempfile
+import time
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 from fastapi import UploadFile, HTTPException
-import PyPDF2
-from docx import Document
-from datetime import datetime
+from app.services.cache_service import ResultCache
 from app.utils.logger import setup_logger
+from app.utils.metrics import record_stage, stage_timer
+from app.utils.text_compaction import PAGE_BREAK
+from app.utils.upload_limits import UPLOAD_MAX_BYTES, UploadTooLargeError
 
 logger = setup_logger('file_service')
 
+EXTRACT_EXECUTOR = os.getenv("EXTRACT_EXECUTOR", "process")  # process | thread
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(min(os.cpu_count() or 1, 4))))
+EXTRACT_MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", "30"))
+EXTRACT_PAGES_PER_TASK = int(os.getenv("EXTRACT_PAGES_PER_TASK", "4"))
+# Uploads above this size are copied to a temp file instead of held in memory
+UPLOAD_MEMORY_MAX_BYTES = int(os.getenv("UPLOAD_MEMORY_MAX_BYTES", str(1024 * 1024)))  # 1MB
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# A document is either held in memory or read from a file on disk by path
+DocumentSource = Union[bytes, str]
+
+
+def _open_pdf(source: DocumentSource):
+    import fitz  # PyMuPDF
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def sniff_document_kind(head: bytes) -> Optional[str]:
+    """Identify a PDF or DOCX (zip) upload from its leading bytes."""
+    if b"%PDF-" in head[:1024]:
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        return "docx"
+    return None
+
+
+def _is_docx_package(source: DocumentSource) -> bool:
+    try:
+        with zipfile.ZipFile(source if isinstance(source, str) else io.BytesIO(source)) as package:
+            return "word/document.xml" in package.namelist()
+    except zipfile.BadZipFile:
+        return False
+
+
+class IngestedUpload:
+    """
+    A checked upload. Small files are held in memory; larger ones are
+    copied to a named temp file that is read by path, from this process
+    and from the extraction pool's workers.
+
+    The upload is reference counted. The request holds the first
+    reference; work that can outlive the request, such as a shared
+    thumbnail flight, takes its own with hold(). The temp file is deleted
+    when the last holder calls close().
+    """
+
+    def __init__(
+        self, filename: str, kind: str, size: int, sha256: str,
+        data: Optional[bytes] = None, path: Optional[str] = None,
+    ):
+        self.filename = filename
+        self.kind = kind
+        self.size = size
+        self.sha256 = sha256
+        self.data = data
+        self.path = path
+        self._holders = 1
+
+    @property
+    def source(self) -> DocumentSource:
+        return self.path if self.path else self.data
+
+    def hold(self) -> Optional["IngestedUpload"]:
+        """Take another reference, or return None if the upload was already released."""
+        if self._holders == 0:
+            return None
+        self._holders += 1
+        return self
+
+    def close(self) -> None:
+        if self._holders == 0:
+            return
+        self._holders -= 1
+        if self._holders == 0:
+            self.data = None
+            if self.path:
+                _remove_file(self.path)
+                self.path = None
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        # Windows refuses while a pool worker still has the file open
+        logger.warning(f"⚠️ Could not remove upload temp file {path}: {e}")
+
+
+def _sha256_of(source: DocumentSource) -> str:
+    if isinstance(source, bytes):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    with open(source, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _pdf_page_count(source: DocumentSource) -> int:
+    with _open_pdf(source) as doc:
+        return doc.page_count
+
+
+def _extract_pdf_pages(source: DocumentSource, start: int, stop: int) -> List[str]:
+    """Extract pages [start, stop) from a PDF. Runs in a pool worker, so each call opens its own document."""
+    with _open_pdf(source) as doc:
+        return [doc[number].get_text() for number in range(start, min(stop, doc.page_count))]
+
+
+def _extract_docx(source: DocumentSource) -> str:
+    """Extract paragraph and table text from a DOCX document."""
+    from docx import Document
+    doc = Document(source if isinstance(source, str) else io.BytesIO(source))
+    lines = [paragraph.text for paragraph in doc.paragraphs]
+    for table in doc.tables:
+        for row in table.rows:
+            lines.append(" ".join(cell.text for cell in row.cells))
+    return "\n".join(lines)
+
+
 class FileService:
-    """Service for handling file operations with detailed logging"""
-    
-    async def extract_text_from_file(self, file: UploadFile) -> str:
+    """
+    Text extraction engine for uploaded resumes.
+
+    Uploads are checked under a byte cap and copied to a temp file above
+    1MB, so memory per upload stays flat. Extraction never runs on
+    the event loop: long PDFs are split into page ranges that are
+    extracted in parallel across the worker pool, at most `max_pages`
+    pages are read, and results are cached by the SHA-256 of the upload
+    so re-uploads are instant.
+    """
+
+    def __init__(
+        self,
+        executor_kind: str = EXTRACT_EXECUTOR,
+        workers: int = EXTRACT_WORKERS,
+        max_pages: int = EXTRACT_MAX_PAGES,
+        pages_per_task: int = EXTRACT_PAGES_PER_TASK,
+        cache: Optional[ResultCache] = None,
+    ):
+        if executor_kind not in ("process", "thread"):
+            raise ValueError(f"Unsupported EXTRACT_EXECUTOR: {executor_kind}")
+        self.executor_kind = executor_kind
+        self.workers = max(workers, 1)
+        self.max_pages = max_pages
+        self.pages_per_task = max(pages_per_task, 1)
+        self.cache = cache or ResultCache(namespace="extract")
+        self._pool: Optional[Executor] = None
+
+    def start(self) -> None:
+        if self._pool is not None:
+            return
+        if self.executor_kind == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="extract")
+        logger.info(f"📂 Extraction engine started: {self.workers} {self.executor_kind} workers, {self.max_pages} page cap")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def ingest(self, file: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> IngestedUpload:
         """
-        Extract text from uploaded file (PDF or DOCX) with detailed logging
+        Check an upload in chunks under a running byte cap.
+
+        The document type comes from the file's magic bytes, never from the
+        client-supplied content type. Content is hashed while it is read.
+        Up to UPLOAD_MEMORY_MAX_BYTES it is kept in memory; beyond that it
+        is written to a named temp file owned by the returned upload, which
+        stays readable after the request closes the multipart form.
+        Callers must close() the result.
         """
-        file_info = f"{file.filename} ({file.content_type}, {file.size} bytes)"
-        logger.info(f"📂 Starting file processing: {file_info}")
-        
-        try:
-            # Read file content
-            start_time = datetime.now()
-            content = await file.read()
-            read_time = (datetime.now() - start_time).total_seconds()
-            
-            logger.debug(f"📥 File read completed in {read_time:.3f}s")
-            
-            # Determine file type and process
-            if not file.content_type:
-                logger.error("❌ No content type provided")
-                raise ValueError("File type could not be determined")
-            
-            if file.content_type == "application/pdf":
-                logger.info("🔍 Processing PDF file")
-                text = self._extract_from_pdf(content)
-            elif file.content_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                logger.info("📝 Processing DOCX file")
-                text = self._extract_from_docx(content)
-            else:
-                logger.error(f"❌ Unsupported file type: {file.content_type}")
-                raise ValueError(f"Unsupported file type: {file.content_type}")
-            
-            # Log text extraction results
-            char_count = len(text)
-            word_count = len(text.split())
-            logger.info(f"✅ Text extraction complete - {char_count} characters, {word_count} words")
-            
-            if char_count == 0:
-                logger.warning("⚠️ Extracted text is empty - possible issue with file content")
-            
-            return text
-                
-        except Exception as e:
-            error_msg = f"Error extracting text from {file.filename}: {str(e)}"
-            logger.error(f"❌ {error_msg}", exc_info=True)
-            raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
-    
-    def _extract_from_pdf(self, content: bytes) -> str:
-        """Extract text from PDF content with detailed logging"""
-        logger.debug("📄 Extracting text from PDF")
-        start_time = datetime.now()
-        
+        if not file.filename:
+            raise HTTPException(status_code=400, detail="No file provided")
+
+        start = time.perf_counter()
+        digest = hashlib.sha256()
+        size = 0
+        kind = None
+        chunks: List[bytes] = []
+        spool = None
+
         try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-            page_count = len(pdf_reader.pages)
-            logger.debug(f"📑 PDF contains {page_count} pages")
-            
-            text_parts = []
-            for i, page in enumerate(pdf_reader.pages, 1):
-                try:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_parts.append(page_text)
-                        logger.debug(f"  ✓ Page {i}: {len(page_text)} characters")
-                    else:
-                        logger.warning(f"  ⚠️ Page {i}: No text extracted")
-                except Exception as page_error:
-                    logger.warning(f"  ⚠️ Error extracting text from page {i}: {str(page_error)}")
-            
-            full_text = "\n\n".join(text_parts).strip()
-            process_time = (datetime.now() - start_time).total_seconds()
-            logger.debug(f"✅ PDF processing completed in {process_time:.3f}s")
-            
-            return full_text
-            
-        except Exception as e:
-            logger.error(f"❌ PDF extraction failed: {str(e)}", exc_info=True)
+            await file.seek(0)
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+                if kind is None:
+                    kind = sniff_document_kind(chunk)
+                    if kind is None:
+                        raise HTTPException(status_code=400, detail="Only PDF and DOCX supported")
+                digest.update(chunk)
+
+                if spool is None and size > UPLOAD_MEMORY_MAX_BYTES:
+                    spool = await asyncio.to_thread(
+                        tempfile.NamedTemporaryFile, prefix="upload-", suffix=f".{kind}", delete=False
+                    )
+                    chunks.append(chunk)
+                    await asyncio.to_thread(spool.writelines, chunks)
+                    chunks = []
+                elif spool is not None:
+                    await asyncio.to_thread(spool.write, chunk)
+                else:
+                    chunks.append(chunk)
+            if spool is not None:
+                await asyncio.to_thread(spool.close)
+        except BaseException:
+            if spool is not None:
+                spool.close()
+                _remove_file(spool.name)
             raise
-    
-            # Return placeholder for demo
-            return f"""PDF Processing Note:
-            
-Your PDF file "{content[:50]}..." was uploaded successfully, but automatic text extraction encountered an issue.
 
-For best results, please:
-1. Copy and paste your resume text directly into the text area
-2. Ensure the PDF contains selectable text (not just images)
-3. Try saving your resume as a Word document instead
+        if spool is not None:
+            upload = IngestedUpload(file.filename, kind, size, digest.hexdigest(), path=spool.name)
+        else:
+            upload = IngestedUpload(file.filename, kind, size, digest.hexdigest(), data=b"".join(chunks))
+
+        if kind is None:
+            upload.close()
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+
+        if kind == "docx" and not await asyncio.to_thread(_is_docx_package, upload.source):
+            upload.close()
+            raise HTTPException(status_code=400, detail="Only PDF and DOCX supported")
+
+        record_stage("upload_read", time.perf_counter() - start)
+        logger.info(f"📥 Ingested {file.filename}: {kind}, {size} bytes{' (copied to disk)' if upload.path else ''}")
+        return upload
+
+    async def extract_text(self, source: DocumentSource, kind: str, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Extract text from a PDF or DOCX document held in memory or spooled to disk.
+
+        Returns a dict with `text`, `pages` (pages read), `total_pages` and
+        `truncated` (True when the page cap was hit).
+        """
+        if sha256 is None:
+            sha256 = await asyncio.to_thread(_sha256_of, source)
+        key = f"{sha256}:{kind}:{self.max_pages}"
+        cached = await self.cache.get(key)
+        if cached is not None:
+            logger.info(f"⚡ Extraction cache hit for {key[:12]}")
+            return cached
+
+        page_texts: List[str] = []
+        total_pages = 0
+        with stage_timer("text_extract"):
+            async for number, text, total_pages in self.iter_pages(source, kind):
+                page_texts.append(text)
+
+        result = {
+            # A form feed between PDF pages lets prompt compaction find running headers and footers
+            "text": PAGE_BREAK.join(page_texts) if kind == "pdf" else "\n".join(page_texts),
+            "pages": len(page_texts),
+            "total_pages": total_pages,
+            "truncated": len(page_texts) < total_pages,
+        }
+        await self.cache.set(key, result)
+        return result
+
+    async def iter_pages(self, source: DocumentSource, kind: str) -> AsyncIterator[Tuple[int, str, int]]:
+        """
+        Yield `(page_number, text, total_pages)` in page order as pages are extracted.
 
-This is a demo limitation - full PDF processing will be enhanced in production."""
+        DOCX files have no fixed pagination and are yielded as a single page.
+        """
+        if self._pool is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+
+        if kind == "docx":
+            try:
+                text = await loop.run_in_executor(self._pool, _extract_docx, source)
+            except Exception as e:
+                logger.error(f"❌ DOCX extraction failed: {str(e)}")
+                raise ValueError(f"Failed to extract text from DOCX: {str(e)}")
+            yield 0, text, 1
+            return
+
+        if kind != "pdf":
+            raise ValueError(f"Unsupported document type: {kind}")
 
-    def _extract_from_docx(self, content: bytes) -> str:
-        """Extract text from DOCX content"""
         try:
-            logger.info("🔍 Extracting text from DOCX...")
-            
-            docx_file = io.BytesIO(content)
-            doc = docx.Document(docx_file)
-            
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            
-            # Extract text from tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        text += cell.text + " "
-                    text += "\n"
-            
-            # Clean up text
-            text = self._clean_extracted_text(text)
-            
-            if len(text.strip()) < 50:
-                raise Exception("DOCX appears to be empty")
-            
-            logger.info(f"✅ DOCX text extracted: {len(text)} characters")
-            return text
-            
+            total_pages = await loop.run_in_executor(self._pool, _pdf_page_count, source)
         except Exception as e:
-            logger.error(f"❌ DOCX extraction failed: {str(e)}")
-            # Return placeholder for demo
-            return f"""DOCX Processing Note:
-            
-Your Word document was uploaded successfully, but automatic text extraction encountered an issue.
-
-For best results, please:
-1. Copy and paste your resume text directly into the text area
-2. Ensure the document is in proper DOCX format
-3. Check that the document isn't password protected
-
-This is a demo limitation - full DOCX processing will be enhanced in production."""
-
-    def _clean_extracted_text(self, text: str) -> str:
-        """Clean and normalize extracted text"""
-        import re
-        
-        # Remove excessive whitespace
-        text = re.sub(r'\n\s*\n', '\n\n', text)
-        text = re.sub(r' +', ' ', text)
-        
-        # Remove special characters that might cause issues
-        text = re.sub(r'[^\x00-\x7F]+', '', text)
-        
-        # Strip leading/trailing whitespace
-        text = text.strip()
-        
-        return text
-
-    def validate_file(self, file: UploadFile) -> bool:
-        """Validate uploaded file"""
-        max_size = 10 * 1024 * 1024  # 10MB
-        allowed_types = [
-            "application/pdf",
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+            logger.error(f"❌ Error opening PDF: {str(e)}")
+            raise ValueError(f"Failed to extract text from PDF: {str(e)}")
+
+        page_limit = min(total_pages, self.max_pages)
+        if page_limit < total_pages:
+            logger.warning(f"⚠️ PDF has {total_pages} pages, extracting only the first {page_limit}")
+
+        # Submit every page range up front so they run in parallel, then yield in order
+        futures = [
+            loop.run_in_executor(self._pool, _extract_pdf_pages, source, start, min(start + self.pages_per_task, page_limit))
+            for start in range(0, page_limit, self.pages_per_task)
         ]
-        
-        if file.size and file.size > max_size:
-            raise HTTPException(status_code=400, detail="File too large (max 10MB)")
-        
-        if file.content_type not in allowed_types:
-            raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
-        
-        return True
\ No newline at end of file
+        try:
+            number = 0
+            for future in futures:
+                for text in await future:
+                    yield number, text, total_pages
+                    number += 1
+        except Exception as e:
+            logger.error(f"❌ Error extracting text from PDF: {str(e)}")
+            raise ValueError(f"Failed to extract text from PDF: {str(e)}")
+        finally:
+            for future in futures:
+                future.cancel()
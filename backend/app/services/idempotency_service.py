@@ -0,0 +1,49 @@
+import os
+from typing import Any, Dict, Optional
+from app.services.cache_service import ResultCache, make_cache_key
+from app.utils.logger import setup_logger
+
+logger = setup_logger('idempotency_service')
+
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "86400"))  # 24 hours
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class IdempotencyKeyConflictError(ValueError):
+    """Raised when an Idempotency-Key is reused with a different request body."""
+
+
+class IdempotencyStore:
+    """
+    Remembers the result of each request made with an `Idempotency-Key`.
+
+    A retry that arrives after the original request finished gets the stored
+    result back even if the result cache has since evicted it or the retry
+    asked to bypass the cache. Each record keeps the fingerprint (content
+    hash) of the request that created it, so reusing a key for a different
+    request is rejected rather than silently answered with the wrong result.
+    Keys are scoped per client.
+    """
+
+    def __init__(self, cache: Optional[ResultCache] = None):
+        self.cache = cache or ResultCache(ttl=IDEMPOTENCY_TTL, namespace="idempotency")
+
+    @staticmethod
+    def _record_key(scope: str, idempotency_key: str) -> str:
+        return make_cache_key(scope, idempotency_key)
+
+    async def get(self, scope: str, idempotency_key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        record = await self.cache.get(self._record_key(scope, idempotency_key))
+        if record is None:
+            return None
+        if record["fingerprint"] != fingerprint:
+            raise IdempotencyKeyConflictError(
+                "Idempotency-Key was already used for a different request."
+            )
+        logger.info(f"🔁 Replaying stored result for idempotency key {idempotency_key[:32]}")
+        return record["result"]
+
+    async def set(self, scope: str, idempotency_key: str, fingerprint: str, result: Dict[str, Any]) -> None:
+        await self.cache.set(
+            self._record_key(scope, idempotency_key), {"fingerprint": fingerprint, "result": result}
+        )
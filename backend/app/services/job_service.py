@@ -0,0 +1,245 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from app.services.admission_control import LANE_BATCH
+from app.services.artifact_service import ArtifactStore
+from app.services.job_store import FINISHED_STATUSES, JOB_SUCCEEDED, JobLeaseLostError, JobRecord, JobStore
+from app.services.optimization_service import OptimizationService
+from app.utils.errors import ServiceBusyError
+from app.utils.logger import request_id_var, setup_logger
+
+logger = setup_logger('job_service')
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+JOB_MAINTENANCE_INTERVAL = float(os.getenv("JOB_MAINTENANCE_INTERVAL", "30"))
+
+
+class JobService:
+    """
+    Runs optimization jobs from the persistent JobStore in the background.
+
+    Each web worker runs `workers` job loops that claim queued jobs, run
+    them through OptimizationService.stream and record every stage in the
+    store, so progress is visible from any worker. A heartbeat renews the
+    lease of a running job; a maintenance loop requeues jobs whose worker
+    died and purges results past their TTL. On shutdown, jobs that cannot
+    finish in time are released back to the queue for the next worker.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        optimization_service: OptimizationService,
+        artifact_store: ArtifactStore,
+        workers: int = JOB_WORKERS,
+        poll_interval: float = JOB_POLL_INTERVAL,
+        maintenance_interval: float = JOB_MAINTENANCE_INTERVAL,
+    ):
+        self.store = store
+        self.optimization_service = optimization_service
+        self.artifact_store = artifact_store
+        self.workers = max(workers, 0)
+        self.poll_interval = poll_interval
+        self.maintenance_interval = maintenance_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._updates: Dict[str, asyncio.Event] = {}
+        self._watchers: Dict[str, int] = {}
+        self._running: Set[str] = set()
+        self._stopping = False
+        self.completed = 0
+        self.failed = 0
+        self.requeued = 0
+
+    def start(self) -> None:
+        """Start the job loops; must be called from the running event loop."""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintain()))
+        logger.info(f"🧵 Job service started: {self.workers} workers")
+
+    async def shutdown(self, timeout: float) -> None:
+        """Stop claiming jobs, give running ones up to timeout seconds, then requeue the rest."""
+        if not self._tasks:
+            return
+        workers, maintenance = self._tasks[:-1], self._tasks[-1]
+        maintenance.cancel()
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if self._running:
+            logger.info(f"⏳ Waiting for {len(self._running)} running job(s) (timeout {timeout:.0f}s)...")
+        _, pending = await asyncio.wait(workers, timeout=timeout) if workers else (set(), set())
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("🛑 Job service stopped")
+
+    async def submit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        # Logs of the run are correlated with the request that queued it
+        payload = dict(payload, request_id=request_id_var.get())
+        job = await asyncio.to_thread(self.store.create, payload)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        logger.info(f"📝 Job {job['id']} queued")
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job, restoring its PDF artifact from the job store if it was evicted."""
+        record = await asyncio.to_thread(self.store.get, job_id)
+        if record is None:
+            return None
+        job = record.to_dict()
+        if record.status == JOB_SUCCEEDED and record.result:
+            artifact_id = record.result.get("pdf_artifact_id")
+            if artifact_id and await self.artifact_store.size(artifact_id) is None:
+                pdf = await asyncio.to_thread(self.store.get_pdf, job_id)
+                if pdf:
+                    await self.artifact_store.put(pdf)
+        return job
+
+    async def events(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the job each time its status, stage or section count changes, ending once it finishes."""
+        last = None
+        self._watchers[job_id] = self._watchers.get(job_id, 0) + 1
+        try:
+            while True:
+                job = await self.get(job_id)
+                if job is None:
+                    return
+                snapshot = (job["status"], job["stage"], job["sections"])
+                if snapshot != last:
+                    last = snapshot
+                    yield job
+                if job["status"] in FINISHED_STATUSES:
+                    return
+                # Progress from this process wakes us at once; other workers' jobs are polled
+                update = self._updates.setdefault(job_id, asyncio.Event())
+                try:
+                    await asyncio.wait_for(update.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # The last watcher to leave drops the job's event, whichever worker runs it
+            remaining = self._watchers.pop(job_id) - 1
+            if remaining:
+                self._watchers[job_id] = remaining
+            else:
+                self._updates.pop(job_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": len(self._running),
+            "completed": self.completed,
+            "failed": self.failed,
+            "requeued": self.requeued,
+        }
+
+    async def _worker(self) -> None:
+        while not self._stopping:
+            try:
+                job = await asyncio.to_thread(self.store.claim_next)
+            except Exception as e:
+                logger.error(f"❌ Failed to claim job: {e}")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: JobRecord) -> None:
+        job_id = job.id
+        lease = job.lease_token
+        payload = job.payload
+        self._running.add(job_id)
+        request_id = request_id_var.set(payload.get("request_id") or job_id)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, lease))
+        logger.info(f"🏃 Running job {job_id} (attempt {job.attempts})")
+        try:
+            result = None
+            cached = False
+            sections = 0
+            async for event in self.optimization_service.stream(
+                payload["resume_text"],
+                payload["job_description"],
+                template_name=payload["template"],
+                bypass_cache=payload.get("bypass_cache", False),
+                lane=LANE_BATCH,
+            ):
+                renewed = True
+                if event["type"] == "status":
+                    renewed = await asyncio.to_thread(self.store.progress, job_id, lease, stage=event["stage"])
+                elif event["type"] == "section":
+                    sections += 1
+                    renewed = await asyncio.to_thread(self.store.progress, job_id, lease, sections=sections)
+                elif event["type"] == "result":
+                    result, cached = event["result"], event["cached"]
+                if not renewed:
+                    raise JobLeaseLostError(job_id)
+                self._notify(job_id)
+
+            if result is None:
+                raise ValueError("Optimization finished without a result.")
+            pdf = await self.artifact_store.get(result["pdf_artifact_id"])
+            if not await asyncio.to_thread(self.store.complete, job_id, lease, dict(result, cached=cached), pdf):
+                raise JobLeaseLostError(job_id)
+            self.completed += 1
+            logger.info(f"✅ Job {job_id} succeeded")
+        except JobLeaseLostError:
+            logger.warning(f"⚠️ Job {job_id} was reclaimed by another worker after its lease lapsed, abandoning it")
+        except ServiceBusyError as e:
+            # Overload is transient: wait it out in the queue without spending an attempt
+            await asyncio.to_thread(self.store.release, job_id, lease, e.retry_after, False)
+            self.requeued += 1
+            logger.warning(f"⚠️ Job {job_id} requeued for {e.retry_after}s: {e}")
+        except asyncio.CancelledError:
+            await asyncio.to_thread(self.store.release, job_id, lease)
+            self.requeued += 1
+            logger.warning(f"⚠️ Job {job_id} interrupted by shutdown, requeued")
+            raise
+        except Exception as e:
+            await asyncio.to_thread(self.store.fail, job_id, lease, f"Failed to optimize resume: {e}")
+            self.failed += 1
+            logger.error(f"❌ Job {job_id} failed: {e}")
+        finally:
+            heartbeat.cancel()
+            self._running.discard(job_id)
+            self._notify(job_id)
+            request_id_var.reset(request_id)
+
+    async def _heartbeat(self, job_id: str, lease: str) -> None:
+        interval = max(self.store.lease_seconds / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await asyncio.to_thread(self.store.progress, job_id, lease):
+                    # The job was reclaimed; the run notices at its next update
+                    return
+            except Exception as e:
+                logger.error(f"❌ Failed to renew lease for job {job_id}: {e}")
+
+    async def _maintain(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.store.recover_expired_leases)
+                purged = await asyncio.to_thread(self.store.purge_expired)
+                if purged:
+                    logger.info(f"🧹 Purged {purged} expired job(s)")
+            except Exception as e:
+                logger.error(f"❌ Job maintenance failed: {e}")
+            await asyncio.sleep(self.maintenance_interval)
+
+    def _notify(self, job_id: str) -> None:
+        update = self._updates.pop(job_id, None)
+        if update is not None:
+            update.set()
@@ -0,0 +1,288 @@
+import os
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from sqlalchemy import JSON, Float, Integer, LargeBinary, String, Text, create_engine, delete, event, func, inspect, select, text, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
+from app.utils.logger import setup_logger
+
+logger = setup_logger('job_store')
+
+JOB_DATABASE_URL = os.getenv(
+    "JOB_DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'tailorhire-jobs.sqlite3')}"
+)
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "86400"))  # 24 hours
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED)
+
+
+class JobLeaseLostError(RuntimeError):
+    """Raised by a worker that finds its job was reclaimed by another worker after its lease lapsed."""
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class JobRecord(Base):
+    __tablename__ = "jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    status: Mapped[str] = mapped_column(String(16), index=True)
+    stage: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    sections: Mapped[int] = mapped_column(Integer, default=0)
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSON)
+    result: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    pdf: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[float] = mapped_column(Float)
+    updated_at: Mapped[float] = mapped_column(Float)
+    available_at: Mapped[float] = mapped_column(Float, index=True)
+    lease_until: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    lease_token: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    expires_at: Mapped[Optional[float]] = mapped_column(Float, nullable=True, index=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "sections": self.sections,
+            "result": self.result,
+            "error": self.error,
+            "attempts": self.attempts,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "expires_at": self.expires_at,
+        }
+
+
+class JobStore:
+    """
+    Persistent optimization job queue backed by SQLite through SQLAlchemy.
+
+    Jobs survive restarts: a worker claims a job by taking a lease that it
+    renews while the job runs, and jobs whose lease lapses (the worker died
+    or was restarted) go back to the queue until JOB_MAX_ATTEMPTS is spent.
+    Every claim gets a fresh lease token, and updates from the worker only
+    apply while its token is current, so a worker that stalled past its
+    lease cannot overwrite the job after another worker reclaimed it.
+    The database file is shared, so every web worker on the host serves
+    and runs the same queue. Finished jobs keep their result JSON and PDF
+    bytes for `result_ttl` seconds. All methods block; async callers run
+    them through asyncio.to_thread.
+    """
+
+    def __init__(
+        self,
+        url: str = JOB_DATABASE_URL,
+        result_ttl: int = JOB_RESULT_TTL,
+        lease_seconds: int = JOB_LEASE_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ):
+        self.url = url
+        self.result_ttl = result_ttl
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(max_attempts, 1)
+        self.engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": 5.0})
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine, "connect", self._configure_sqlite)
+        Base.metadata.create_all(self.engine)
+        self._add_lease_token_column()
+        # The store is created before gunicorn forks its workers (preload):
+        # each child must open its own connections, not reuse the parent's
+        os.register_at_fork(after_in_child=self._after_fork)
+        logger.info(f"🗂️ Job store initialized ({url})")
+
+    def _after_fork(self) -> None:
+        self.engine.dispose(close=False)
+
+    def _add_lease_token_column(self) -> None:
+        # Job files created before lease tokens lack the column
+        if "lease_token" in {column["name"] for column in inspect(self.engine).get_columns("jobs")}:
+            return
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(text("ALTER TABLE jobs ADD COLUMN lease_token VARCHAR(32)"))
+        except OperationalError:
+            # Another process added it first
+            pass
+
+    @staticmethod
+    def _configure_sqlite(connection, _record) -> None:
+        cursor = connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    def create(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.time()
+        job = JobRecord(
+            id=uuid.uuid4().hex,
+            status=JOB_QUEUED,
+            stage=JOB_QUEUED,
+            sections=0,
+            payload=payload,
+            attempts=0,
+            created_at=now,
+            updated_at=now,
+            available_at=now,
+        )
+        with Session(self.engine) as session, session.begin():
+            session.add(job)
+            session.flush()
+            return job.to_dict()
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        with Session(self.engine, expire_on_commit=False) as session:
+            job = session.get(JobRecord, job_id)
+            if job is not None and job.expires_at is not None and job.expires_at <= time.time():
+                return None
+            return job
+
+    def get_pdf(self, job_id: str) -> Optional[bytes]:
+        with Session(self.engine) as session:
+            return session.scalar(select(JobRecord.pdf).where(JobRecord.id == job_id))
+
+    def claim_next(self) -> Optional[JobRecord]:
+        """
+        Atomically move the oldest runnable queued job to running and lease
+        it. The returned record's lease_token must be passed to every update.
+        """
+        now = time.time()
+        next_id = (
+            select(JobRecord.id)
+            .where(JobRecord.status == JOB_QUEUED, JobRecord.available_at <= now)
+            .order_by(JobRecord.created_at)
+            .limit(1)
+            .scalar_subquery()
+        )
+        # A single UPDATE ... RETURNING, so two workers can never claim the same job
+        statement = (
+            update(JobRecord)
+            .where(JobRecord.id == next_id, JobRecord.status == JOB_QUEUED)
+            .values(
+                status=JOB_RUNNING,
+                attempts=JobRecord.attempts + 1,
+                lease_until=now + self.lease_seconds,
+                lease_token=uuid.uuid4().hex,
+                updated_at=now,
+            )
+            .returning(JobRecord)
+        )
+        with Session(self.engine, expire_on_commit=False) as session, session.begin():
+            return session.scalars(statement).first()
+
+    def progress(
+        self, job_id: str, lease_token: str, stage: Optional[str] = None, sections: Optional[int] = None
+    ) -> bool:
+        """Record progress and renew the job's lease; False if the lease was lost."""
+        now = time.time()
+        values: Dict[str, Any] = {"lease_until": now + self.lease_seconds, "updated_at": now}
+        if stage is not None:
+            values["stage"] = stage
+        if sections is not None:
+            values["sections"] = sections
+        return self._update_running(job_id, lease_token, values)
+
+    def complete(self, job_id: str, lease_token: str, result: Dict[str, Any], pdf: Optional[bytes]) -> bool:
+        now = time.time()
+        return self._update_running(job_id, lease_token, {
+            "status": JOB_SUCCEEDED,
+            "stage": JOB_SUCCEEDED,
+            "result": result,
+            "pdf": pdf,
+            "lease_until": None,
+            "lease_token": None,
+            "updated_at": now,
+            "expires_at": now + self.result_ttl,
+        })
+
+    def fail(self, job_id: str, lease_token: str, error: str) -> bool:
+        now = time.time()
+        return self._update_running(job_id, lease_token, {
+            "status": JOB_FAILED,
+            "stage": JOB_FAILED,
+            "error": error,
+            "lease_until": None,
+            "lease_token": None,
+            "updated_at": now,
+            "expires_at": now + self.result_ttl,
+        })
+
+    def release(self, job_id: str, lease_token: str, delay: float = 0.0, count_attempt: bool = True) -> bool:
+        """Put a running job back on the queue, optionally not before `delay` seconds."""
+        now = time.time()
+        values: Dict[str, Any] = {
+            "status": JOB_QUEUED,
+            "stage": JOB_QUEUED,
+            "sections": 0,
+            "lease_until": None,
+            "lease_token": None,
+            "updated_at": now,
+            "available_at": now + delay,
+        }
+        if not count_attempt:
+            values["attempts"] = JobRecord.attempts - 1
+        return self._update_running(job_id, lease_token, values)
+
+    def recover_expired_leases(self) -> int:
+        """Requeue running jobs whose worker stopped renewing the lease; fail those out of attempts."""
+        now = time.time()
+        lapsed = (JobRecord.status == JOB_RUNNING, JobRecord.lease_until < now)
+        with Session(self.engine) as session, session.begin():
+            failed = session.execute(
+                update(JobRecord)
+                .where(*lapsed, JobRecord.attempts >= self.max_attempts)
+                .values(
+                    status=JOB_FAILED,
+                    stage=JOB_FAILED,
+                    error="Job was interrupted too many times.",
+                    lease_until=None,
+                    lease_token=None,
+                    updated_at=now,
+                    expires_at=now + self.result_ttl,
+                )
+            ).rowcount
+            requeued = session.execute(
+                update(JobRecord)
+                .where(*lapsed)
+                .values(
+                    status=JOB_QUEUED, stage=JOB_QUEUED, sections=0, lease_until=None, lease_token=None,
+                    updated_at=now, available_at=now,
+                )
+            ).rowcount
+        if failed or requeued:
+            logger.warning(f"♻️ Recovered {requeued} interrupted job(s), failed {failed} out of attempts")
+        return requeued
+
+    def purge_expired(self) -> int:
+        with Session(self.engine) as session, session.begin():
+            return session.execute(delete(JobRecord).where(JobRecord.expires_at <= time.time())).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with Session(self.engine) as session:
+            rows: List[Any] = session.execute(
+                select(JobRecord.status, func.count()).group_by(JobRecord.status)
+            ).all()
+        return {status: count for status, count in rows}
+
+    def _update_running(self, job_id: str, lease_token: str, values: Dict[str, Any]) -> bool:
+        # Only the claim holding the current lease token may change the job.
+        # Recovery clears the token and a new claim issues another, so a
+        # worker whose lease lapsed updates nothing and gets False.
+        with Session(self.engine) as session, session.begin():
+            return session.execute(
+                update(JobRecord)
+                .where(JobRecord.id == job_id, JobRecord.status == JOB_RUNNING, JobRecord.lease_token == lease_token)
+                .values(**values)
+            ).rowcount == 1
@@ -0,0 +1,258 @@
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from app.services.cache_service import make_cache_key
+from app.utils.logger import setup_logger
+
+logger = setup_logger('llm_providers')
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")  # gemini | record | replay | stub
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+# Ask Gemini for application/json constrained by a response schema
+GEMINI_STRUCTURED_OUTPUT = os.getenv("GEMINI_STRUCTURED_OUTPUT", "true").lower() == "true"
+LLM_RECORDINGS_DIR = os.getenv("LLM_RECORDINGS_DIR", "recordings")
+# Replay misses fall back to stub responses instead of failing
+LLM_REPLAY_FALLBACK = os.getenv("LLM_REPLAY_FALLBACK", "false").lower() == "true"
+# e.g. "fixed:0.5", "uniform:1,3", "normal:2,0.5", "lognormal:2,0.6" (median, sigma)
+LLM_STUB_LATENCY = os.getenv("LLM_STUB_LATENCY", "fixed:0")
+LLM_STUB_SEED = os.getenv("LLM_STUB_SEED", "")
+LLM_STUB_CHUNK_CHARS = int(os.getenv("LLM_STUB_CHUNK_CHARS", "200"))
+
+Schema = Optional[Dict[str, Any]]
+LatencySampler = Callable[[random.Random], float]
+
+
+def parse_latency(spec: str) -> LatencySampler:
+    """Build a latency sampler (seconds) from a `kind:args` spec."""
+    kind, _, args = (spec or "fixed:0").partition(":")
+    try:
+        values = [float(value) for value in args.split(",") if value.strip()] or [0.0]
+        if kind == "fixed":
+            return lambda rng: values[0]
+        if kind == "uniform":
+            low, high = values
+            return lambda rng: rng.uniform(low, high)
+        if kind == "normal":
+            mean, stddev = values
+            return lambda rng: max(rng.gauss(mean, stddev), 0.0)
+        if kind == "lognormal":
+            median, sigma = values
+            return lambda rng: rng.lognormvariate(math.log(median), sigma)
+    except ValueError:
+        pass
+    raise ValueError(f"Unsupported latency spec: {spec}")
+
+
+def prompt_key(prompt: str, schema: Schema) -> str:
+    """Key a recording by everything that determines the response."""
+    return make_cache_key(prompt, json.dumps(schema, sort_keys=True) if schema else "")
+
+
+class LLMProvider(ABC):
+    """A text generation backend: one full response, or a stream of text chunks."""
+
+    name = "base"
+    model_name = "unknown"
+
+    @abstractmethod
+    async def generate(self, prompt: str, schema: Schema = None) -> str:
+        """Return the complete response text."""
+
+    @abstractmethod
+    def stream(self, prompt: str, schema: Schema = None) -> AsyncIterator[str]:
+        """Yield the response text in chunks as it is produced."""
+
+    async def warm_up(self) -> None:
+        """Prepare the backend (imports, connections) before the first real call."""
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, model_name: str = GEMINI_MODEL, structured_output: bool = GEMINI_STRUCTURED_OUTPUT):
+        self.api_key = os.getenv('GEMINI_API_KEY')
+        if not self.api_key:
+            raise ValueError("GEMINI_API_KEY environment variable not set")
+        self.model_name = model_name
+        self.structured_output = structured_output
+        # google.generativeai pulls in gRPC and protobuf; import it on first use
+        self._genai = None
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+            self._genai = genai
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    async def warm_up(self) -> None:
+        """Import the client and open its connection with a token count, which costs no generation."""
+        await self.model.count_tokens_async("warm-up")
+
+    def _generation_config(self, schema: Schema):
+        if not self.structured_output or schema is None:
+            return None
+        return self._genai.GenerationConfig(response_mime_type="application/json", response_schema=schema)
+
+    async def generate(self, prompt: str, schema: Schema = None) -> str:
+        response = await self.model.generate_content_async(prompt, generation_config=self._generation_config(schema))
+        return response.text
+
+    async def stream(self, prompt: str, schema: Schema = None) -> AsyncIterator[str]:
+        response = await self.model.generate_content_async(
+            prompt, stream=True, generation_config=self._generation_config(schema)
+        )
+        async for chunk in response:
+            yield chunk.text
+
+
+class RecordingProvider(LLMProvider):
+    """
+    Proxies another provider and saves every prompt -> response pair, with
+    its chunking and latency, as one JSON file per prompt under `directory`.
+    """
+
+    name = "record"
+
+    def __init__(self, inner: LLMProvider, directory: str = LLM_RECORDINGS_DIR):
+        self.inner = inner
+        self.model_name = inner.model_name
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    async def warm_up(self) -> None:
+        await self.inner.warm_up()
+
+    async def generate(self, prompt: str, schema: Schema = None) -> str:
+        start = time.perf_counter()
+        text = await self.inner.generate(prompt, schema)
+        await self._save(prompt, schema, [text], time.perf_counter() - start)
+        return text
+
+    async def stream(self, prompt: str, schema: Schema = None) -> AsyncIterator[str]:
+        start = time.perf_counter()
+        chunks: List[str] = []
+        async for chunk in self.inner.stream(prompt, schema):
+            chunks.append(chunk)
+            yield chunk
+        await self._save(prompt, schema, chunks, time.perf_counter() - start)
+
+    async def _save(self, prompt: str, schema: Schema, chunks: List[str], latency: float) -> None:
+        key = prompt_key(prompt, schema)
+        record = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "schema": schema,
+            "chunks": chunks,
+            "latency": latency,
+            "recorded_at": time.time(),
+        }
+        await asyncio.to_thread(self._write, os.path.join(self.directory, f"{key}.json"), record)
+
+    @staticmethod
+    def _write(path: str, record: Dict[str, Any]) -> None:
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+
+class ReplayProvider(LLMProvider):
+    """
+    Serves recorded responses, or synthesized stub responses, offline.
+
+    Latency is drawn from a configurable distribution so the rest of the
+    pipeline can be profiled under realistic model timing; with a fixed
+    seed the run is fully deterministic. Without recordings (the `stub`
+    provider), responses are generated from the requested response schema.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = LLM_RECORDINGS_DIR,
+        fallback_to_stub: bool = LLM_REPLAY_FALLBACK,
+        latency: str = LLM_STUB_LATENCY,
+        seed: Optional[str] = LLM_STUB_SEED or None,
+        chunk_chars: int = LLM_STUB_CHUNK_CHARS,
+        model_name: Optional[str] = None,
+    ):
+        self.directory = directory
+        self.fallback_to_stub = fallback_to_stub or directory is None
+        self.name = "replay" if directory else "stub"
+        self.model_name = model_name or (f"replay:{GEMINI_MODEL}" if directory else "stub")
+        self.sample_latency = parse_latency(latency)
+        self.rng = random.Random(seed)
+        self.chunk_chars = max(chunk_chars, 1)
+
+    async def generate(self, prompt: str, schema: Schema = None) -> str:
+        chunks = await self._lookup(prompt, schema)
+        await asyncio.sleep(self.sample_latency(self.rng))
+        return "".join(chunks)
+
+    async def stream(self, prompt: str, schema: Schema = None) -> AsyncIterator[str]:
+        chunks = await self._lookup(prompt, schema)
+        if len(chunks) <= 1:
+            text = "".join(chunks)
+            chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)] or [""]
+        # Spread the sampled latency across the chunks
+        delay = self.sample_latency(self.rng) / len(chunks)
+        for chunk in chunks:
+            await asyncio.sleep(delay)
+            yield chunk
+
+    async def _lookup(self, prompt: str, schema: Schema) -> List[str]:
+        if self.directory:
+            path = os.path.join(self.directory, f"{prompt_key(prompt, schema)}.json")
+            record = await asyncio.to_thread(self._read, path)
+            if record is not None:
+                return record["chunks"]
+            if not self.fallback_to_stub:
+                raise ValueError(f"No recorded response for prompt {prompt_key(prompt, schema)[:12]}")
+        if schema is None:
+            raise ValueError("Stub responses need a response schema")
+        return [json.dumps(stub_from_schema(schema))]
+
+    @staticmethod
+    def _read(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+
+def stub_from_schema(schema: Dict[str, Any], name: str = "value") -> Any:
+    """Build a small deterministic placeholder document that satisfies the schema."""
+    kind = schema.get("type", "STRING").upper()
+    if kind == "OBJECT":
+        return {key: stub_from_schema(child, key) for key, child in schema.get("properties", {}).items()}
+    if kind == "ARRAY":
+        return [stub_from_schema(schema.get("items", {}), name) for _ in range(2)]
+    if kind == "INTEGER":
+        return 75
+    if kind == "NUMBER":
+        return 0.75
+    if kind == "BOOLEAN":
+        return True
+    return f"Stub {name.replace('_', ' ')}"
+
+
+def create_provider(kind: str = LLM_PROVIDER) -> LLMProvider:
+    """Build the provider selected by LLM_PROVIDER."""
+    if kind == "gemini":
+        return GeminiProvider()
+    if kind == "record":
+        return RecordingProvider(GeminiProvider())
+    if kind == "replay":
+        return ReplayProvider()
+    if kind == "stub":
+        return ReplayProvider(directory=None)
+    raise ValueError(f"Unsupported LLM_PROVIDER: {kind}")
@@ -0,0 +1,336 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from app.services.admission_control import LANE_BATCH, LANE_INTERACTIVE
+from app.services.ai_service import AIService
+from app.services.artifact_service import ArtifactStore
+from app.services.cache_service import ResultCache, make_cache_key, normalize_text
+from app.services.idempotency_service import IdempotencyStore
+from app.services.pdf_service import PDFService
+from app.services.render_pipeline import DEFAULT_TEMPLATE
+from app.services.scoring_service import MatchScorer, resume_data_text
+from app.utils.logger import setup_logger
+from app.utils.single_flight import SingleFlight
+
+logger = setup_logger('optimization_service')
+
+BATCH_MAX_JOBS = int(os.getenv("BATCH_MAX_JOBS", "30"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+
+
+class OptimizationService:
+    """
+    Runs the parse -> tailor -> render pipeline behind content-addressed caches.
+
+    The parse stage depends only on the resume, so its structured output is
+    cached by resume hash and shared by every job description it is tailored
+    to. Results reference the rendered PDF by artifact id rather than
+    embedding it, so cache entries stay small.
+
+    Concurrent identical requests (double clicks, client retries) are
+    coalesced: they share one in-flight parse or optimization per cache
+    key instead of each starting its own model call.
+    """
+
+    def __init__(
+        self,
+        ai_service: AIService,
+        pdf_service: PDFService,
+        cache: ResultCache,
+        artifact_store: ArtifactStore,
+        parse_cache: Optional[ResultCache] = None,
+        idempotency_store: Optional[IdempotencyStore] = None,
+        scorer: Optional[MatchScorer] = None,
+    ):
+        self.ai_service = ai_service
+        self.pdf_service = pdf_service
+        self.cache = cache
+        self.artifact_store = artifact_store
+        self.parse_cache = parse_cache or ResultCache(namespace="parse")
+        self.idempotency_store = idempotency_store or IdempotencyStore()
+        self.scorer = scorer or MatchScorer()
+        self.parse_flights = SingleFlight("parse")
+        self.optimize_flights = SingleFlight("optimize")
+
+    def cache_key(self, resume_text: str, job_description: str, template_name: str = DEFAULT_TEMPLATE) -> str:
+        return make_cache_key(
+            normalize_text(resume_text),
+            normalize_text(job_description),
+            self.ai_service.model_name,
+            self.ai_service.PROMPT_VERSION,
+            template_name,
+        )
+
+    def parse_cache_key(self, resume_text: str) -> str:
+        return make_cache_key(
+            normalize_text(resume_text),
+            self.ai_service.model_name,
+            self.ai_service.PARSE_PROMPT_VERSION,
+        )
+
+    async def parse(
+        self, resume_text: str, bypass_cache: bool = False, lane: str = LANE_INTERACTIVE
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Return the structured resume and whether it was served from cache."""
+        key = self.parse_cache_key(resume_text)
+
+        if not bypass_cache:
+            cached = await self.parse_cache.get(key)
+            if cached is not None:
+                logger.info(f"⚡ Parse cache hit for {key[:12]}")
+                return cached, True
+
+        async def compute() -> Dict[str, Any]:
+            structured_resume = await self.ai_service.parse_resume(resume_text, lane)
+            await self.parse_cache.set(key, structured_resume)
+            return structured_resume
+
+        return await self.parse_flights.do(key, compute), False
+
+    async def optimize(
+        self,
+        resume_text: str,
+        job_description: str,
+        template_name: str = DEFAULT_TEMPLATE,
+        bypass_cache: bool = False,
+        structured_resume: Optional[Dict[str, Any]] = None,
+        idempotency: Optional[Tuple[str, str]] = None,
+        lane: str = LANE_INTERACTIVE,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Return the optimization result and whether it was served from cache.
+
+        With bypass_cache the lookups are skipped but fresh results are
+        still stored, so a forced refresh also repairs a stale entry.
+        `idempotency` is an optional (client scope, Idempotency-Key) pair;
+        a repeated key replays the stored result. `lane` is the admission
+        priority of the model calls.
+        """
+        key = self.cache_key(resume_text, job_description, template_name)
+
+        replayed = await self._replay(idempotency, key)
+        if replayed is not None:
+            return replayed, True
+
+        if not bypass_cache:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                logger.info(f"⚡ Result cache hit for {key[:12]}")
+                result = await self._ensure_artifact(key, cached)
+                await self._remember(idempotency, key, result)
+                return result, True
+
+        async def compute() -> Dict[str, Any]:
+            # 1. Parse the resume into structure (cached per resume)
+            parsed = structured_resume
+            if parsed is None:
+                parsed, _ = await self.parse(resume_text, bypass_cache, lane)
+
+            # 2. Tailor the structured resume to the job description
+            analysis = await self.ai_service.tailor_resume(parsed, job_description, lane)
+
+            # 3. Generate a new PDF using the template and the optimized data
+            result = await self._render_result(analysis, template_name, job_description)
+            await self.cache.set(key, result)
+            return result
+
+        if self.optimize_flights.running(key):
+            logger.info(f"🔗 Joining in-flight optimization for {key[:12]}")
+        result = await self.optimize_flights.do(key, compute)
+        await self._remember(idempotency, key, result)
+        return result, False
+
+    async def stream(
+        self,
+        resume_text: str,
+        job_description: str,
+        template_name: str = DEFAULT_TEMPLATE,
+        bypass_cache: bool = False,
+        idempotency: Optional[Tuple[str, str]] = None,
+        lane: str = LANE_INTERACTIVE,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the optimization as events.
+
+        Section events are forwarded from the model as soon as each field is
+        complete; the rendered result always arrives last as a `result` event.
+        The streamed run is registered as the in-flight optimization for its
+        key, so identical optimizations and streams that arrive meanwhile
+        wait for it; a stream that joins another run emits only its result.
+        `lane` is the admission priority of the model calls.
+        """
+        key = self.cache_key(resume_text, job_description, template_name)
+
+        replayed = await self._replay(idempotency, key)
+        if replayed is not None:
+            yield {"type": "result", "cached": True, "result": replayed}
+            return
+
+        if not bypass_cache:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                logger.info(f"⚡ Result cache hit for {key[:12]} (stream)")
+                result = await self._ensure_artifact(key, cached)
+                await self._remember(idempotency, key, result)
+                yield {"type": "result", "cached": True, "result": result}
+                return
+
+        # Progress of the run reaches only the stream that started it
+        progress: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+
+        async def compute() -> Dict[str, Any]:
+            try:
+                progress.put_nowait({"type": "status", "stage": "parsing"})
+                structured_resume, _ = await self.parse(resume_text, bypass_cache, lane)
+
+                progress.put_nowait({"type": "status", "stage": "tailoring"})
+                analysis = None
+                async for event in self.ai_service.stream_tailored_resume(structured_resume, job_description, lane):
+                    if event["type"] == "analysis":
+                        analysis = event["analysis"]
+                    else:
+                        progress.put_nowait(event)
+                if analysis is None:
+                    raise ValueError("AI service failed to return optimized resume data.")
+
+                progress.put_nowait({"type": "status", "stage": "rendering"})
+                result = await self._render_result(analysis, template_name, job_description)
+                await self.cache.set(key, result)
+                return result
+            finally:
+                progress.put_nowait(None)
+
+        joined = self.optimize_flights.running(key)
+        flight = self.optimize_flights.join(key, compute)
+        if joined:
+            logger.info(f"🔗 Joining in-flight optimization for {key[:12]} (stream)")
+            yield {"type": "status", "stage": "waiting"}
+        else:
+            while (event := await progress.get()) is not None:
+                yield event
+        result = await asyncio.shield(flight)
+        await self._remember(idempotency, key, result)
+        yield {"type": "result", "cached": False, "result": result}
+
+    async def optimize_batch(
+        self,
+        resume_text: str,
+        job_descriptions: List[str],
+        template_name: str = DEFAULT_TEMPLATE,
+        concurrency: int = BATCH_MAX_CONCURRENCY,
+        bypass_cache: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Tailor one resume to many job descriptions, yielding each result as it finishes.
+
+        The resume is parsed at most once per batch, on the first posting
+        that misses the result cache. At most `concurrency` tailoring runs
+        are in flight at once. Postings that are identical after
+        normalization are tailored once and the result is reported for
+        every index that submitted them. If the consumer stops iterating,
+        runs that have not finished are cancelled.
+        """
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        parse_task: Optional[asyncio.Task] = None
+
+        async def parsed_resume() -> Dict[str, Any]:
+            nonlocal parse_task
+            if parse_task is None:
+                parse_task = asyncio.create_task(self.parse(resume_text, bypass_cache, LANE_BATCH))
+            # Shield so one cancelled run does not cancel the shared parse
+            structured_resume, _ = await asyncio.shield(parse_task)
+            return structured_resume
+
+        postings: Dict[str, List[int]] = {}
+        for index, job_description in enumerate(job_descriptions):
+            postings.setdefault(normalize_text(job_description), []).append(index)
+
+        async def run(indices: List[int]):
+            async with semaphore:
+                try:
+                    job_description = job_descriptions[indices[0]]
+                    key = self.cache_key(resume_text, job_description, template_name)
+                    cached = None if bypass_cache else await self.cache.get(key)
+                    if cached is not None:
+                        return indices, await self._ensure_artifact(key, cached), True, None
+                    result, cache_hit = await self.optimize(
+                        resume_text,
+                        job_description,
+                        template_name,
+                        bypass_cache=True,
+                        structured_resume=await parsed_resume(),
+                        lane=LANE_BATCH,
+                    )
+                    return indices, result, cache_hit, None
+                except Exception as e:
+                    return indices, None, False, e
+
+        logger.info(f"📚 Batch tailoring {len(job_descriptions)} postings ({len(postings)} unique), concurrency {concurrency}")
+        tasks = [asyncio.create_task(run(indices)) for indices in postings.values()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                indices, result, cache_hit, error = await next_done
+                for index in indices:
+                    if error is not None:
+                        yield {"type": "error", "index": index, "error": error}
+                    else:
+                        yield {"type": "result", "index": index, "cached": cache_hit, "result": result}
+        finally:
+            for task in tasks:
+                task.cancel()
+            if parse_task is not None and not parse_task.done():
+                parse_task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {flights.name: flights.stats() for flights in (self.parse_flights, self.optimize_flights)}
+
+    async def _replay(self, idempotency: Optional[Tuple[str, str]], key: str) -> Optional[Dict[str, Any]]:
+        if idempotency is None:
+            return None
+        scope, idempotency_key = idempotency
+        stored = await self.idempotency_store.get(scope, idempotency_key, key)
+        return await self._ensure_artifact(key, stored) if stored is not None else None
+
+    async def _remember(self, idempotency: Optional[Tuple[str, str]], key: str, result: Dict[str, Any]) -> None:
+        if idempotency is not None:
+            scope, idempotency_key = idempotency
+            await self.idempotency_store.set(scope, idempotency_key, key, result)
+
+    async def _render_result(
+        self, analysis: Dict[str, Any], template_name: str, job_description: str
+    ) -> Dict[str, Any]:
+        optimized_data = analysis.get("optimized_resume_data")
+        if not optimized_data:
+            raise ValueError("AI service failed to return optimized resume data.")
+
+        # The local score of the tailored resume is reported next to the model's own
+        pdf_bytes, local_match = await asyncio.gather(
+            self.pdf_service.generate_resume_pdf(optimized_data, template_name),
+            asyncio.to_thread(self.scorer.score, resume_data_text(optimized_data), job_description),
+        )
+
+        return {
+            "optimized_resume_json": optimized_data,
+            "template": template_name,
+            "pdf_artifact_id": await self.artifact_store.put(pdf_bytes),
+            "match_score": analysis.get("overall_match_score", 0),
+            "local_match": local_match,
+            "key_changes": analysis.get("key_improvement_areas", []),
+            "suggestions": analysis.get("suggestions", []),
+        }
+
+    async def _ensure_artifact(self, key: str, cached: Dict[str, Any]) -> Dict[str, Any]:
+        """Re-render a cached result whose PDF artifact has since been evicted."""
+        artifact_id = cached.get("pdf_artifact_id")
+        if artifact_id and await self.artifact_store.size(artifact_id) is not None:
+            return cached
+
+        logger.info(f"🔄 Artifact missing for cached result {key[:12]}, re-rendering PDF")
+        pdf_bytes = await self.pdf_service.generate_resume_pdf(
+            cached["optimized_resume_json"], cached.get("template", DEFAULT_TEMPLATE)
+        )
+        refreshed = dict(cached)
+        refreshed.pop("optimized_resume_pdf_base64", None)
+        refreshed["pdf_artifact_id"] = await self.artifact_store.put(pdf_bytes)
+        await self.cache.set(key, refreshed)
+        return refreshed
@@ -1,32 +1,71 @@
 import io
-from typing import Dict, Any
-from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML, CSS
+from typing import Dict, Any, Optional
+from app.models.resume import StructuredResume
+from app.services import render_pipeline
+from app.services.cache_service import make_cache_key
+from app.services.render_executor import RenderExecutor, RenderQueueFullError
 from app.utils.logger import setup_logger
+from app.utils.metrics import stage_timer
+from app.utils.single_flight import SingleFlight
 
 logger = setup_logger('pdf_service')
 
 class PDFService:
-    def __init__(self):
-        """Initialize PDF service with Jinja2 and WeasyPrint."""
+    def __init__(self, render_executor: Optional[RenderExecutor] = None):
+        """Initialize PDF service with Jinja2 and a WeasyPrint render executor."""
         try:
-            self.env = Environment(loader=FileSystemLoader('templates'))
+            self.env = render_pipeline.create_jinja_env()
+            self.render_executor = render_executor or RenderExecutor()
+            # Identical renders in flight at the same time share one layout
+            self.render_flights = SingleFlight("render")
             logger.info("📄 PDF service initialized with Jinja2 and WeasyPrint")
         except Exception as e:
             logger.error(f"❌ Failed to initialize Jinja2 environment: {e}")
             raise
 
-    async def generate_resume_pdf(self, resume_data: Dict[str, Any]) -> bytes:
+    def render_html(self, resume_data: Dict[str, Any], template_name: str = render_pipeline.DEFAULT_TEMPLATE) -> str:
+        """Render the resume HTML for a named template (stylesheets are applied at layout time)."""
+        template_file, _ = render_pipeline.resolve_template(template_name)
+        with stage_timer("template_render"):
+            return self.env.get_template(template_file).render(data=resume_data)
+
+    def render_preview(self, resume_data: Dict[str, Any], template_name: str = render_pipeline.DEFAULT_TEMPLATE) -> str:
+        """Render self-contained preview HTML: the template output with its stylesheets inlined, no layout."""
+        html_out = self.render_html(resume_data, template_name)
+        style = f"<style>\n{render_pipeline.stylesheet_text(template_name)}\n</style>\n"
+        head_end = html_out.find("</head>")
+        if head_end == -1:
+            return style + html_out
+        return html_out[:head_end] + style + html_out[head_end:]
+
+    async def warm_up(self) -> None:
+        """
+        Compile every template with placeholder data, wait for the render
+        workers to warm up and lay out one sample resume, so the first real
+        request pays none of these costs.
+        """
+        sample = StructuredResume(name="Warm-up").model_dump()
+        for template_name in render_pipeline.available_templates():
+            self.render_html(sample, template_name)
+        html_out = self.render_html(sample)
+        await self.render_executor.warm_up()
+        await self.render_executor.render(html_out)
+
+    async def generate_resume_pdf(
+        self, resume_data: Dict[str, Any], template_name: str = render_pipeline.DEFAULT_TEMPLATE
+    ) -> bytes:
         """
         Generate a professional PDF from structured resume data using an HTML template.
         """
-        logger.info("🔄 Starting PDF generation from template...")
+        logger.info(f"🔄 Starting PDF generation from template '{template_name}'...")
         try:
-            template = self.env.get_template('resume_template.html')
-            html_out = template.render(data=resume_data)
+            html_out = self.render_html(resume_data, template_name)
             
-            # WeasyPrint converts the rendered HTML to PDF bytes in memory
-            pdf_bytes = HTML(string=html_out).write_pdf()
+            # WeasyPrint layout is CPU-heavy, so it runs in the render executor
+            pdf_bytes = await self.render_flights.do(
+                make_cache_key(template_name, html_out),
+                lambda: self.render_executor.render(html_out, template_name),
+            )
             
             if not pdf_bytes:
                 raise ValueError("Generated PDF is empty.")
@@ -34,6 +73,9 @@ class PDFService:
             logger.info(f"✅ PDF generated successfully: {len(pdf_bytes)} bytes")
             return pdf_bytes
             
+        except RenderQueueFullError:
+            logger.warning("⚠️ PDF render queue is full, rejecting request")
+            raise
         except Exception as e:
             logger.error(f"❌ PDF generation failed: {str(e)}")
             raise ValueError(f"Failed to generate PDF: {e}")
\ No newline at end of file
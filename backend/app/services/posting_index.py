@@ -0,0 +1,309 @@
+# Posting Index - inverted index that ranks the job posting corpus against a resume
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from app.services.posting_store import PostingRecord, PostingStore
+from app.services.scoring_service import MatchScorer
+from app.utils.logger import setup_logger
+
+logger = setup_logger('posting_index')
+
+POSTING_INDEX_DIR = os.getenv("POSTING_INDEX_DIR", os.path.join(tempfile.gettempdir(), "tailorhire-posting-index"))
+# Memory-map segments so every worker on the host shares one copy through the page cache
+POSTING_INDEX_MMAP = os.getenv("POSTING_INDEX_MMAP", "true").lower() == "true"
+# Terms kept per posting: all its skills, then its most frequent other keywords
+POSTING_INDEX_MAX_TERMS = int(os.getenv("POSTING_INDEX_MAX_TERMS", "100"))
+# Postings applied in memory before they are merged into a new on-disk segment
+POSTING_INDEX_COMPACT_THRESHOLD = int(os.getenv("POSTING_INDEX_COMPACT_THRESHOLD", "2000"))
+
+_CURRENT_FILE = "CURRENT"
+_LOCK_FILE = "compact.lock"
+_EMPTY_INDPTR = np.zeros(1, dtype=np.int64)
+_EMPTY_ROWS = np.zeros(0, dtype=np.int32)
+_EMPTY_WEIGHTS = np.zeros(0, dtype=np.float32)
+
+
+def _gather(indptr: np.ndarray, term_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Entry positions of the given columns of a CSC matrix, and the query index each belongs to."""
+    starts = indptr[term_ids]
+    lengths = indptr[term_ids + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    owners = np.repeat(np.arange(len(term_ids)), lengths)
+    # Offset of each entry within its column, added to the column start
+    offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return starts[owners] + offsets, owners
+
+
+def _csc(term_ids: np.ndarray, rows: np.ndarray, weights: np.ndarray, n_terms: int):
+    """Sort COO entries by term into (indptr, rows, weights)."""
+    order = np.argsort(term_ids, kind="stable")
+    indptr = np.zeros(n_terms + 1, dtype=np.int64)
+    np.cumsum(np.bincount(term_ids, minlength=n_terms), out=indptr[1:])
+    return indptr, rows[order].astype(np.int32), weights[order].astype(np.float32)
+
+
+class PostingIndex:
+    """
+    Inverted index over the PostingStore, for ranking thousands of postings
+    against one resume without a model call.
+
+    The index is a sparse posting x term weight matrix stored by term
+    (CSC: `indptr`, `rows`, `weights`), so a resume only touches the
+    columns of its own terms. Weights come from MatchScorer: each posting's
+    skills and top keywords, weighted by kind and log frequency. IDF is
+    applied at query time from the live document frequencies, so a
+    posting's rank score is the /api/score formula over its indexed
+    terms, with corpus IDF.
+
+    The bulk of the matrix is an immutable on-disk segment, memory-mapped
+    so every worker shares it. Changes since the segment was written
+    (read incrementally from the store by sequence number) live in an
+    in-memory delta; replaced and removed postings are masked out. Once
+    the delta is large, one worker merges everything into a new segment
+    and the others switch to it on their next refresh. All methods block;
+    async callers run them through asyncio.to_thread.
+    """
+
+    def __init__(
+        self,
+        store: PostingStore,
+        scorer: MatchScorer,
+        index_dir: str = POSTING_INDEX_DIR,
+        use_mmap: bool = POSTING_INDEX_MMAP,
+        max_terms: int = POSTING_INDEX_MAX_TERMS,
+        compact_threshold: int = POSTING_INDEX_COMPACT_THRESHOLD,
+    ):
+        self.store = store
+        self.scorer = scorer
+        self.index_dir = index_dir
+        self.use_mmap = use_mmap
+        self.max_terms = max(max_terms, 1)
+        self.compact_threshold = max(compact_threshold, 1)
+        self._lock = threading.RLock()
+        self._snapshot: Optional[Dict[str, Any]] = None
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+        self._reset(None, 0, [], [])
+
+    def _reset(self, segment: Optional[str], seq: int, terms: List[str], posting_ids: List[str], arrays=None) -> None:
+        self.segment = segment
+        self.seq = seq
+        self.terms = list(terms)
+        self.vocabulary = {term: term_id for term_id, term in enumerate(self.terms)}
+        self.segment_terms = len(self.terms)
+        self.segment_postings = len(posting_ids)
+        self.indptr, self.rows, self.weights = arrays or (_EMPTY_INDPTR, _EMPTY_ROWS, _EMPTY_WEIGHTS)
+        self.posting_ids = list(posting_ids)
+        self.row_of = {posting_id: row for row, posting_id in enumerate(self.posting_ids)}
+        self.alive = bytearray(b"\x01" * len(self.posting_ids))
+        # Delta entries in COO form: (term id, row, weight)
+        self._delta: Tuple[List[int], List[int], List[float]] = ([], [], [])
+        self._snapshot = None
+
+    def refresh(self, batch_size: int = 1000) -> int:
+        """Switch to a newer segment if one was written, then apply store changes; returns changes applied."""
+        with self._lock:
+            current = self._current_segment()
+            if current is not None and current != self.segment:
+                self._load_segment(current)
+            applied = 0
+            while True:
+                changes = self.store.changes_since(self.seq, batch_size)
+                for record in changes:
+                    self._apply(record)
+                applied += len(changes)
+                if len(changes) < batch_size:
+                    break
+            if applied:
+                self._snapshot = None
+            if len(self.posting_ids) - self.segment_postings >= self.compact_threshold:
+                self.compact()
+            return applied
+
+    def _apply(self, record: PostingRecord) -> None:
+        row = self.row_of.pop(record.id, None)
+        if row is not None:
+            self.alive[row] = 0
+        self.seq = record.seq
+        if record.deleted:
+            return
+        profile = self.scorer.profile(record.description)
+        terms = self.scorer.query_terms(profile, self.max_terms)
+        weights = self.scorer.term_weights(profile, terms)
+        row = len(self.posting_ids)
+        self.posting_ids.append(record.id)
+        self.row_of[record.id] = row
+        self.alive.append(1)
+        term_ids, rows, values = self._delta
+        for term, weight in zip(terms, weights):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                term_id = self.vocabulary[term] = len(self.terms)
+                self.terms.append(term)
+            term_ids.append(term_id)
+            rows.append(row)
+            values.append(float(weight))
+
+    def _entries(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Every entry, segment and delta, in COO form."""
+        term_ids, rows, weights = self._delta
+        segment_terms = np.repeat(np.arange(self.segment_terms, dtype=np.int64), np.diff(self.indptr))
+        return (
+            np.concatenate([segment_terms, np.asarray(term_ids, dtype=np.int64)]),
+            np.concatenate([np.asarray(self.rows, dtype=np.int64), np.asarray(rows, dtype=np.int64)]),
+            np.concatenate([np.asarray(self.weights, dtype=np.float64), np.asarray(weights, dtype=np.float64)]),
+        )
+
+    def _build_snapshot(self) -> Dict[str, Any]:
+        """Immutable view for queries: delta as CSC plus IDF and per-posting norms from live postings."""
+        alive = np.frombuffer(bytes(self.alive), dtype=np.uint8).astype(bool)
+        n_terms = len(self.terms)
+        term_ids, rows, weights = self._entries()
+        live = alive[rows] if len(rows) else np.zeros(0, dtype=bool)
+        postings = int(alive.sum())
+        document_frequency = np.bincount(term_ids[live], minlength=n_terms).astype(np.float64)
+        idf = np.log1p((postings - document_frequency + 0.5) / (document_frequency + 0.5))
+        norms = np.bincount(rows[live], weights=weights[live] * idf[term_ids[live]], minlength=len(alive))
+
+        delta_terms, delta_rows, delta_weights = (np.asarray(part) for part in self._delta)
+        return {
+            "vocabulary": self.vocabulary,
+            "n_terms": n_terms,
+            "segment": (self.indptr, self.rows, self.weights, self.segment_terms),
+            "delta": _csc(delta_terms.astype(np.int64), delta_rows, delta_weights, n_terms),
+            "idf": idf,
+            "norms": norms,
+            "alive": alive,
+            "posting_ids": list(self.posting_ids),
+            "postings": postings,
+        }
+
+    def search(self, resume_text: str, top_k: int) -> Tuple[List[Tuple[str, float]], int]:
+        """Return the top_k (posting id, score 0-100) pairs with a non-zero score, and the postings searched."""
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = self._build_snapshot()
+            snapshot = self._snapshot
+        if not snapshot["postings"]:
+            return [], 0
+
+        resume = self.scorer.profile(resume_text)
+        terms = [term for term in resume.terms() if snapshot["vocabulary"].get(term, snapshot["n_terms"]) < snapshot["n_terms"]]
+        if not terms:
+            return [], snapshot["postings"]
+        term_ids = np.array([snapshot["vocabulary"][term] for term in terms], dtype=np.int64)
+        term_credit = self.scorer.credit(resume, terms) * snapshot["idf"][term_ids]
+
+        scores = np.zeros(len(snapshot["alive"]), dtype=np.float64)
+        indptr, rows, weights, segment_terms = snapshot["segment"]
+        in_segment = term_ids < segment_terms
+        positions, owners = _gather(indptr, term_ids[in_segment])
+        scores += np.bincount(
+            rows[positions], weights=weights[positions] * term_credit[in_segment][owners], minlength=len(scores)
+        )
+        delta_indptr, delta_rows, delta_weights = snapshot["delta"]
+        positions, owners = _gather(delta_indptr, term_ids)
+        scores += np.bincount(
+            delta_rows[positions], weights=delta_weights[positions] * term_credit[owners], minlength=len(scores)
+        )
+
+        norms = snapshot["norms"]
+        scores = np.divide(scores, norms, out=np.zeros_like(scores), where=(norms > 0) & snapshot["alive"])
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        return [
+            (snapshot["posting_ids"][row], round(float(scores[row]) * 100, 1)) for row in order if scores[row] > 0
+        ], snapshot["postings"]
+
+    def compact(self) -> bool:
+        """
+        Merge the delta into a new on-disk segment, dropping dead postings.
+
+        Only one worker compacts at a time; the others skip and pick up the
+        new segment on their next refresh.
+        """
+        if not self.index_dir:
+            return False
+        with self._lock, open(os.path.join(self.index_dir, _LOCK_FILE), "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            if self._current_segment() != self.segment:
+                return False  # another worker just wrote a newer one
+
+            alive = np.frombuffer(bytes(self.alive), dtype=np.uint8).astype(bool)
+            term_ids, rows, weights = self._entries()
+            live = alive[rows]
+            term_ids, rows, weights = term_ids[live], rows[live], weights[live]
+            # Renumber rows and terms densely, dropping dead postings and unused terms
+            new_rows = np.cumsum(alive) - 1
+            used_terms, term_ids = np.unique(term_ids, return_inverse=True)
+            arrays = _csc(term_ids, new_rows[rows], weights, len(used_terms))
+            terms = [self.terms[term_id] for term_id in used_terms]
+            posting_ids = [posting_id for posting_id, keep in zip(self.posting_ids, alive) if keep]
+
+            name = f"segment-{self.seq:012d}"
+            self._write_segment(name, arrays, {"seq": self.seq, "terms": terms, "posting_ids": posting_ids})
+            previous = self.segment
+            self._load_segment(name)
+            self._remove_old_segments(keep=(name, previous))
+            logger.info(f"🗜️ Wrote posting index segment {name}: {len(posting_ids)} postings, {len(terms)} terms")
+            return True
+
+    def _write_segment(self, name: str, arrays, meta: Dict[str, Any]) -> None:
+        tmp_dir = tempfile.mkdtemp(prefix=f".{name}.", dir=self.index_dir)
+        for part, array in zip(("indptr", "rows", "weights"), arrays):
+            np.save(os.path.join(tmp_dir, f"{part}.npy"), array)
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.rename(tmp_dir, os.path.join(self.index_dir, name))
+        pointer = os.path.join(self.index_dir, _CURRENT_FILE)
+        tmp_pointer = f"{pointer}.{os.getpid()}.tmp"
+        with open(tmp_pointer, "w") as f:
+            f.write(name)
+        # Atomic rename so readers never see a partial pointer
+        os.replace(tmp_pointer, pointer)
+
+    def _load_segment(self, name: str) -> None:
+        directory = os.path.join(self.index_dir, name)
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        mmap_mode = "r" if self.use_mmap else None
+        arrays = tuple(
+            np.load(os.path.join(directory, f"{part}.npy"), mmap_mode=mmap_mode) for part in ("indptr", "rows", "weights")
+        )
+        self._reset(name, meta["seq"], meta["terms"], meta["posting_ids"], arrays)
+        logger.info(f"📂 Loaded posting index segment {name} ({len(meta['posting_ids'])} postings)")
+
+    def _current_segment(self) -> Optional[str]:
+        if not self.index_dir:
+            return None
+        try:
+            with open(os.path.join(self.index_dir, _CURRENT_FILE), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _remove_old_segments(self, keep: Tuple[Optional[str], ...]) -> None:
+        # The previous segment stays one round, for workers that are still loading it
+        for entry in os.listdir(self.index_dir):
+            if entry.startswith("segment-") and entry not in keep:
+                shutil.rmtree(os.path.join(self.index_dir, entry), ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        # Read without the lock, so a long refresh never blocks the event loop
+        return {
+            "segment": self.segment,
+            "seq": self.seq,
+            "postings": self.alive.count(1),
+            "segment_postings": self.segment_postings,
+            "delta_postings": len(self.posting_ids) - self.segment_postings,
+            "terms": len(self.terms),
+        }
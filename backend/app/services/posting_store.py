@@ -0,0 +1,224 @@
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import Boolean, Float, Integer, String, Text, create_engine, event, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
+from app.services.cache_service import make_cache_key, normalize_text
+from app.utils.logger import setup_logger
+
+logger = setup_logger('posting_store')
+
+POSTING_DATABASE_URL = os.getenv(
+    "POSTING_DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'tailorhire-postings.sqlite3')}"
+)
+POSTING_ID_MAX_LENGTH = 128
+POSTING_FIELDS = ("title", "company", "location", "url")
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class PostingRecord(Base):
+    __tablename__ = "postings"
+
+    id: Mapped[str] = mapped_column(String(POSTING_ID_MAX_LENGTH), primary_key=True)
+    # Bumped on every change, so readers can follow the corpus incrementally
+    seq: Mapped[int] = mapped_column(Integer, unique=True, index=True)
+    title: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    company: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    location: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    url: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    description: Mapped[str] = mapped_column(Text)
+    content_hash: Mapped[str] = mapped_column(String(64))
+    deleted: Mapped[bool] = mapped_column(Boolean, default=False)
+    updated_at: Mapped[float] = mapped_column(Float)
+
+    def to_dict(self, with_description: bool = False) -> Dict[str, Any]:
+        posting = {"id": self.id, **{field: getattr(self, field) for field in POSTING_FIELDS}}
+        if with_description:
+            posting["description"] = self.description
+        return posting
+
+
+class SequenceRecord(Base):
+    __tablename__ = "posting_sequence"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, default=0)
+
+
+def _content_hash(posting: Dict[str, Any]) -> str:
+    return make_cache_key(
+        *(posting.get(field) or "" for field in POSTING_FIELDS),
+        normalize_text(posting["description"]),
+    )
+
+
+class PostingStore:
+    """
+    Job posting corpus backed by SQLite through SQLAlchemy.
+
+    Every insert, change and removal takes the next sequence number, so a
+    reader that remembers the last number it saw can fetch just what
+    changed since (`changes_since`); removals are kept as tombstones for
+    that reason. The database file is shared by every web worker on the
+    host. All methods block; async callers run them through
+    asyncio.to_thread.
+    """
+
+    def __init__(self, url: str = POSTING_DATABASE_URL):
+        self.url = url
+        self.engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": 5.0})
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine, "connect", self._configure_sqlite)
+        Base.metadata.create_all(self.engine)
+        try:
+            with Session(self.engine) as session, session.begin():
+                session.add(SequenceRecord(id=1, value=0))
+        except IntegrityError:
+            pass  # another worker created it first
+        # Created before gunicorn forks its workers (preload): each child
+        # must open its own connections, not reuse the parent's
+        os.register_at_fork(after_in_child=self._after_fork)
+        logger.info(f"🗂️ Posting store initialized ({url})")
+
+    def _after_fork(self) -> None:
+        self.engine.dispose(close=False)
+
+    @staticmethod
+    def _configure_sqlite(connection, _record) -> None:
+        cursor = connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    def upsert(self, postings: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert or replace postings by id; returns how many changed.
+
+        A posting without an id gets one from its content, so re-importing
+        the same file is a no-op.
+        """
+        # Last one wins when a batch repeats an id
+        latest = {}
+        for posting in postings:
+            content_hash = _content_hash(posting)
+            latest[posting.get("id") or content_hash[:32]] = (posting, content_hash)
+
+        now = time.time()
+        with Session(self.engine) as session, session.begin():
+            existing = {
+                record.id: record
+                for record in session.scalars(select(PostingRecord).where(PostingRecord.id.in_(list(latest))))
+            }
+            changes = [
+                (posting_id, posting, content_hash)
+                for posting_id, (posting, content_hash) in latest.items()
+                if posting_id not in existing
+                or existing[posting_id].deleted
+                or existing[posting_id].content_hash != content_hash
+            ]
+            if not changes:
+                return 0
+            seq = self._take_sequence(session, len(changes))
+            for offset, (posting_id, posting, content_hash) in enumerate(changes):
+                record = existing.get(posting_id)
+                if record is None:
+                    record = PostingRecord(id=posting_id)
+                    session.add(record)
+                record.seq = seq + offset
+                for field in POSTING_FIELDS:
+                    setattr(record, field, posting.get(field))
+                record.description = posting["description"]
+                record.content_hash = content_hash
+                record.deleted = False
+                record.updated_at = now
+        return len(changes)
+
+    def remove(self, posting_id: str) -> bool:
+        with Session(self.engine) as session, session.begin():
+            record = session.get(PostingRecord, posting_id)
+            if record is None or record.deleted:
+                return False
+            record.seq = self._take_sequence(session, 1)
+            record.deleted = True
+            record.description = ""
+            record.updated_at = time.time()
+            return True
+
+    @staticmethod
+    def _take_sequence(session: Session, count: int) -> int:
+        """Reserve `count` sequence numbers and return the first; the UPDATE also serializes writers."""
+        last = session.scalar(
+            update(SequenceRecord)
+            .where(SequenceRecord.id == 1)
+            .values(value=SequenceRecord.value + count)
+            .returning(SequenceRecord.value)
+        )
+        return last - count + 1
+
+    def changes_since(self, seq: int, limit: int = 1000) -> List[PostingRecord]:
+        """Postings (and tombstones) changed after `seq`, oldest change first."""
+        with Session(self.engine, expire_on_commit=False) as session:
+            return list(session.scalars(
+                select(PostingRecord).where(PostingRecord.seq > seq).order_by(PostingRecord.seq).limit(limit)
+            ))
+
+    def get_many(self, posting_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        with Session(self.engine) as session:
+            records = session.scalars(
+                select(PostingRecord).where(PostingRecord.id.in_(posting_ids), PostingRecord.deleted.is_(False))
+            )
+            return {record.id: record.to_dict() for record in records}
+
+    def count(self) -> int:
+        with Session(self.engine) as session:
+            return session.scalar(select(func.count()).where(PostingRecord.deleted.is_(False))) or 0
+
+    def import_jsonl(self, path: str, batch_size: int = 500) -> int:
+        """
+        Upsert postings from a JSON Lines file, one object per line with a
+        `description` (or `text`) and optional id, title, company, location
+        and url. Returns how many postings changed.
+        """
+        changed = 0
+        batch: List[Dict[str, Any]] = []
+        with open(path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    batch.append(parse_posting(json.loads(line)))
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"⚠️ Skipping posting on line {number} of {path}: {e}")
+                    continue
+                if len(batch) >= batch_size:
+                    changed += self.upsert(batch)
+                    batch = []
+        if batch:
+            changed += self.upsert(batch)
+        logger.info(f"📥 Imported {path}: {changed} posting(s) added or changed")
+        return changed
+
+
+def parse_posting(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate one posting from an import file or API call."""
+    if not isinstance(item, dict):
+        raise ValueError("posting must be an object")
+    description = item.get("description") or item.get("text") or item.get("job_description")
+    if not isinstance(description, str) or not description.strip():
+        raise ValueError("posting has no description")
+    posting_id = item.get("id")
+    if posting_id is not None:
+        posting_id = str(posting_id).strip()
+        if not posting_id or len(posting_id) > POSTING_ID_MAX_LENGTH:
+            raise ValueError(f"posting id must be 1-{POSTING_ID_MAX_LENGTH} characters")
+    posting = {"id": posting_id, "description": description}
+    for field in POSTING_FIELDS:
+        value = item.get(field)
+        posting[field] = str(value) if value is not None else None
+    return posting
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional
+from app.services.posting_index import PostingIndex
+from app.services.posting_store import PostingStore, parse_posting
+from app.utils.logger import setup_logger
+from app.utils.metrics import stage_timer
+
+logger = setup_logger('ranking_service')
+
+# Corpus imported at startup: a .jsonl file, or a SQLite database with a `postings` table
+POSTING_CORPUS_PATH = os.getenv("POSTING_CORPUS_PATH", "")
+POSTING_CORPUS_TABLE = os.getenv("POSTING_CORPUS_TABLE", "postings")
+# How often each worker picks up postings added through other workers
+POSTING_INDEX_REFRESH_INTERVAL = float(os.getenv("POSTING_INDEX_REFRESH_INTERVAL", "10"))
+POSTING_RANK_MAX_K = int(os.getenv("POSTING_RANK_MAX_K", "50"))
+POSTING_BATCH_MAX = 500
+
+
+def read_sqlite_postings(path: str, table: str = POSTING_CORPUS_TABLE) -> List[Dict[str, Any]]:
+    """Read postings from another SQLite database; columns are matched by name like JSONL fields."""
+    if not table.replace("_", "").isalnum():
+        raise ValueError(f"Invalid table name: {table}")
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    connection.row_factory = sqlite3.Row
+    try:
+        rows = connection.execute(f'SELECT * FROM "{table}"').fetchall()
+    finally:
+        connection.close()
+    postings = []
+    for number, row in enumerate(rows, 1):
+        try:
+            postings.append(parse_posting(dict(row)))
+        except ValueError as e:
+            logger.warning(f"⚠️ Skipping row {number} of {path}: {e}")
+    return postings
+
+
+class RankingService:
+    """
+    Ranks the job posting corpus against a resume, so only the best few
+    postings go on to model-backed tailoring.
+
+    The corpus lives in the PostingStore; each worker keeps a PostingIndex
+    over it, refreshed in the background and right after its own writes.
+    """
+
+    def __init__(
+        self,
+        store: PostingStore,
+        index: PostingIndex,
+        corpus_path: str = POSTING_CORPUS_PATH,
+        refresh_interval: float = POSTING_INDEX_REFRESH_INTERVAL,
+    ):
+        self.store = store
+        self.index = index
+        self.corpus_path = corpus_path
+        self.refresh_interval = refresh_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the refresh loop; must be called from the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def warm_up(self) -> None:
+        """Import the configured corpus (a no-op when it is unchanged) and build the index."""
+        if self.corpus_path:
+            await asyncio.to_thread(self.import_corpus, self.corpus_path)
+        applied = await asyncio.to_thread(self.index.refresh)
+        stats = self.index.stats()
+        logger.info(f"🔎 Posting index ready: {stats['postings']} postings, {stats['terms']} terms ({applied} changes applied)")
+
+    def import_corpus(self, path: str) -> int:
+        if path.endswith((".jsonl", ".ndjson")):
+            return self.store.import_jsonl(path)
+        changed = self.store.upsert(read_sqlite_postings(path))
+        logger.info(f"📥 Imported {path}: {changed} posting(s) added or changed")
+        return changed
+
+    async def rank(self, resume_text: str, top_k: int) -> Dict[str, Any]:
+        with stage_timer("posting_rank"):
+            matches, searched = await asyncio.to_thread(self.index.search, resume_text, top_k)
+        postings = await asyncio.to_thread(self.store.get_many, [posting_id for posting_id, _ in matches])
+        return {
+            # A posting removed since the last refresh has no metadata left and is skipped
+            "results": [dict(postings[posting_id], score=score) for posting_id, score in matches if posting_id in postings],
+            "postings": searched,
+        }
+
+    async def add(self, postings: List[Dict[str, Any]]) -> int:
+        changed = await asyncio.to_thread(self.store.upsert, postings)
+        if changed:
+            await asyncio.to_thread(self.index.refresh)
+        return changed
+
+    async def remove(self, posting_id: str) -> bool:
+        removed = await asyncio.to_thread(self.store.remove, posting_id)
+        if removed:
+            await asyncio.to_thread(self.index.refresh)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        return self.index.stats()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await asyncio.to_thread(self.index.refresh)
+            except Exception as e:
+                logger.error(f"❌ Posting index refresh failed: {e}")
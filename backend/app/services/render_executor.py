@@ -0,0 +1,139 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from app.services import render_pipeline
+from app.utils.errors import ServiceBusyError
+from app.utils.logger import setup_logger
+from app.utils.metrics import record_stage
+
+logger = setup_logger('render_executor')
+
+PDF_RENDER_MODE = os.getenv("PDF_RENDER_MODE", "process")  # process | thread
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(min(os.cpu_count() or 1, 4))))
+PDF_RENDER_QUEUE_SIZE = int(os.getenv("PDF_RENDER_QUEUE_SIZE", "16"))
+PDF_RENDER_TIMEOUT = float(os.getenv("PDF_RENDER_TIMEOUT", "60"))
+
+
+class RenderQueueFullError(ServiceBusyError):
+    """Raised when every render worker is busy and the wait queue is full."""
+
+
+def _warm_worker() -> None:
+    """Process initializer: import WeasyPrint, register fonts and parse stylesheets before the first real render."""
+    render_pipeline.warm_up()
+
+
+def _render_pdf(html: str, template_name: str) -> Tuple[bytes, float]:
+    """
+    Runs inside a pool worker; must stay a picklable module-level function.
+    Returns the PDF and the layout time, so the caller can tell queueing
+    from layout.
+    """
+    start = time.perf_counter()
+    pdf_bytes = render_pipeline.render_pdf(html, template_name)
+    return pdf_bytes, time.perf_counter() - start
+
+
+class RenderExecutor:
+    """
+    Runs WeasyPrint layout off the event loop.
+
+    In `process` mode renders run in a pool of pre-warmed worker processes,
+    so they use every core and never hold the loop's GIL. At most
+    `workers + queue_size` renders may be pending; beyond that callers get
+    RenderQueueFullError immediately instead of piling up. A render that
+    exceeds `timeout` fails its request, although a process worker cannot
+    be interrupted and finishes the abandoned render in the background.
+    """
+
+    def __init__(
+        self,
+        mode: str = PDF_RENDER_MODE,
+        workers: int = PDF_RENDER_WORKERS,
+        queue_size: int = PDF_RENDER_QUEUE_SIZE,
+        timeout: float = PDF_RENDER_TIMEOUT,
+    ):
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unsupported PDF_RENDER_MODE: {mode}")
+        self.mode = mode
+        self.workers = max(workers, 1)
+        self.max_pending = self.workers + max(queue_size, 0)
+        self.timeout = timeout
+        self._pool: Optional[Executor] = None
+        self._warming: List[Future] = []
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def start(self) -> None:
+        """Create the pool and pre-warm every worker."""
+        if self._pool is not None:
+            return
+        if self.mode == "process":
+            # spawn avoids forking the event loop and any live client threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+            )
+            # Workers start lazily; submit no-op jobs so they are warm before traffic arrives
+            self._warming = [self._pool.submit(os.getpid) for _ in range(self.workers)]
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pdf-render")
+        logger.info(f"🖨️ Render executor started: {self.workers} {self.mode} workers, {self.max_pending} max pending")
+
+    async def warm_up(self) -> None:
+        """Wait until the pool's workers have started and run their warm-up render."""
+        if self._pool is None:
+            self.start()
+        if self.mode == "thread":
+            # Threads share this process's fonts and stylesheets
+            await asyncio.to_thread(render_pipeline.warm_up)
+        elif self._warming:
+            await asyncio.gather(*(asyncio.wrap_future(future) for future in self._warming))
+        self._warming = []
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            logger.info("🛑 Render executor stopped")
+
+    async def render(self, html: str, template_name: str = render_pipeline.DEFAULT_TEMPLATE) -> bytes:
+        if self._pool is None:
+            self.start()
+
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise RenderQueueFullError("PDF renderer is busy. Please try again shortly.", retry_after=5)
+
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._pool, _render_pdf, html, template_name)
+            pdf_bytes, layout_seconds = await asyncio.wait_for(future, timeout=self.timeout)
+            self.completed += 1
+            record_stage("pdf_layout", layout_seconds)
+            record_stage("render_queue", max(time.perf_counter() - start - layout_seconds, 0.0))
+            return pdf_bytes
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise ValueError(f"PDF rendering timed out after {self.timeout:.0f} seconds.")
+        finally:
+            self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
@@ -0,0 +1,119 @@
+import functools
+import hashlib
+import os
+import tempfile
+from typing import Any, Dict, List, Tuple
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'templates')
+STYLES_DIR = os.path.join(TEMPLATES_DIR, 'styles')
+FONTS_CSS = os.path.join(TEMPLATES_DIR, 'fonts', 'fonts.css')
+JINJA_CACHE_DIR = os.getenv("JINJA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "tailorhire-jinja-cache"))
+
+DEFAULT_TEMPLATE = "classic"
+
+# Template name -> (HTML template, stylesheet in templates/styles)
+TEMPLATES: Dict[str, Tuple[str, str]] = {
+    "classic": ("resume_template.html", "classic.css"),
+    "compact": ("resume_template.html", "compact.css"),
+}
+
+# Per-process WeasyPrint state, built on first use in each render worker.
+# CSS and FontConfiguration objects cannot be pickled, so every process
+# parses the stylesheets once and then reuses them for every render.
+_font_config = None
+_stylesheets: Dict[str, List[Any]] = {}
+
+
+def available_templates() -> List[str]:
+    return sorted(TEMPLATES)
+
+
+def resolve_template(name: str) -> Tuple[str, str]:
+    try:
+        return TEMPLATES[name or DEFAULT_TEMPLATE]
+    except KeyError:
+        raise ValueError(f"Unknown resume template '{name}'. Available: {', '.join(available_templates())}")
+
+
+def create_jinja_env() -> Environment:
+    """
+    Jinja environment whose compiled templates are cached as bytecode on disk.
+
+    Resume data is user-editable and previews are shown in the browser, so
+    HTML templates are autoescaped. Escaping is compiled into the bytecode,
+    hence the dedicated cache file pattern.
+    """
+    os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+    return Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        bytecode_cache=FileSystemBytecodeCache(JINJA_CACHE_DIR, pattern="__jinja2_autoescape_%s.cache"),
+        autoescape=select_autoescape(["html"]),
+        auto_reload=False,
+    )
+
+
+def _template_files(template_name: str) -> List[str]:
+    template_file, stylesheet = resolve_template(template_name)
+    return [os.path.join(TEMPLATES_DIR, template_file), FONTS_CSS, os.path.join(STYLES_DIR, stylesheet)]
+
+
+@functools.lru_cache(maxsize=None)
+def template_fingerprint(template_name: str) -> str:
+    """Hash of a template's HTML and stylesheets, so cached renders expire when a template changes."""
+    digest = hashlib.sha256()
+    for path in _template_files(template_name):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def stylesheet_text(template_name: str) -> str:
+    """The template's stylesheets as one CSS string, for inlining into HTML previews."""
+    texts = []
+    for path in _template_files(template_name)[1:]:
+        with open(path, "r", encoding="utf-8") as f:
+            texts.append(f.read())
+    return "\n".join(texts)
+
+
+def get_font_config():
+    global _font_config
+    if _font_config is None:
+        from weasyprint.text.fonts import FontConfiguration
+        _font_config = FontConfiguration()
+    return _font_config
+
+
+def get_stylesheets(template_name: str) -> List[Any]:
+    """Return the pre-parsed stylesheets for a template, parsing them on first use."""
+    stylesheets = _stylesheets.get(template_name)
+    if stylesheets is None:
+        from weasyprint import CSS
+        _, stylesheet = resolve_template(template_name)
+        font_config = get_font_config()
+        stylesheets = [
+            CSS(filename=FONTS_CSS, font_config=font_config),
+            CSS(filename=os.path.join(STYLES_DIR, stylesheet), font_config=font_config),
+        ]
+        _stylesheets[template_name] = stylesheets
+    return stylesheets
+
+
+def warm_up() -> None:
+    """Register fonts and parse every template's stylesheets in this process."""
+    from weasyprint import HTML
+    for name in TEMPLATES:
+        get_stylesheets(name)
+    HTML(string="<p>warm-up</p>").write_pdf(
+        stylesheets=get_stylesheets(DEFAULT_TEMPLATE), font_config=get_font_config()
+    )
+
+
+def render_pdf(html: str, template_name: str = DEFAULT_TEMPLATE) -> bytes:
+    """Lay out already-rendered HTML with the template's cached stylesheets."""
+    from weasyprint import HTML
+    return HTML(string=html, base_url=TEMPLATES_DIR).write_pdf(
+        stylesheets=get_stylesheets(template_name), font_config=get_font_config()
+    )
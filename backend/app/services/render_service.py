@@ -0,0 +1,62 @@
+import json
+from typing import Any, Dict, Optional, Tuple
+from app.models.resume import StructuredResume
+from app.services import render_pipeline
+from app.services.artifact_service import ArtifactStore
+from app.services.cache_service import ResultCache, make_cache_key
+from app.services.pdf_service import PDFService
+from app.utils.logger import setup_logger
+
+logger = setup_logger('render_service')
+
+
+class RenderService:
+    """
+    Renders hand-edited resume JSON without another model call.
+
+    PDFs are cached by a hash of the normalized resume data and the
+    template, so re-submitting an edit (or undoing one) returns the stored
+    artifact without a WeasyPrint layout. Previews stop after Jinja and
+    never reach the render executor.
+    """
+
+    def __init__(self, pdf_service: PDFService, artifact_store: ArtifactStore, cache: Optional[ResultCache] = None):
+        self.pdf_service = pdf_service
+        self.artifact_store = artifact_store
+        self.cache = cache or ResultCache(namespace="render")
+
+    @staticmethod
+    def normalize(resume_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate edited data into the canonical structure; raises pydantic.ValidationError."""
+        return StructuredResume.model_validate(resume_data).model_dump()
+
+    def render_key(self, resume_data: Dict[str, Any], template_name: str) -> str:
+        return make_cache_key(
+            json.dumps(resume_data, sort_keys=True, ensure_ascii=False, separators=(",", ":")),
+            template_name,
+            render_pipeline.template_fingerprint(template_name),
+        )
+
+    async def render(
+        self,
+        resume_data: Dict[str, Any],
+        template_name: str = render_pipeline.DEFAULT_TEMPLATE,
+        bypass_cache: bool = False,
+    ) -> Tuple[str, bool]:
+        """Return the PDF artifact id for the data and whether it came from the render cache."""
+        resume_data = self.normalize(resume_data)
+        key = self.render_key(resume_data, template_name)
+
+        if not bypass_cache:
+            cached = await self.cache.get(key)
+            if cached is not None and await self.artifact_store.size(cached["pdf_artifact_id"]) is not None:
+                logger.info(f"⚡ Render cache hit for {key[:12]}")
+                return cached["pdf_artifact_id"], True
+
+        pdf_bytes = await self.pdf_service.generate_resume_pdf(resume_data, template_name)
+        artifact_id = await self.artifact_store.put(pdf_bytes)
+        await self.cache.set(key, {"pdf_artifact_id": artifact_id, "template": template_name})
+        return artifact_id, False
+
+    def preview(self, resume_data: Dict[str, Any], template_name: str = render_pipeline.DEFAULT_TEMPLATE) -> str:
+        return self.pdf_service.render_preview(self.normalize(resume_data), template_name)
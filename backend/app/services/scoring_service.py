@@ -0,0 +1,238 @@
+# Scoring Service - local, deterministic keyword match between a resume and a job description
+import json
+import math
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from app.utils import tokenizer
+from app.utils.logger import setup_logger
+from app.utils.metrics import stage_timer
+
+logger = setup_logger('scoring_service')
+
+SKILLS_LEXICON_PATH = os.getenv(
+    "SKILLS_LEXICON_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'skills_lexicon.json'),
+)
+# Generic (non-lexicon) job description keywords that take part in the score
+SCORE_MAX_KEYWORDS = int(os.getenv("SCORE_MAX_KEYWORDS", "30"))
+# Longer inputs are truncated so a pasted book cannot blow the latency budget
+SCORE_MAX_TEXT_CHARS = int(os.getenv("SCORE_MAX_TEXT_CHARS", "50000"))
+SCORE_MAX_REPORTED = 20
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# BM25 length-normalization pivot: terms in a typical one- to two-page resume
+RESUME_AVERAGE_TERMS = 500
+SKILL_WEIGHT = 3.0
+KEYWORD_WEIGHT = 1.0
+# Share of a term's credit earned by mentioning it at all; the rest grows with BM25 term frequency
+PRESENCE_CREDIT = 0.8
+# Query terms are skill names under this prefix, or plain (stemmed) keywords
+SKILL_TERM_PREFIX = "skill:"
+
+# Words every posting uses that say nothing about the role
+_FILLER = frozenset(tokenizer.stem(word) for word in """
+ability able across applicant based benefit bonus candidate company day demonstrated deep duties ensure
+environment equivalent etc excellent experience familiar familiarity field good great hands help high
+ideal ideally include including job join key least level like looking make minimum need new nice one opportunity
+plus position preferred proficiency proficient proven record related relevant required requirement
+responsibility role skill solid strong team three time track two understanding use using want well work
+working world year
+""".split())
+
+
+class SkillsLexicon:
+    """Skill phrases (as stemmed term tuples) mapped to their canonical names."""
+
+    def __init__(self, skills: Dict[str, Dict[str, List[str]]]):
+        self.phrases: Dict[Tuple[str, ...], str] = {}
+        self.categories: Dict[str, str] = {}
+        for category, entries in skills.items():
+            for name, aliases in entries.items():
+                self.categories[name] = category
+                # Only aliases are matched: canonical names like "Go" or "R" are too ambiguous as words
+                for alias in aliases:
+                    phrase = tuple(tokenizer.terms(alias))
+                    if phrase:
+                        self.phrases.setdefault(phrase, name)
+        self.max_length = max(map(len, self.phrases), default=1)
+        self.first_terms = frozenset(phrase[0] for phrase in self.phrases)
+
+    @classmethod
+    def load(cls, path: str = SKILLS_LEXICON_PATH) -> "SkillsLexicon":
+        with open(path, encoding="utf-8") as f:
+            lexicon = cls(json.load(f)["skills"])
+        logger.info(f"📖 Loaded skills lexicon: {len(lexicon.categories)} skills, {len(lexicon.phrases)} phrases")
+        return lexicon
+
+    def extract(self, terms: List[str]) -> Tuple[Counter, List[bool]]:
+        """Count skill mentions by longest match; also return which positions they cover."""
+        skills: Counter = Counter()
+        covered = [False] * len(terms)
+        position = 0
+        while position < len(terms):
+            if terms[position] not in self.first_terms:
+                position += 1
+                continue
+            for length in range(min(self.max_length, len(terms) - position), 0, -1):
+                name = self.phrases.get(tuple(terms[position:position + length]))
+                if name is not None:
+                    skills[name] += 1
+                    covered[position:position + length] = [True] * length
+                    position += length
+                    break
+            else:
+                position += 1
+        return skills, covered
+
+
+class TermProfile:
+    """Skill and keyword counts of one document."""
+
+    def __init__(self, text: str, lexicon: SkillsLexicon):
+        tokens = tokenizer.tokenize(text[:SCORE_MAX_TEXT_CHARS])
+        terms = [tokenizer.stem(token) for token in tokens]
+        self.length = len(terms)
+        self.skills, covered = lexicon.extract(terms)
+        self.keywords: Counter = Counter()
+        # Keywords seen at least once outside a skill phrase; only these become query terms
+        self.free_keywords = set()
+        # Keyword -> first spelling seen, for display (terms are stemmed)
+        self.surface: Dict[str, str] = {}
+
+        previous = None
+        for token, term, is_skill in zip(tokens, terms, covered):
+            if not _is_keyword(token, term):
+                previous = None
+                continue
+            found = [(term, token, is_skill)]
+            if previous is not None:
+                found.append((f"{previous[1]} {term}", f"{previous[0]} {token}", is_skill and previous[2]))
+            for keyword, spelling, in_skill in found:
+                self.keywords[keyword] += 1
+                self.surface.setdefault(keyword, spelling)
+                if not in_skill:
+                    self.free_keywords.add(keyword)
+            previous = (token, term, is_skill)
+
+    def frequency(self, term: str) -> int:
+        if term.startswith(SKILL_TERM_PREFIX):
+            return self.skills.get(term[len(SKILL_TERM_PREFIX):], 0)
+        return self.keywords.get(term, 0)
+
+    def label(self, term: str) -> str:
+        if term.startswith(SKILL_TERM_PREFIX):
+            return term[len(SKILL_TERM_PREFIX):]
+        return self.surface.get(term, term)
+
+    def terms(self) -> List[str]:
+        """Every skill and keyword of the document, as query terms."""
+        return [SKILL_TERM_PREFIX + name for name in self.skills] + list(self.keywords)
+
+
+def _is_keyword(token: str, term: str) -> bool:
+    return (
+        len(term) > 2
+        and token not in tokenizer.STOPWORDS
+        and term not in _FILLER
+        and not term.isdigit()
+    )
+
+
+def resume_data_text(data: Any) -> str:
+    """Flatten structured resume JSON into plain text; field names are left out."""
+    if isinstance(data, str):
+        return data
+    if isinstance(data, dict):
+        data = list(data.values())
+    if isinstance(data, (list, tuple)):
+        return "\n".join(filter(None, (resume_data_text(item) for item in data)))
+    return ""
+
+
+class MatchScorer:
+    """
+    ATS-style keyword match without a model call.
+
+    Skills from the bundled lexicon and the posting's most frequent other
+    keywords (single words and adjacent pairs) form the query. Each query
+    term is weighted by its kind, its inverse document frequency and its
+    log frequency in the posting, and earns credit for appearing in the
+    resume, with a BM25 term-frequency bonus for repeated mentions. The
+    same inputs always give the same score.
+
+    `idf` maps query terms to inverse document frequencies from a
+    posting corpus; without one every term counts as equally rare.
+    """
+
+    def __init__(self, lexicon: Optional[SkillsLexicon] = None, idf: Optional[Dict[str, float]] = None):
+        self.lexicon = lexicon or SkillsLexicon.load()
+        self.idf = idf or {}
+
+    def profile(self, text: str) -> TermProfile:
+        return TermProfile(text, self.lexicon)
+
+    def query_terms(self, job: TermProfile, max_keywords: int = SCORE_MAX_KEYWORDS) -> List[str]:
+        """The posting's skills, then its `max_keywords` most important other keywords."""
+        keywords = [
+            keyword for keyword, _ in sorted(
+                job.keywords.items(),
+                key=lambda item: (1 + math.log(item[1])) * self.idf.get(item[0], 1.0),
+                reverse=True,
+            )
+            # Words of named skills are scored as skills; pairs must repeat to count as a phrase
+            if keyword in job.free_keywords and (" " not in keyword or job.keywords[keyword] > 1)
+        ]
+        return [SKILL_TERM_PREFIX + name for name in job.skills] + keywords[:max_keywords]
+
+    @staticmethod
+    def term_weights(job: TermProfile, terms: List[str]) -> np.ndarray:
+        """Weight of each query term in the posting, before IDF: its kind times its log frequency."""
+        kinds = np.array([SKILL_WEIGHT if term.startswith(SKILL_TERM_PREFIX) else KEYWORD_WEIGHT for term in terms])
+        frequencies = np.array([job.frequency(term) for term in terms], dtype=np.float64)
+        return kinds * (1 + np.log(np.maximum(frequencies, 1)))
+
+    @staticmethod
+    def credit(resume: TermProfile, terms: List[str]) -> np.ndarray:
+        """Credit in [0, 1] the resume earns for each term: presence plus a BM25 term-frequency bonus."""
+        frequencies = np.array([resume.frequency(term) for term in terms], dtype=np.float64)
+        length_norm = 1 - BM25_B + BM25_B * resume.length / RESUME_AVERAGE_TERMS
+        saturation = frequencies * (BM25_K1 + 1) / (frequencies + BM25_K1 * length_norm)
+        return np.where(frequencies > 0, PRESENCE_CREDIT + (1 - PRESENCE_CREDIT) * saturation / (BM25_K1 + 1), 0.0)
+
+    def score(self, resume_text: str, job_description: str) -> Dict[str, Any]:
+        with stage_timer("match_score"):
+            job = self.profile(job_description)
+            resume = self.profile(resume_text)
+
+            terms = self.query_terms(job)
+            is_skill = np.array([term.startswith(SKILL_TERM_PREFIX) for term in terms], dtype=bool)
+            idf = np.array([self.idf.get(term, 1.0) for term in terms], dtype=np.float64)
+            weights = self.term_weights(job, terms) * idf
+            credit = self.credit(resume, terms)
+
+            order = np.argsort(-weights, kind="stable")
+            matched = credit[order] > 0
+            labels = [job.label(terms[i]) for i in order]
+            skill_rows = is_skill[order]
+
+            return {
+                "score": _percent(weights, credit),
+                "skill_score": _percent(weights[is_skill], credit[is_skill]) if is_skill.any() else None,
+                "keyword_score": _percent(weights[~is_skill], credit[~is_skill]) if (~is_skill).any() else None,
+                "matched_skills": _pick(labels, skill_rows & matched),
+                "missing_skills": _pick(labels, skill_rows & ~matched),
+                "matched_keywords": _pick(labels, ~skill_rows & matched),
+                "missing_keywords": _pick(labels, ~skill_rows & ~matched),
+            }
+
+
+def _percent(weights: np.ndarray, credit: np.ndarray) -> int:
+    total = weights.sum()
+    return int(round(100 * float(weights @ credit) / total)) if total > 0 else 0
+
+
+def _pick(labels: List[str], mask: np.ndarray) -> List[str]:
+    return [label for label, keep in zip(labels, mask) if keep][:SCORE_MAX_REPORTED]
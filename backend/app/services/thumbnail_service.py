@@ -0,0 +1,186 @@
+# Thumbnail Service - rasterizes PDF pages into small preview images
+import asyncio
+import io
+import math
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from app.services.artifact_service import ArtifactStore
+from app.services.cache_service import ResultCache, make_cache_key
+from app.services.file_service import DocumentSource, IngestedUpload, _open_pdf
+from app.utils.errors import ServiceBusyError
+from app.utils.logger import setup_logger
+from app.utils.metrics import stage_timer
+from app.utils.single_flight import SingleFlight
+
+logger = setup_logger('thumbnail_service')
+
+THUMBNAIL_EXECUTOR = os.getenv("THUMBNAIL_EXECUTOR", "process")  # process | thread
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", str(min(os.cpu_count() or 1, 2))))
+# 48 DPI renders a Letter/A4 page roughly 400px wide, enough for a preview card
+THUMBNAIL_DPI = int(os.getenv("THUMBNAIL_DPI", "48"))
+THUMBNAIL_MIN_DPI = 12
+THUMBNAIL_MAX_DPI = int(os.getenv("THUMBNAIL_MAX_DPI", "150"))
+THUMBNAIL_FORMAT = os.getenv("THUMBNAIL_FORMAT", "png")  # png | webp
+THUMBNAIL_WEBP_QUALITY = int(os.getenv("THUMBNAIL_WEBP_QUALITY", "80"))
+THUMBNAIL_MAX_PAGES = int(os.getenv("THUMBNAIL_MAX_PAGES", "10"))
+# Pixels per page image; pages too large for it are rasterized at a lower DPI.
+# 4M pixels fits a Letter/A4 page at the maximum DPI, yet bounds the memory a
+# crafted PDF with a huge page size can make a worker allocate.
+THUMBNAIL_MAX_PIXELS = int(os.getenv("THUMBNAIL_MAX_PIXELS", str(4_000_000)))
+THUMBNAIL_TIMEOUT = float(os.getenv("THUMBNAIL_TIMEOUT", "20"))
+
+THUMBNAIL_MEDIA_TYPES = {"png": "image/png", "webp": "image/webp"}
+
+
+def _encode(pixmap, image_format: str) -> bytes:
+    if image_format == "png":
+        return pixmap.tobytes("png")
+    # PyMuPDF writes PNG natively; WebP goes through Pillow
+    from PIL import Image
+    image = Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+    buffer = io.BytesIO()
+    image.save(buffer, format="WEBP", quality=THUMBNAIL_WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+class ThumbnailTimeoutError(ServiceBusyError):
+    """Raised when rasterizing a PDF's thumbnails takes longer than the service's timeout."""
+
+
+def _page_dpi(page, dpi: int, max_pixels: int) -> int:
+    """The requested DPI, lowered as far as needed to keep the page image within `max_pixels`."""
+    width, height = page.rect.width / 72, page.rect.height / 72  # inches
+    area = max(width * height, 1e-6)
+    return max(min(dpi, math.floor(math.sqrt(max_pixels / area))), 1)
+
+
+def _rasterize(
+    source: DocumentSource, max_pages: int, dpi: int, image_format: str, max_pixels: int = THUMBNAIL_MAX_PIXELS
+) -> Tuple[int, List[bytes]]:
+    """Runs in a pool worker: returns the page count and images of the first `max_pages` pages."""
+    with _open_pdf(source) as doc:
+        images = []
+        for number in range(min(doc.page_count, max_pages)):
+            page = doc[number]
+            images.append(_encode(page.get_pixmap(dpi=_page_dpi(page, dpi, max_pixels), alpha=False), image_format))
+        return doc.page_count, images
+
+
+class ThumbnailService:
+    """
+    Page thumbnails for uploaded and generated PDFs.
+
+    Rasterization runs in its own worker pool, never on the event loop,
+    and fails with ThumbnailTimeoutError after `timeout` seconds; as with
+    PDF renders, a process worker still finishes the abandoned job.
+    Images are stored in the content-addressed artifact store, and the
+    cache maps (PDF hash, pages, DPI, format) to their artifact ids, so a
+    thumbnail is rendered once per PDF and then served with immutable
+    cache headers. Concurrent requests for the same thumbnails share one
+    rasterization.
+    """
+
+    def __init__(
+        self,
+        artifact_store: ArtifactStore,
+        executor_kind: str = THUMBNAIL_EXECUTOR,
+        workers: int = THUMBNAIL_WORKERS,
+        max_pages: int = THUMBNAIL_MAX_PAGES,
+        cache: Optional[ResultCache] = None,
+        timeout: float = THUMBNAIL_TIMEOUT,
+        max_pixels: int = THUMBNAIL_MAX_PIXELS,
+    ):
+        if executor_kind not in ("process", "thread"):
+            raise ValueError(f"Unsupported THUMBNAIL_EXECUTOR: {executor_kind}")
+        self.artifact_store = artifact_store
+        self.executor_kind = executor_kind
+        self.workers = max(workers, 1)
+        self.max_pages = max(max_pages, 1)
+        self.timeout = timeout
+        self.max_pixels = max(max_pixels, 1)
+        self.cache = cache or ResultCache(namespace="thumbnail")
+        self.flights = SingleFlight("thumbnail")
+        self._pool: Optional[Executor] = None
+
+    def start(self) -> None:
+        if self._pool is not None:
+            return
+        if self.executor_kind == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="thumbnail")
+        logger.info(f"🖼️ Thumbnail engine started: {self.workers} {self.executor_kind} workers")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def thumbnails(
+        self,
+        pdf_sha256: str,
+        load: Callable[[], Awaitable[Union[DocumentSource, IngestedUpload, None]]],
+        all_pages: bool = False,
+        dpi: int = THUMBNAIL_DPI,
+        image_format: str = THUMBNAIL_FORMAT,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return `{"page_count": n, "thumbnails": [artifact ids]}` for the first
+        page, or for up to `max_pages` pages with all_pages.
+
+        `load` supplies the PDF and is only called on a cache miss; when it
+        returns None (the PDF is gone) so does this method. It may return a
+        held IngestedUpload, which the shared rasterization closes when it
+        ends, however many callers have given up on it by then.
+        """
+        if image_format not in THUMBNAIL_MEDIA_TYPES:
+            raise ValueError(f"Unsupported thumbnail format: {image_format}")
+        if not THUMBNAIL_MIN_DPI <= dpi <= THUMBNAIL_MAX_DPI:
+            raise ValueError(f"DPI must be between {THUMBNAIL_MIN_DPI} and {THUMBNAIL_MAX_DPI}")
+
+        max_pages = self.max_pages if all_pages else 1
+        key = make_cache_key(pdf_sha256, str(max_pages), str(dpi), image_format)
+        cached = await self.cache.get(key)
+        if cached is not None and await self._all_stored(cached["thumbnails"], image_format):
+            return cached
+
+        async def compute() -> Optional[Dict[str, Any]]:
+            loaded = await load()
+            if loaded is None:
+                return None
+            upload = loaded if isinstance(loaded, IngestedUpload) else None
+            try:
+                if self._pool is None:
+                    self.start()
+                loop = asyncio.get_running_loop()
+                future = loop.run_in_executor(
+                    self._pool, _rasterize, upload.source if upload else loaded, max_pages, dpi, image_format,
+                    self.max_pixels,
+                )
+                with stage_timer("thumbnail"):
+                    page_count, images = await asyncio.wait_for(future, timeout=self.timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"⚠️ Thumbnails for {pdf_sha256[:12]} timed out after {self.timeout:.0f} seconds")
+                raise ThumbnailTimeoutError(f"Thumbnail rendering timed out after {self.timeout:.0f} seconds.")
+            finally:
+                if upload is not None:
+                    upload.close()
+            result = {
+                "page_count": page_count,
+                "thumbnails": [await self.artifact_store.put(image, image_format) for image in images],
+            }
+            await self.cache.set(key, result)
+            logger.info(f"🖼️ Rendered {len(images)} {image_format} thumbnail(s) at {dpi} DPI for {pdf_sha256[:12]}")
+            return result
+
+        return await self.flights.do(key, compute)
+
+    async def _all_stored(self, artifact_ids: List[str], image_format: str) -> bool:
+        for artifact_id in artifact_ids:
+            if await self.artifact_store.size(artifact_id, image_format) is None:
+                return False
+        return True
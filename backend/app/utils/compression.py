@@ -0,0 +1,133 @@
+# Response compression negotiated by Accept-Encoding (brotli when available, else gzip)
+import asyncio
+import gzip
+import os
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from app.utils.metrics import stage_timer
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Brotli 11 is far too slow for dynamic responses; 4-5 beats gzip on size at similar cost
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "5"))
+# Bodies larger than this are compressed in a worker thread instead of on the event loop
+COMPRESSION_THREAD_THRESHOLD = int(os.getenv("COMPRESSION_THREAD_THRESHOLD", str(256 * 1024)))
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/problem+json",
+    "application/javascript",
+    "image/svg+xml",
+    "text/html",
+    "text/css",
+    "text/plain",
+)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick `br` or `gzip` from an Accept-Encoding header, honouring q-values."""
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            weights[coding] = quality
+    wildcard = weights.get("*", 0.0)
+    candidates = [("gzip", weights.get("gzip", wildcard))]
+    if brotli is not None:
+        # Listed first so it wins ties
+        candidates.insert(0, ("br", weights.get("br", wildcard)))
+    coding, quality = max(candidates, key=lambda candidate: candidate[1])
+    return coding if quality > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses complete text/JSON responses.
+
+    Only responses sent as a single body message are compressed. Whether a
+    response can be compressed at all is decided from its start message:
+    other content types (SSE, NDJSON, PDFs, images), ranges and already
+    encoded bodies have their headers sent at once. Only compressible ones
+    are held until the first body message shows whether they stream, and
+    streamed bodies then pass through untouched so their chunks still reach
+    the client as soon as they are produced.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        held_start = None
+
+        async def compressing_send(message):
+            nonlocal held_start
+            if message["type"] == "http.response.start":
+                if self._compressible(message["status"], Headers(raw=message.get("headers", []))):
+                    # Hold the headers until the first body message shows whether the response streams
+                    held_start = message
+                else:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or held_start is None:
+                await send(message)
+                return
+
+            start, held_start = held_start, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=list(start.get("headers", [])))
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                await send(start)
+                await send(message)
+                return
+
+            with stage_timer("compress"):
+                if len(body) > COMPRESSION_THREAD_THRESHOLD:
+                    compressed = await asyncio.to_thread(compress, body, encoding)
+                else:
+                    compressed = compress(body, encoding)
+            headers.add_vary_header("Accept-Encoding")
+            if len(compressed) < len(body):
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(compressed))
+                body = compressed
+            await send(dict(start, headers=headers.raw))
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, compressing_send)
+
+    def _compressible(self, status: int, headers: Headers) -> bool:
+        if status in (204, 206, 304) or "content-encoding" in headers:
+            return False
+        content_length = headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) < self.minimum_size:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type in COMPRESSIBLE_TYPES
@@ -0,0 +1,12 @@
+# Shared error types
+
+
+class ServiceBusyError(RuntimeError):
+    """
+    Raised when a bounded resource (render pool, model quota) cannot accept
+    more work right now. Routes translate it into 503 with Retry-After.
+    """
+
+    def __init__(self, message: str, retry_after: int = 5):
+        super().__init__(message)
+        self.retry_after = max(int(retry_after), 1)
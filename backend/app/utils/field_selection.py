@@ -0,0 +1,26 @@
+# Sparse responses: `fields=` / `exclude=` query parameters resolved against a response model
+from typing import Optional, Set, Type
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+
+
+def _field_names(value: Optional[str]) -> Set[str]:
+    return {name.strip() for name in (value or "").split(",") if name.strip()}
+
+
+def field_selection(model: Type[BaseModel]):
+    """Dependency that resolves `fields=` / `exclude=` (comma-separated) against a response model."""
+    allowed = set(model.model_fields)
+
+    def select(
+        fields: Optional[str] = Query(None, description="Comma-separated response fields to return (default: all)."),
+        exclude: Optional[str] = Query(None, description="Comma-separated response fields to leave out."),
+    ) -> Set[str]:
+        selected = _field_names(fields) if fields else set(allowed)
+        excluded = _field_names(exclude)
+        unknown = (selected | excluded) - allowed
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        return selected - excluded
+
+    return select
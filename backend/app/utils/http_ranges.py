@@ -0,0 +1,111 @@
+# HTTP helpers for serving immutable, content-addressed artifacts
+from typing import Optional, Tuple
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from app.services.artifact_service import ArtifactReader, ArtifactStore, is_valid_artifact_id
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single `bytes=` range into inclusive (start, end) offsets.
+
+    Returns None when the whole entity should be sent (no header, or a
+    multi-range request we choose to ignore). Raises ValueError when the
+    range cannot be satisfied.
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+
+    start_text, _, end_text = spec.partition("-")
+    try:
+        if not start_text:
+            # Suffix range: the last N bytes
+            length = int(end_text)
+            if length <= 0:
+                raise ValueError("Empty suffix range")
+            return max(size - length, 0), size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        raise ValueError("Malformed range")
+
+    if start >= size or end < start:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, size - 1)
+
+
+async def artifact_response(
+    store: ArtifactStore,
+    artifact_id: str,
+    request: Request,
+    extension: str = "pdf",
+    media_type: str = "application/pdf",
+    filename: Optional[str] = None,
+) -> Response:
+    """
+    Stream an artifact with ETag, conditional GET and single-range support.
+
+    The artifact is opened before any header is built, so an eviction
+    between the headers and the body cannot shorten the response below its
+    Content-Length.
+    """
+    if not is_valid_artifact_id(artifact_id):
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    reader = await store.open(artifact_id, extension)
+    if reader is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    response = _reader_response(reader, artifact_id, request, media_type, filename)
+    if not isinstance(response, StreamingResponse):
+        await reader.close()
+    return response
+
+
+def _reader_response(
+    reader: ArtifactReader, artifact_id: str, request: Request, media_type: str, filename: Optional[str]
+) -> Response:
+    size = reader.size
+
+    etag = f'"{artifact_id}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    if filename:
+        headers["Content-Disposition"] = f'inline; filename="{filename}"'
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in if_none_match):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if not if_range or if_range.strip() == etag:
+        try:
+            byte_range = parse_range_header(request.headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    # The background task runs after the body is sent or the client goes away
+    return StreamingResponse(
+        reader.iter_range(start, end),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+        background=BackgroundTask(reader.close),
+    )
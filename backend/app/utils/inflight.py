@@ -0,0 +1,51 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from app.utils.errors import ServiceBusyError
+from app.utils.logger import setup_logger
+
+logger = setup_logger('inflight')
+
+
+class InFlightTracker:
+    """
+    Counts in-flight optimize work so shutdown can drain it.
+
+    Once draining starts, new work is refused with ServiceBusyError (503)
+    so the load balancer retries it on another worker, while work that
+    is already running is given time to finish.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.draining = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def ensure_accepting(self) -> None:
+        if self.draining:
+            raise ServiceBusyError("Server is shutting down. Please retry.", retry_after=1)
+
+    @asynccontextmanager
+    async def track(self) -> AsyncIterator[None]:
+        self.ensure_accepting()
+        self.count += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self.count -= 1
+            if self.count == 0:
+                self._idle.set()
+
+    async def drain(self, timeout: float) -> bool:
+        """Refuse new work and wait up to timeout seconds for running work. Returns True if fully drained."""
+        self.draining = True
+        if self.count:
+            logger.info(f"⏳ Draining {self.count} in-flight optimization(s) (timeout {timeout:.0f}s)...")
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Shutdown drain timed out with {self.count} optimization(s) still running")
+            return False
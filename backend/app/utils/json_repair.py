@@ -0,0 +1,107 @@
+import json
+import re
+from typing import Any, List, Tuple
+
+_CODE_FENCE_RE = re.compile(r"^\s*```[a-zA-Z]*\s*\n?(.*?)\n?\s*```\s*$", re.DOTALL)
+_CLOSERS = {"{": "}", "[": "]"}
+
+# How many earlier cut points to try when a truncated document will not close cleanly
+MAX_TRUNCATION_ATTEMPTS = 8
+
+
+class JSONRepairError(ValueError):
+    """Raised when a model response cannot be repaired into valid JSON."""
+
+
+def strip_code_fence(text: str) -> str:
+    """Remove a surrounding ```json ... ``` fence and any prose around the outermost value."""
+    match = _CODE_FENCE_RE.match(text)
+    if match:
+        text = match.group(1)
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    return text[min(starts):] if starts else text.strip()
+
+
+def _scan(text: str) -> Tuple[str, List[str], List[Tuple[int, List[str]]], bool]:
+    """
+    Copy text while dropping trailing commas before `}`/`]`.
+
+    Returns the cleaned text, the stack of still-open brackets, the cut
+    points (position of each top-level-safe comma with the stack at that
+    point) and whether the text ends inside a string.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    cuts: List[Tuple[int, List[str]]] = []
+    in_string = escape = False
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+        elif char in "}]":
+            # Drop a trailing comma: [1, 2,] -> [1, 2]
+            end = len(out)
+            while end and out[end - 1].isspace():
+                end -= 1
+            if end and out[end - 1] == ",":
+                del out[end - 1]
+            if stack:
+                stack.pop()
+            if not stack:
+                out.append(char)
+                return "".join(out), stack, cuts, False
+        elif char == ",":
+            cuts.append((len(out), list(stack)))
+        out.append(char)
+    return "".join(out), stack, cuts, in_string
+
+
+def _close(text: str, stack: List[str]) -> str:
+    text = text.rstrip()
+    if text.endswith(","):
+        text = text[:-1]
+    return text + "".join(_CLOSERS[bracket] for bracket in reversed(stack))
+
+
+def repair_json(text: str) -> Any:
+    """
+    Parse model output as JSON, repairing common defects locally.
+
+    Handles code fences and surrounding prose, trailing commas and output
+    truncated mid-value (unterminated strings, unclosed arrays/objects):
+    a truncated document is cut back to the last complete element and
+    its open brackets are closed.
+    """
+    if not text or not text.strip():
+        raise JSONRepairError("Empty response")
+    candidate = strip_code_fence(text)
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError as e:
+        original_error = e
+
+    cleaned, stack, cuts, in_string = _scan(candidate)
+    attempts = []
+    if not stack:
+        attempts.append(cleaned)
+    else:
+        attempts.append(_close(cleaned + ('"' if in_string else ""), stack))
+        for position, cut_stack in reversed(cuts[-MAX_TRUNCATION_ATTEMPTS:]):
+            attempts.append(_close(cleaned[:position], cut_stack))
+
+    for attempt in attempts:
+        try:
+            return json.loads(attempt)
+        except json.JSONDecodeError:
+            continue
+    raise JSONRepairError(f"Could not repair JSON: {original_error}")
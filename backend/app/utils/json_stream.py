@@ -0,0 +1,132 @@
+import json
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+JSONPath = Tuple[Union[str, int], ...]
+
+
+class _Frame:
+    """An open object or array on the parser stack."""
+
+    __slots__ = ("kind", "path", "key", "index", "expect_key")
+
+    def __init__(self, kind: str, path: JSONPath):
+        self.kind = kind
+        self.path = path
+        self.key: Optional[str] = None
+        self.index = 0
+        self.expect_key = kind == "{"
+
+    def child_path(self) -> JSONPath:
+        if self.kind == "{":
+            return self.path + (self.key,)
+        return self.path + (self.index,)
+
+
+class IncrementalJSONParser:
+    """
+    Incremental scanner for a single JSON object arriving in chunks.
+
+    Every time a value whose path is accepted by `should_emit` is complete,
+    `feed` returns it as a `(path, value)` pair, so callers can act on
+    leading fields long before the closing brace arrives. Text before the
+    first `{` (code fences, stray prose) is skipped.
+    """
+
+    def __init__(self, should_emit: Callable[[JSONPath], bool]):
+        self.should_emit = should_emit
+        self.done = False
+        self._buffer = ""
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._value_starts: List[int] = []
+        self._in_string = False
+        self._escape = False
+        self._token_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[JSONPath, Any]]:
+        """Consume a chunk and return the values it completed, in order."""
+        completed: List[Tuple[JSONPath, Any]] = []
+        if self.done or not chunk:
+            return completed
+
+        self._buffer += chunk
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer) and not self.done:
+            char = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._end_string(i, completed)
+                i += 1
+                continue
+
+            if not self._stack:
+                if char == "{":
+                    self._open("{", (), i)
+                i += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._token_start = i
+            elif char in "{[":
+                self._open(char, self._stack[-1].child_path(), i)
+            elif char in "}]":
+                self._end_scalar(i, completed)
+                self._close(i, completed)
+            elif char == ",":
+                self._end_scalar(i, completed)
+                frame = self._stack[-1]
+                if frame.kind == "{":
+                    frame.expect_key = True
+                else:
+                    frame.index += 1
+            elif char == ":":
+                self._stack[-1].expect_key = False
+            elif not char.isspace() and self._token_start is None:
+                # Start of a number, true, false or null
+                self._token_start = i
+            i += 1
+
+        self._pos = i
+        return completed
+
+    def _open(self, kind: str, path: JSONPath, position: int) -> None:
+        self._stack.append(_Frame(kind, path))
+        self._value_starts.append(position)
+
+    def _close(self, position: int, completed: List[Tuple[JSONPath, Any]]) -> None:
+        frame = self._stack.pop()
+        start = self._value_starts.pop()
+        if not self._stack:
+            self.done = True
+        self._emit(frame.path, start, position + 1, completed)
+
+    def _end_string(self, position: int, completed: List[Tuple[JSONPath, Any]]) -> None:
+        start, self._token_start = self._token_start, None
+        frame = self._stack[-1]
+        if frame.kind == "{" and frame.expect_key:
+            frame.key = json.loads(self._buffer[start:position + 1])
+            return
+        self._emit(frame.child_path(), start, position + 1, completed)
+
+    def _end_scalar(self, position: int, completed: List[Tuple[JSONPath, Any]]) -> None:
+        if self._token_start is None:
+            return
+        start, self._token_start = self._token_start, None
+        self._emit(self._stack[-1].child_path(), start, position, completed)
+
+    def _emit(self, path: JSONPath, start: int, end: int, completed: List[Tuple[JSONPath, Any]]) -> None:
+        if not self.should_emit(path):
+            return
+        try:
+            completed.append((path, json.loads(self._buffer[start:end])))
+        except ValueError:
+            # A malformed fragment is left for the final full-document parse
+            pass
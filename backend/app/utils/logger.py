@@ -1,111 +1,252 @@
-import os
+import atexit
+import contextvars
+import copy
 import logging
+import os
+import queue
+import random
+import re
 import sys
-from logging.handlers import RotatingFileHandler
-from typing import Optional, Union
+import uuid
+import zlib
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+from typing import Dict, Optional, Union
+
+import structlog
+
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json | console
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fraction of INFO/DEBUG records kept; warnings and errors are never sampled
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+# Per-logger overrides, e.g. "cache_service=0.1,text_compaction=0.25"
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+
+# Write app.log and error.log under LOG_DIR as well as stdout; turn off in
+# containers whose runtime already collects stdout
+LOG_TO_FILES = os.getenv("LOG_TO_FILES", "true").lower() == "true"
+LOG_DIR = os.getenv("LOG_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs'))
+
+REQUEST_ID_HEADER = "x-request-id"
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+# Correlation ID of the request (or job) being handled, attached to every record
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+
+def _parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in spec.split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+class LogSampler(logging.Filter):
+    """
+    Keep a fraction of INFO and DEBUG records.
+
+    Records that belong to a request are sampled by request ID, so a
+    request's log lines are either all kept or all dropped.
+    """
+
+    def __init__(self, default_rate: float = LOG_SAMPLE_RATE, rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.default_rate = default_rate
+        self.rates = rates if rates is not None else _parse_sample_rates(LOG_SAMPLE_RATES)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record.name, self.default_rate)
+        if rate >= 1:
+            return True
+        request_id = request_id_var.get()
+        if request_id:
+            return zlib.crc32(request_id.encode()) / 0xFFFFFFFF < rate
+        return random.random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without formatting them.
+
+    Only the message is resolved here (its arguments may change after the
+    call returns) and the current request ID is attached; formatting,
+    tracebacks and file I/O happen on the listener thread. When the queue
+    is full the record is dropped rather than blocking the event loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        request_id = request_id_var.get()
+        if request_id:
+            record.request_id = request_id
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _formatter(renderer) -> structlog.stdlib.ProcessorFormatter:
+    processors = [structlog.stdlib.ProcessorFormatter.remove_processors_meta]
+    if isinstance(renderer, structlog.processors.JSONRenderer):
+        processors.append(structlog.processors.format_exc_info)
+    processors.append(renderer)
+    return structlog.stdlib.ProcessorFormatter(
+        processors=processors,
+        foreign_pre_chain=[
+            structlog.processors.TimeStamper(fmt="iso", utc=True),
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.ExtraAdder(),
+        ],
+    )
+
+
+class _LogPipeline:
+    """One queue per process, drained by a listener thread that owns every output handler."""
+
+    def __init__(self):
+        self.handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        self.handler.addFilter(LogSampler())
+        self.listener: Optional[QueueListener] = None
+
+    def start(self) -> None:
+        json_formatter = _formatter(structlog.processors.JSONRenderer(ensure_ascii=False))
+
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(
+            json_formatter if LOG_FORMAT == "json" else _formatter(structlog.dev.ConsoleRenderer(colors=sys.stdout.isatty()))
+        )
+        handlers = [console_handler]
+
+        if LOG_TO_FILES:
+            # Every gunicorn worker appends to the same files, so none of them
+            # may rotate: a size-based rollover in one worker renames the file
+            # under the others. Rotate externally (logrotate without
+            # copytruncate); WatchedFileHandler reopens a file once it is moved.
+            os.makedirs(LOG_DIR, exist_ok=True)
+            file_handler = WatchedFileHandler(os.path.join(LOG_DIR, 'app.log'), encoding='utf-8')
+            file_handler.setFormatter(json_formatter)
+
+            error_file_handler = WatchedFileHandler(os.path.join(LOG_DIR, 'error.log'), encoding='utf-8')
+            error_file_handler.setLevel(logging.ERROR)
+            error_file_handler.setFormatter(json_formatter)
+            handlers += [file_handler, error_file_handler]
+
+        self.listener = QueueListener(self.handler.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self) -> None:
+        """Flush queued records and stop the listener thread."""
+        if self.listener is not None and self.listener._thread is not None:
+            self.listener.stop()
+
+    def after_fork(self) -> None:
+        # The listener thread does not survive fork (gunicorn preload), and
+        # the queue may have been forked mid-operation: start afresh
+        if self.listener is None:
+            return
+        self.handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+        self.start()
+
+
+_pipeline: Optional[_LogPipeline] = None
+
+
+def _get_pipeline() -> _LogPipeline:
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = _LogPipeline()
+        _pipeline.start()
+        atexit.register(_pipeline.stop)
+        os.register_at_fork(after_in_child=_pipeline.after_fork)
+    return _pipeline
+
+
+def dropped_records() -> int:
+    """Records dropped because the log queue was full."""
+    return _pipeline.handler.dropped if _pipeline is not None else 0
+
 
 def setup_logger(name: Optional[str] = None, log_level: Optional[Union[str, int]] = None):
     """
-    Configure logging with both console and file handlers.
-    
+    Get a logger that writes structured JSON through the shared log queue.
+
     Args:
         name: Name of the logger (None for root logger)
         log_level: The logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL or int level)
-    
+
     Returns:
         logging.Logger: Configured logger instance
     """
-    # Get logger instance
     logger = logging.getLogger(name)
-    
+
     # Avoid duplicate handlers
     if logger.handlers:
         return logger
-    
-    # Set log level
+
     if log_level is None:
         log_level = os.getenv('LOG_LEVEL', 'INFO')
     if isinstance(log_level, str):
         log_level = getattr(logging, log_level.upper(), logging.INFO)
     logger.setLevel(log_level)
-    
-    # Create logs directory if it doesn't exist
-    log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs')
-    os.makedirs(log_dir, exist_ok=True)
-    
-    # Create a custom formatter with colors and emojis
-    class CustomFormatter(logging.Formatter):
-        grey = "\x1b[38;21m"
-        yellow = "\x1b[33;21m"
-        red = "\x1b[31;21m"
-        bold_red = "\x1b[31;1m"
-        reset = "\x1b[0m"
-        format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        emojis = {
-            'DEBUG': '🔍',
-            'INFO': 'ℹ️',
-            'WARNING': '⚠️',
-            'ERROR': '❌',
-            'CRITICAL': '🔥'
-        }
-
-        def format(self, record):
-            # Add emoji to the message
-            level_emoji = self.emojis.get(record.levelname, 'ℹ️')
-            record.msg = f"{level_emoji} {record.msg}"
-            
-            # Apply color based on log level
-            if record.levelno >= logging.ERROR:
-                color = self.bold_red
-            elif record.levelno >= logging.WARNING:
-                color = self.yellow
-            elif record.levelno >= logging.INFO:
-                color = self.reset
-            else:  # DEBUG
-                color = self.grey
-                
-            # Create the format string with color
-            log_format = f"{color}%(asctime)s - %(name)s - %(levelname)s - %(message)s{self.reset}"
-            formatter = logging.Formatter(log_format, datefmt='%Y-%m-%d %H:%M:%S')
-            return formatter.format(record)
-
-    # Console handler with color formatting
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(log_level)
-    console_handler.setFormatter(CustomFormatter())
-    
-    # File handler for all logs with rotation (10MB per file, keep 5 backups)
-    log_file = os.path.join(log_dir, 'app.log')
-    file_handler = RotatingFileHandler(
-        log_file, 
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5,
-        encoding='utf-8'
-    )
-    file_handler.setLevel(logging.DEBUG)
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    file_handler.setFormatter(file_formatter)
-    
-    # Error file handler for errors only
-    error_file_handler = RotatingFileHandler(
-        os.path.join(log_dir, 'error.log'),
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5,
-        encoding='utf-8'
-    )
-    error_file_handler.setLevel(logging.ERROR)
-    error_file_handler.setFormatter(file_formatter)
-    
-    # Add handlers
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
-    logger.addHandler(error_file_handler)
-    
-    # Prevent duplicate logs in case of multiple calls
+
+    logger.addHandler(_get_pipeline().handler)
+    # Prevent duplicate logs through the root logger
     logger.propagate = False
-    
-    logger.info("Logging configured successfully")
     return logger
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware that binds a correlation ID to each request.
+
+    A well-formed `X-Request-ID` from the client (or a proxy) is reused,
+    otherwise a new one is generated; it is echoed in the response headers
+    and attached to every log record written while handling the request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope.get("headers", []):
+            if key == REQUEST_ID_HEADER.encode():
+                candidate = value.decode("latin-1")
+                if _REQUEST_ID_RE.match(candidate):
+                    request_id = candidate
+                break
+        request_id = request_id or new_request_id()
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER.encode(), request_id.encode("latin-1"))
+                ])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
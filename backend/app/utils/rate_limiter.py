@@ -1,76 +1,266 @@
+import asyncio
+import math
+import os
+import sqlite3
+import tempfile
+import threading
 import time
-from typing import Dict, Tuple, Optional, Callable, Any
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 from fastapi import HTTPException, Request
 
+RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
+RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "3600"))  # 1 hour
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory | sqlite
+RATE_LIMIT_SQLITE_PATH = os.getenv(
+    "RATE_LIMIT_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "tailorhire-ratelimit.sqlite3")
+)
+
+# (allowed, retry_after seconds, remaining requests)
+Decision = Tuple[bool, float, int]
+
+
+def _gcra(stored_tat: Optional[float], now: float, emission_interval: float, window: float) -> Tuple[Decision, Optional[float]]:
+    """
+    Generic Cell Rate Algorithm step.
+
+    Each key keeps a single theoretical arrival time (TAT). A request is
+    allowed while the TAT it would push forward stays within one window of
+    now, which permits a burst of `requests` and then refills one request
+    every `emission_interval` seconds, with no 2x burst at window edges.
+    Returns the decision and the new TAT to store (None when denied).
+    """
+    tat = max(stored_tat or now, now)
+    new_tat = tat + emission_interval
+    allow_at = new_tat - window
+    if now < allow_at:
+        return (False, allow_at - now, 0), None
+    remaining = int((now + window - new_tat) // emission_interval)
+    return (True, 0.0, remaining), new_tat
+
+
+class RateLimitBackend(ABC):
+    """Stores one GCRA theoretical arrival time per key and applies updates atomically."""
+
+    name = "base"
+
+    @abstractmethod
+    async def acquire(self, key: str, emission_interval: float, window: float) -> Decision:
+        """Apply one request for key and return the decision."""
+
+    @abstractmethod
+    def size(self) -> int:
+        """Number of keys currently tracked."""
+
+
+class InMemoryBackend(RateLimitBackend):
+    """
+    Per-process backend. Keys are kept in least-recently-used order, so
+    expired keys usually collect at the front and each call evicts at most
+    a couple of them. Scopes with different windows share the dict, so a
+    long-lived entry at the front can hide expired keys behind it; a full
+    sweep every `sweep_every` calls removes those. Amortized O(1) per call.
+    """
+
+    name = "memory"
+    EVICTIONS_PER_CALL = 2
+
+    def __init__(self, sweep_every: int = 1000):
+        self.sweep_every = sweep_every
+        self._calls = 0
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+
+    async def acquire(self, key: str, emission_interval: float, window: float) -> Decision:
+        now = time.time()
+        self._calls += 1
+        if self._calls % self.sweep_every == 0:
+            self._sweep(now)
+        else:
+            self._evict_expired(now)
+        decision, new_tat = _gcra(self._tats.get(key), now, emission_interval, window)
+        if new_tat is not None:
+            self._tats[key] = new_tat
+            self._tats.move_to_end(key)
+        return decision
+
+    def size(self) -> int:
+        return len(self._tats)
+
+    def _evict_expired(self, now: float) -> None:
+        for _ in range(self.EVICTIONS_PER_CALL):
+            if not self._tats:
+                return
+            key, tat = next(iter(self._tats.items()))
+            if tat > now:
+                return
+            del self._tats[key]
+
+    def _sweep(self, now: float) -> None:
+        for key in [key for key, tat in self._tats.items() if tat <= now]:
+            del self._tats[key]
+
+
+class SQLiteBackend(RateLimitBackend):
+    """
+    Backend shared by every worker process on the host through a local
+    SQLite file. Each update runs in a BEGIN IMMEDIATE transaction, so
+    concurrent workers draw from one budget. Expired rows are purged
+    every `purge_every` calls using the TAT index.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = RATE_LIMIT_SQLITE_PATH, purge_every: int = 1000):
+        self.path = path
+        self.purge_every = purge_every
+        self._calls = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS rate_limits_tat ON rate_limits (tat)")
+
+    async def acquire(self, key: str, emission_interval: float, window: float) -> Decision:
+        return await asyncio.to_thread(self._acquire, key, emission_interval, window)
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+    def _acquire(self, key: str, emission_interval: float, window: float) -> Decision:
+        with self._lock:
+            now = time.time()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+                decision, new_tat = _gcra(row[0] if row else None, now, emission_interval, window)
+                if new_tat is not None:
+                    self._conn.execute(
+                        "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                        (key, new_tat),
+                    )
+                self._calls += 1
+                if self._calls % self.purge_every == 0:
+                    self._conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return decision
+
+
+_backend: Optional[RateLimitBackend] = None
+
+
+def get_backend() -> RateLimitBackend:
+    """Return the process-wide backend selected by RATE_LIMIT_BACKEND."""
+    global _backend
+    if _backend is None:
+        if RATE_LIMIT_BACKEND == "sqlite":
+            _backend = SQLiteBackend()
+        elif RATE_LIMIT_BACKEND == "memory":
+            _backend = InMemoryBackend()
+        else:
+            raise ValueError(f"Unsupported RATE_LIMIT_BACKEND: {RATE_LIMIT_BACKEND}")
+    return _backend
+
+
 class RateLimiter:
     """
-    Rate limiting middleware for FastAPI applications.
-    Tracks the number of requests from each IP address within a time window.
+    Rate limiting dependency for FastAPI routes.
+
+    Allows `requests` per `window` seconds per client IP and route scope
+    using GCRA (token-bucket equivalent) semantics, backed by a pluggable
+    store so every uvicorn worker can share one budget.
     """
-    
-    def __init__(self, requests: int = 100, window: int = 60):
+
+    def __init__(
+        self,
+        requests: int = RATE_LIMIT_REQUESTS,
+        window: int = RATE_LIMIT_WINDOW,
+        scope: str = "default",
+        backend: Optional[RateLimitBackend] = None,
+    ):
         """
         Initialize the rate limiter.
-        
+
         Args:
             requests: Number of requests allowed per window
             window: Time window in seconds
+            scope: Name that separates this route's budget from others
+            backend: Store for limiter state (defaults to RATE_LIMIT_BACKEND)
         """
-        self.requests = requests
+        self.requests = max(requests, 1)
         self.window = window
-        self.access_records: Dict[str, Tuple[float, int]] = {}
+        self.scope = scope
+        self.emission_interval = window / self.requests
+        self._backend = backend
+
+    @property
+    def backend(self) -> RateLimitBackend:
+        if self._backend is None:
+            self._backend = get_backend()
+        return self._backend
 
     async def __call__(self, request: Request):
         """
         Check if the current request is within rate limits.
-        
+
         Args:
             request: The incoming request
-            
+
         Returns:
             str: Client IP if within rate limit
-            
+
         Raises:
             HTTPException: 429 if rate limit is exceeded
         """
-        client_ip = request.client.host
-        current_time = time.time()
-        
-        # Clean up old records
-        self._cleanup_old_records(current_time)
-        
-        # Get or create record for this IP
-        last_time, count = self.access_records.get(client_ip, (current_time, 0))
-        
-        # Check if within rate limit
-        if current_time - last_time < self.window:
-            if count >= self.requests:
-                retry_after = int(self.window - (current_time - last_time))
-                raise HTTPException(
-                    status_code=429,
-                    detail={
-                        "error": "Too many requests",
-                        "retry_after": retry_after,
-                        "limit": self.requests,
-                        "window": self.window
-                    },
-                    headers={"Retry-After": str(retry_after)}
-                )
-            self.access_records[client_ip] = (last_time, count + 1)
-        else:
-            self.access_records[client_ip] = (current_time, 1)
-            
+        client_ip = request.client.host if request.client else "unknown"
+        allowed, retry_after, remaining = await self.backend.acquire(
+            f"{self.scope}:{client_ip}", self.emission_interval, self.window
+        )
+
+        if not allowed:
+            retry_after = max(math.ceil(retry_after), 1)
+            raise HTTPException(
+                status_code=429,
+                detail={
+                    "error": "Too many requests",
+                    "retry_after": retry_after,
+                    "limit": self.requests,
+                    "window": self.window
+                },
+                headers={
+                    "Retry-After": str(retry_after),
+                    "X-RateLimit-Limit": str(self.requests),
+                    "X-RateLimit-Remaining": "0",
+                },
+            )
+
         return client_ip
-    
-    def _cleanup_old_records(self, current_time: float):
-        """Remove records older than the time window"""
-        expired_ips = [
-            ip for ip, (timestamp, _) in self.access_records.items()
-            if current_time - timestamp > self.window
-        ]
-        for ip in expired_ips:
-            self.access_records.pop(ip, None)
+
+    def describe(self) -> Dict[str, object]:
+        return {"scope": self.scope, "requests": self.requests, "window": self.window, "backend": self.backend.name}
+
+
+def route_limit(scope: str, requests: int = RATE_LIMIT_REQUESTS, window: int = RATE_LIMIT_WINDOW) -> RateLimiter:
+    """
+    Build a limiter with its own budget for one route group.
+
+    RATE_LIMIT_<SCOPE>_REQUESTS and RATE_LIMIT_<SCOPE>_WINDOW override the
+    given defaults, e.g. RATE_LIMIT_OPTIMIZE_REQUESTS=20.
+    """
+    prefix = f"RATE_LIMIT_{scope.upper()}"
+    return RateLimiter(
+        requests=int(os.getenv(f"{prefix}_REQUESTS", str(requests))),
+        window=int(os.getenv(f"{prefix}_WINDOW", str(window))),
+        scope=scope,
+    )
+
 
 # Create a default rate limiter instance
-rate_limiter = RateLimiter(requests=100, window=60)  # 100 requests per minute
+rate_limiter = RateLimiter()
 rate_limit = rate_limiter  # Alias for backward compatibility
@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one in-flight task.
+
+    The first caller for a key starts the work; callers that arrive while it
+    is running await the same task instead of starting their own. Every
+    waiter awaits through asyncio.shield, so a cancelled waiter (a client
+    that disconnected or retried) never cancels the shared work. Work whose
+    waiters have all gone away still runs to completion, so its result
+    lands in the cache for the retry that usually follows.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def running(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        return await asyncio.shield(self.join(key, factory))
+
+    def join(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> "asyncio.Future[T]":
+        """
+        Return the in-flight task for key, starting it with factory if there
+        is none. Callers must await it through asyncio.shield.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        return task
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the outcome as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"in_flight": len(self._calls), "started": self.started, "coalesced": self.coalesced}
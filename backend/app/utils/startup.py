@@ -0,0 +1,82 @@
+# Process startup helpers
+import asyncio
+import importlib
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.utils.logger import setup_logger
+
+logger = setup_logger('startup')
+
+# Imported before gunicorn forks so every worker shares the loaded pages copy-on-write
+HEAVY_MODULES = (
+    "google.generativeai",
+    "weasyprint",
+    "fitz",
+    "docx",
+    "jinja2",
+)
+
+
+def preload_heavy_modules() -> None:
+    for module in HEAVY_MODULES:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(module)
+            logger.info(f"📦 Preloaded {module} in {time.perf_counter() - start:.2f}s")
+        except ImportError as e:
+            logger.warning(f"⚠️ Could not preload {module}: {e}")
+
+
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "120"))
+
+# (name, step, required): a failed required step keeps the process unready
+WarmUpStep = Tuple[str, Callable[[], Awaitable[None]], bool]
+
+
+class WarmUp:
+    """
+    Runs the warm-up steps once, concurrently, in the background and
+    reports readiness. Optional steps (e.g. priming a remote client) may
+    fail without keeping the process out of rotation.
+    """
+
+    def __init__(self, timeout: float = WARMUP_TIMEOUT):
+        self.timeout = timeout
+        self.ready = False
+        self.finished = False
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, steps: List[WarmUpStep]) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(steps))
+
+    def cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def _run(self, steps: List[WarmUpStep]) -> None:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self._run_step(name, step) for name, step, _ in steps))
+        self.ready = all(ok or not required for ok, (_, _, required) in zip(results, steps))
+        self.finished = True
+        if self.ready:
+            logger.info(f"🔥 Warm-up finished in {time.perf_counter() - start:.2f}s, ready for traffic")
+        else:
+            logger.error("❌ Warm-up failed, staying unready")
+
+    async def _run_step(self, name: str, step: Callable[[], Awaitable[None]]) -> bool:
+        self.steps[name] = {"status": "running"}
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(step(), timeout=self.timeout)
+            self.steps[name] = {"status": "ok", "seconds": round(time.perf_counter() - start, 3)}
+            return True
+        except Exception as e:
+            self.steps[name] = {"status": "failed", "seconds": round(time.perf_counter() - start, 3), "error": str(e) or type(e).__name__}
+            logger.warning(f"⚠️ Warm-up step {name} failed: {e}")
+            return False
+
+    def status(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "warm_up_finished": self.finished, "steps": self.steps}
@@ -0,0 +1,172 @@
+# Prompt input compaction: strip extraction noise and boilerplate, enforce token budgets
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import List, Set
+from app.utils.logger import setup_logger
+
+logger = setup_logger('text_compaction')
+
+PROMPT_COMPACTION = os.getenv("PROMPT_COMPACTION", "true").lower() == "true"
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "6000"))
+JOB_DESCRIPTION_TOKEN_BUDGET = int(os.getenv("JOB_DESCRIPTION_TOKEN_BUDGET", "2500"))
+
+# Extracted PDF text separates pages with a form feed
+PAGE_BREAK = "\f"
+# A short line among the first or last PAGE_EDGE_LINES lines of this many
+# pages is a running header or footer. Lines elsewhere are never dropped for
+# repeating: job titles and locations legitimately recur.
+PAGE_EDGE_LINES = 2
+REPEATED_LINE_MIN_COUNT = 2
+REPEATED_LINE_MAX_LENGTH = 80
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_INLINE_SPACE_RE = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+_HYPHEN_BREAK_RE = re.compile(r"(\w)-\n(\w)")
+_PAGE_ARTIFACT_RES = (
+    re.compile(r"^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$", re.IGNORECASE),
+    re.compile(r"^-\s*\d+\s*-$"),
+    re.compile(r"^(curriculum vitae|resume|résumé)\s*(\(cont(inued|\.)?\))?$", re.IGNORECASE),
+    re.compile(r"^\W+$"),
+)
+
+# Job description sections that never change what the resume should say
+_BOILERPLATE_HEADING_RE = re.compile(
+    r"^(about (us|the company|our company)|who we are|our (story|mission|values|culture)|"
+    r"benefits|perks|what we offer|why join us|why work (here|with us)|compensation|salary|pay range|"
+    r"equal (employment )?opportunity|eeo|diversity|accommodations?|privacy|how to apply|"
+    r"application process|disclaimer)\b",
+    re.IGNORECASE,
+)
+_BOILERPLATE_SENTENCE_RE = re.compile(
+    r"(equal opportunity employer|without regard to (race|age|gender)|reasonable accommodation|"
+    r"e-verify|protected veteran|applicants with disabilities|pay transparency|"
+    r"we do not accept unsolicited|recruitment agencies)",
+    re.IGNORECASE,
+)
+# Headings that start the parts of a posting worth keeping
+_CONTENT_HEADING_RE = re.compile(
+    r"^(about (the|this) (role|position|job)|about you|the role|role|overview|summary|job description|"
+    r"(key )?responsibilities|what you('ll| will) do|duties|requirements|qualifications|"
+    r"(minimum|basic|preferred) qualifications|what you('ll| will) (need|bring)|who you are|skills|"
+    r"experience|nice to have|bonus points|tech stack|technologies)\b",
+    re.IGNORECASE,
+)
+_HEADING_MAX_LENGTH = 60
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate: words cost one token per ~4 characters, punctuation one each."""
+    return sum(max(1, (len(piece) + 3) // 4) for piece in _TOKEN_RE.findall(text or ""))
+
+
+def normalize_lines(text: str) -> List[str]:
+    """
+    NFKC-normalize, re-join hyphenated line breaks and collapse whitespace
+    within each line. Page breaks are kept as PAGE_BREAK lines.
+    """
+    text = unicodedata.normalize("NFKC", text or "").replace("\r\n", "\n").replace("\r", "\n")
+    text = _HYPHEN_BREAK_RE.sub(r"\1\2", text).replace(PAGE_BREAK, f"\n{PAGE_BREAK}\n")
+    return [line if line == PAGE_BREAK else _INLINE_SPACE_RE.sub(" ", line).strip() for line in text.split("\n")]
+
+
+def page_edge_indexes(lines: List[str], edge: int = PAGE_EDGE_LINES) -> Set[int]:
+    """Indexes of the first and last `edge` non-blank lines of each page; empty for a single page."""
+    pages: List[List[int]] = [[]]
+    for index, line in enumerate(lines):
+        if line == PAGE_BREAK:
+            pages.append([])
+        elif line:
+            pages[-1].append(index)
+    if len(pages) < 2:
+        return set()
+    return {index for page in pages for index in page[:edge] + page[-edge:]}
+
+
+def drop_noise_lines(lines: List[str]) -> List[str]:
+    """Remove page artifacts, running headers/footers, duplicate lines and extra blank lines."""
+    edges = page_edge_indexes(lines)
+    counts = Counter(lines[index].lower() for index in edges)
+    seen = set()
+    kept: List[str] = []
+    for index, line in enumerate(lines):
+        if not line or line == PAGE_BREAK:
+            if kept and kept[-1]:
+                kept.append("")
+            continue
+        key = line.lower()
+        if any(pattern.match(line) for pattern in _PAGE_ARTIFACT_RES):
+            continue
+        if key in seen and (
+            (kept and kept[-1].lower() == key)
+            or (index in edges and counts[key] >= REPEATED_LINE_MIN_COUNT and len(line) <= REPEATED_LINE_MAX_LENGTH)
+        ):
+            continue
+        seen.add(key)
+        kept.append(line)
+    while kept and not kept[-1]:
+        kept.pop()
+    return kept
+
+
+def _is_heading(line: str) -> bool:
+    if not line or len(line) > _HEADING_MAX_LENGTH or line.startswith(("-", "•", "*")):
+        return False
+    return line.endswith(":") or line.isupper() or bool(_CONTENT_HEADING_RE.match(line))
+
+
+def trim_boilerplate(lines: List[str]) -> List[str]:
+    """Drop boilerplate sections (benefits, EEO, about us, ...) and stray boilerplate sentences."""
+    kept: List[str] = []
+    skipping = False
+    for line in lines:
+        if _is_heading(line):
+            heading = line.rstrip(":").strip()
+            if _BOILERPLATE_HEADING_RE.match(heading):
+                skipping = True
+                continue
+            skipping = False
+        if skipping or _BOILERPLATE_SENTENCE_RE.search(line):
+            continue
+        kept.append(line)
+    return kept
+
+
+def enforce_budget(lines: List[str], max_tokens: int) -> List[str]:
+    """Keep whole lines from the top until the token budget is spent."""
+    kept: List[str] = []
+    used = 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+def compact_resume_text(text: str, max_tokens: int = RESUME_TOKEN_BUDGET) -> str:
+    """Compact raw (usually PDF-extracted) resume text for a prompt."""
+    return _compact(text, "resume", max_tokens, trim_sections=False)
+
+
+def compact_job_description(text: str, max_tokens: int = JOB_DESCRIPTION_TOKEN_BUDGET) -> str:
+    """Compact a job description for a prompt, trimming hiring boilerplate."""
+    return _compact(text, "job description", max_tokens, trim_sections=True)
+
+
+def _compact(text: str, label: str, max_tokens: int, trim_sections: bool) -> str:
+    if not PROMPT_COMPACTION:
+        return text
+    before = estimate_tokens(text)
+    lines = drop_noise_lines(normalize_lines(text))
+    if trim_sections:
+        lines = trim_boilerplate(lines)
+    fitted = enforce_budget(lines, max_tokens)
+    if len(fitted) < len(lines):
+        logger.warning(f"⚠️ {label.capitalize()} exceeds the {max_tokens}-token budget, truncated to {len(fitted)}/{len(lines)} lines")
+    compacted = "\n".join(fitted)
+    after = estimate_tokens(compacted)
+    logger.info(f"✂️ Compacted {label}: ~{before} -> ~{after} tokens ({(1 - after / before) * 100 if before else 0:.0f}% saved)")
+    return compacted
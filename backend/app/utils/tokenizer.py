@@ -0,0 +1,58 @@
+# Tokenization for local text scoring: normalization, stopwords and light stemming
+import re
+import unicodedata
+from functools import lru_cache
+from typing import List
+
+# Words with their "++" / "#" suffix kept, so C++ and C# survive tokenization
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:\+\+|#)?")
+# ".NET" would otherwise lose its dot and become the word "net"
+_DOTNET_RE = re.compile(r"(?<![\w.])\.net\b")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each either etc few for from further had
+has have having he her here hers him his how i if in into is it its itself just may me might more most
+must my no nor not now of off on once only or other our ours out over own per same she should so some
+such than that the their theirs them then there these they this those through to too under until up
+upon us very via was we were what when where which while who whom why will with within without would
+you your yours
+""".split())
+
+
+def normalize(text: str) -> str:
+    """Lowercase, fold accents and compatibility characters (résumé -> resume, ﬁ -> fi)."""
+    text = text or ""
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(char for char in text if not unicodedata.combining(char))
+    return _DOTNET_RE.sub("dotnet", text.lower())
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(normalize(text))
+
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    """
+    Strip plural endings only (apis -> api, libraries -> library).
+
+    Heavier stemmers conflate technical terms; plurals are where resumes
+    and postings most often disagree.
+    """
+    if len(token) <= 3 or not token.isalpha():
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith("sses"):
+        return token[:-2]
+    # "analysis" and "redis" keep their s; four-letter acronyms (apis, kpis) do not
+    if token.endswith("s") and not token.endswith(("ss", "us")) and (len(token) == 4 or not token.endswith("is")):
+        return token[:-1]
+    return token
+
+
+def terms(text: str) -> List[str]:
+    """Normalized, stemmed tokens in document order; stopwords are kept so phrases stay contiguous."""
+    return [stem(token) for token in tokenize(text)]
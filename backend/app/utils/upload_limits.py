@@ -0,0 +1,75 @@
+# Request body limits for upload endpoints
+import json
+import os
+from typing import Iterable
+from fastapi import HTTPException
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))  # 10MB
+# Allowance for multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(HTTPException):
+    def __init__(self, max_bytes: int = UPLOAD_MAX_BYTES):
+        super().__init__(status_code=413, detail=f"File too large (max {max_bytes // (1024 * 1024)}MB)")
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware that bounds request bodies on upload routes.
+
+    Requests whose Content-Length already exceeds the limit are rejected
+    with 413 before a single body byte is read. Bodies without a length
+    (chunked) are counted as they arrive, and reading stops with 413 as
+    soon as the running total crosses the limit.
+    """
+
+    def __init__(self, app, path_prefixes: Iterable[str] = ("/api/upload",), max_bytes: int = UPLOAD_MAX_BYTES):
+        self.app = app
+        self.path_prefixes = tuple(path_prefixes)
+        self.max_body_bytes = max_bytes + MULTIPART_OVERHEAD_BYTES
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    declared = 0
+                if declared > self.max_body_bytes:
+                    await self._reject(send)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    # Surfaces through FastAPI's body parsing as a 413 response
+                    raise UploadTooLargeError(self.max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    async def _reject(self, send) -> None:
+        error = UploadTooLargeError(self.max_bytes)
+        body = json.dumps({"detail": error.detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
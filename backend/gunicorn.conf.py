@@ -0,0 +1,39 @@
+# Gunicorn configuration for multi-worker production serving
+#
+#   gunicorn -c gunicorn.conf.py main:app
+#
+# The app and its heavy imports are loaded once in the master process and
+# shared copy-on-write by every forked uvicorn worker. Render and
+# extraction pools are created per worker after the fork. State that
+# must be global (rate-limit budgets, result cache, PDF artifacts) lives in
+# local shared stores so all workers on the host see the same data.
+import multiprocessing
+import os
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", str(cpu_count)))
+preload_app = True
+
+# The app's shutdown handler drains in-flight optimizations and jobs for
+# SHUTDOWN_DRAIN_TIMEOUT seconds (optimize calls may wait up to 300s on the
+# model); gunicorn only allows that drain a margin before killing the worker
+drain_timeout = int(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "320"))
+os.environ["SHUTDOWN_DRAIN_TIMEOUT"] = str(drain_timeout)
+graceful_timeout = drain_timeout + 10
+timeout = int(os.getenv("WORKER_TIMEOUT", "360"))
+keepalive = 5
+
+# Split the CPU-bound pools across web workers instead of multiplying them
+os.environ.setdefault("PDF_RENDER_WORKERS", str(max(cpu_count // workers, 1)))
+os.environ.setdefault("EXTRACT_WORKERS", str(max(cpu_count // workers, 1)))
+# GEMINI_HOST_CONCURRENCY is the model-call budget for the whole host
+os.environ.setdefault(
+    "GEMINI_MAX_CONCURRENCY", str(max(int(os.getenv("GEMINI_HOST_CONCURRENCY", "8")) // workers, 1))
+)
+
+# Shared local stores
+os.environ.setdefault("RATE_LIMIT_BACKEND", "sqlite")
+os.environ.setdefault("RESULT_CACHE_DIR", "/tmp/tailorhire-cache")
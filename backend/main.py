@@ -2,37 +2,98 @@
 # FastAPI + Python backend for resume optimization
 
 import os
-import logging
+import asyncio
 import base64
+import hmac
 import json
 import time
 from datetime import datetime
 from dotenv import load_dotenv
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set, Tuple
 
-from fastapi import FastAPI, HTTPException, Depends, Request, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, Response, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 
+from app.services.admission_control import LANE_BACKGROUND
 from app.services.ai_service import AIService
-from app.utils.rate_limiter import rate_limit
+from app.utils.rate_limiter import route_limit
 from app.services.pdf_service import PDFService
+from app.services.file_service import FileService
+from app.services.render_executor import RenderExecutor
+from app.services.render_pipeline import DEFAULT_TEMPLATE, available_templates
+from app.services.render_service import RenderService
+from app.services.scoring_service import MatchScorer
+from app.services.thumbnail_service import THUMBNAIL_DPI, THUMBNAIL_FORMAT, THUMBNAIL_MAX_DPI, THUMBNAIL_MEDIA_TYPES, THUMBNAIL_MIN_DPI, ThumbnailService
+from app.services.cache_service import ResultCache
+from app.services.artifact_service import ArtifactStore, is_valid_artifact_id
+from app.services.job_service import JobService
+from app.services.job_store import JOB_FAILED, JOB_SUCCEEDED, JobStore
+from app.services.idempotency_service import IDEMPOTENCY_KEY_MAX_LENGTH, IdempotencyKeyConflictError, IdempotencyStore
+from app.services.optimization_service import BATCH_MAX_CONCURRENCY, BATCH_MAX_JOBS, OptimizationService
+from app.services.posting_index import PostingIndex
+from app.services.posting_store import POSTING_ID_MAX_LENGTH, PostingStore
+from app.services.ranking_service import POSTING_BATCH_MAX, POSTING_RANK_MAX_K, RankingService
+from app.utils.compression import CompressionMiddleware
+from app.utils.errors import ServiceBusyError
+from app.utils.field_selection import field_selection
+from app.utils.http_ranges import artifact_response
+from app.utils.inflight import InFlightTracker
+from app.utils.logger import RequestIdMiddleware, dropped_records, setup_logger
+from app.utils.metrics import REGISTRY, MetricsMiddleware, stage_timer
+from app.utils.startup import WarmUp, preload_heavy_modules
+from app.utils.upload_limits import UploadSizeLimitMiddleware
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger("main")
+logger = setup_logger("main")
 
 # Load environment variables
 load_dotenv()
 
-# Rate limiting configuration
-RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
-RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "3600"))  # 1 hour
+# Under gunicorn's preload_app this runs once in the master before any service is
+# built, so every forked worker shares the heavy modules copy-on-write
+preload_heavy_modules()
+
+# Rate limiting: the default budget comes from RATE_LIMIT_REQUESTS / RATE_LIMIT_WINDOW,
+# model-backed and upload routes get their own overridable budgets
+optimize_rate_limit = route_limit("optimize")
+upload_rate_limit = route_limit("upload")
+# Re-renders skip the model; previews skip layout too and follow live edits
+render_rate_limit = route_limit("render", requests=300)
+preview_rate_limit = route_limit("preview", requests=3000)
+score_rate_limit = route_limit("score", requests=3000)
+# Ranking reads the in-memory posting index; corpus writes get the default budget
+rank_rate_limit = route_limit("rank", requests=600)
+postings_rate_limit = route_limit("postings")
+# Job polling, job event streams and the stats endpoints are cheap reads but still bounded
+status_rate_limit = route_limit("status", requests=3000)
+
+# Operational endpoints (/metrics and the stats routes) require this bearer token when set
+OPS_TOKEN = os.getenv("OPS_TOKEN", "")
 
 # Initialize services
 ai_service = AIService()
-pdf_service = PDFService()
+render_executor = RenderExecutor()
+pdf_service = PDFService(render_executor)
+file_service = FileService()
+result_cache = ResultCache()
+parse_cache = ResultCache(namespace="parse")
+artifact_store = ArtifactStore()
+idempotency_store = IdempotencyStore()
+match_scorer = MatchScorer()
+optimization_service = OptimizationService(
+    ai_service, pdf_service, result_cache, artifact_store, parse_cache, idempotency_store, match_scorer
+)
+inflight = InFlightTracker()
+warm_up = WarmUp()
+job_service = JobService(JobStore(), optimization_service, artifact_store)
+render_service = RenderService(pdf_service, artifact_store)
+thumbnail_service = ThumbnailService(artifact_store)
+posting_store = PostingStore()
+ranking_service = RankingService(posting_store, PostingIndex(posting_store, match_scorer))
+
+# How long shutdown waits for in-flight optimizations before stopping the pools
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "30"))
 
 # FastAPI app
 app = FastAPI(
@@ -40,9 +101,13 @@ app = FastAPI(
     description="AI-powered resume optimization service",
     version="1.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
 )
 
+# Reject oversized uploads before their bodies are read
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # CORS
 origins = os.getenv("ALLOWED_ORIGINS", "*").split(",")
 app.add_middleware(
@@ -51,8 +116,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Cache", "ETag", "Content-Range", "Accept-Ranges", "Location", "Content-Location", "Server-Timing", "X-Request-ID"],
 )
 
+# Compresses complete JSON/text responses; streamed responses pass through
+app.add_middleware(CompressionMiddleware)
+
+# Outermost, so request durations, Server-Timing and request IDs cover every other middleware
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
+
+@app.exception_handler(ServiceBusyError)
+async def service_busy_handler(request: Request, exc: ServiceBusyError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(IdempotencyKeyConflictError)
+async def idempotency_conflict_handler(request: Request, exc: IdempotencyKeyConflictError):
+    return JSONResponse(status_code=422, content={"detail": str(exc)})
+
 # ----------------------
 # Pydantic Models
 # ----------------------
@@ -60,21 +145,185 @@ class ResumeOptimizeRequest(BaseModel):
     resume_text: str
     job_description: str
     user_id: Optional[str] = None
+    template: str = Field(DEFAULT_TEMPLATE, description="Name of the resume template, see GET /api/templates.")
+
+class MatchScoreRequest(BaseModel):
+    resume_text: str
+    job_description: str
+
+class RenderRequest(BaseModel):
+    optimized_resume_data: Dict[str, Any] = Field(..., description="Structured resume JSON, e.g. an edited optimized_resume_json.")
+    template: str = Field(DEFAULT_TEMPLATE, description="Name of the resume template, see GET /api/templates.")
+
+class BatchOptimizeRequest(BaseModel):
+    resume_text: str
+    job_descriptions: List[str] = Field(..., min_length=1, description=f"Up to {BATCH_MAX_JOBS} job descriptions.")
+    user_id: Optional[str] = None
+    template: str = Field(DEFAULT_TEMPLATE, description="Name of the resume template, see GET /api/templates.")
+    concurrency: Optional[int] = Field(None, ge=1, description=f"Fan-out limit, capped at {BATCH_MAX_CONCURRENCY}.")
+
+class ResumeParseRequest(BaseModel):
+    resume_text: str
+
+class ResumeParseResponse(BaseModel):
+    structured_resume: Dict[str, Any]
+    cached: bool
+    processing_time: float
+
+class TemplatesResponse(BaseModel):
+    templates: List[str]
+    default: str
 
 class ResumeOptimizeResponse(BaseModel):
-    optimized_resume_pdf_base64: str = Field(..., description="Base64 encoded string of the optimized PDF resume.")
+    pdf_artifact_id: str = Field(..., description="Content hash identifying the rendered PDF artifact.")
+    pdf_url: str = Field(..., description="URL of the rendered PDF, served by GET /api/artifacts/{id}.pdf.")
+    optimized_resume_pdf_base64: Optional[str] = Field(None, description="Base64 encoded PDF, only present when include_pdf_base64=true.")
     original_resume_text: str
     optimized_resume_json: Dict[str, Any]
     match_score: int
+    local_match_score: Optional[int] = Field(None, description="Local keyword match of the optimized resume, see POST /api/score.")
+    local_match: Optional[Dict[str, Any]] = Field(None, description="Matched and missing skills and keywords behind local_match_score.")
     key_changes: List[str]
     suggestions: List[str] = []
     processing_time: float
 
+class MatchScoreResponse(BaseModel):
+    score: int = Field(..., description="0-100 keyword match of the resume against the job description.")
+    skill_score: Optional[int] = Field(None, description="Match on lexicon skills only; null when the posting names none.")
+    keyword_score: Optional[int] = Field(None, description="Match on the posting's other keywords only.")
+    matched_skills: List[str]
+    missing_skills: List[str]
+    matched_keywords: List[str]
+    missing_keywords: List[str]
+    processing_time: float
+
+class JobPosting(BaseModel):
+    id: Optional[str] = Field(None, max_length=POSTING_ID_MAX_LENGTH, description="Stable posting id; derived from the content when omitted.")
+    title: Optional[str] = None
+    company: Optional[str] = None
+    location: Optional[str] = None
+    url: Optional[str] = None
+    description: str = Field(..., min_length=1)
+
+class PostingsRequest(BaseModel):
+    postings: List[JobPosting] = Field(..., min_length=1, max_length=POSTING_BATCH_MAX, description=f"Up to {POSTING_BATCH_MAX} postings, added or replaced by id.")
+
+class PostingsResponse(BaseModel):
+    changed: int = Field(..., description="Postings added or changed; identical re-submissions are not counted.")
+    postings: int = Field(..., description="Postings in the corpus.")
+
+class RankRequest(BaseModel):
+    resume_text: str
+    top_k: int = Field(10, ge=1, le=POSTING_RANK_MAX_K)
+
+class RankedPosting(BaseModel):
+    id: str
+    title: Optional[str] = None
+    company: Optional[str] = None
+    location: Optional[str] = None
+    url: Optional[str] = None
+    score: float = Field(..., description="0-100 keyword match, the /api/score formula with corpus IDF.")
+
+class RankResponse(BaseModel):
+    results: List[RankedPosting]
+    postings: int = Field(..., description="Postings searched.")
+    processing_time: float
+
+class JobResponse(BaseModel):
+    id: str
+    status: str = Field(..., description="queued, running, succeeded or failed.")
+    stage: Optional[str] = None
+    sections: int = Field(0, description="Resume sections generated so far.")
+    result: Optional[Dict[str, Any]] = Field(None, description="Optimization result with pdf_url, once succeeded.")
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: float
+    updated_at: float
+    expires_at: Optional[float] = Field(None, description="When the finished job and its PDF are discarded.")
+
 class HealthResponse(BaseModel):
     status: str
     timestamp: str
     version: str
 
+class ReadinessResponse(BaseModel):
+    ready: bool
+    draining: bool
+    warm_up_finished: bool
+    steps: Dict[str, Dict[str, Any]]
+
+# ----------------------
+# Helpers
+# ----------------------
+def wants_cache_bypass(x_cache_bypass: Optional[str], cache_control: Optional[str]) -> bool:
+    """Clients skip the result cache with `X-Cache-Bypass: 1` or `Cache-Control: no-cache`."""
+    if x_cache_bypass and x_cache_bypass.strip().lower() in ("1", "true", "yes"):
+        return True
+    return bool(cache_control and "no-cache" in cache_control.lower())
+
+def validate_optimize_request(request: ResumeOptimizeRequest) -> None:
+    if not request.resume_text.strip() or not request.job_description.strip():
+        raise HTTPException(status_code=400, detail="Resume text and job description cannot be empty.")
+    validate_template(request.template)
+
+def validate_template(template: str) -> None:
+    if template not in available_templates():
+        raise HTTPException(status_code=400, detail=f"Unknown template '{template}'. Available: {', '.join(available_templates())}")
+
+def idempotency_scope(user_ip: str, idempotency_key: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Scope an `Idempotency-Key` header to the calling client."""
+    if idempotency_key is None:
+        return None
+    idempotency_key = idempotency_key.strip()
+    if not idempotency_key or len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{IDEMPOTENCY_KEY_MAX_LENGTH} characters.")
+    return user_ip, idempotency_key
+
+def artifact_url(artifact_id: str) -> str:
+    return f"/api/artifacts/{artifact_id}.pdf"
+
+def thumbnail_url(thumbnail_id: str, image_format: str) -> str:
+    return f"/api/thumbnails/{thumbnail_id}.{image_format}"
+
+def validate_thumbnail_format(image_format: str) -> None:
+    if image_format not in THUMBNAIL_MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail="Unsupported thumbnail format")
+
+def thumbnail_dpi_query() -> Any:
+    return Query(THUMBNAIL_DPI, ge=THUMBNAIL_MIN_DPI, le=THUMBNAIL_MAX_DPI, description="Rasterization resolution.")
+
+async def artifact_thumbnails(artifact_id: str, all_pages: bool, dpi: int, image_format: str) -> Dict[str, Any]:
+    """Thumbnails of a stored PDF artifact; 404 if the PDF is unknown."""
+    if not is_valid_artifact_id(artifact_id):
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    thumbnails = await thumbnail_service.thumbnails(
+        artifact_id, lambda: artifact_store.get(artifact_id), all_pages=all_pages, dpi=dpi, image_format=image_format
+    )
+    if thumbnails is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return thumbnails
+
+async def with_pdf_fields(result: Dict[str, Any], include_pdf_base64: bool) -> Dict[str, Any]:
+    """Add the PDF URL and, for legacy clients, the inline base64 PDF to a result."""
+    payload = dict(result, pdf_url=artifact_url(result["pdf_artifact_id"]))
+    if include_pdf_base64:
+        pdf_bytes = await artifact_store.get(result["pdf_artifact_id"])
+        with stage_timer("encode"):
+            payload["optimized_resume_pdf_base64"] = base64.b64encode(pdf_bytes).decode('utf-8') if pdf_bytes else None
+    return payload
+
+async def job_payload(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the PDF URL to a finished job's result."""
+    if job.get("result"):
+        job = dict(job, result=await with_pdf_fields(job["result"], include_pdf_base64=False))
+    return job
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def format_ndjson(data: Dict[str, Any]) -> str:
+    return json.dumps(data) + "\n"
+
 # ----------------------
 # Endpoints
 # ----------------------
@@ -87,66 +336,575 @@ async def health_check():
         version="1.1.0"
     )
 
+@app.get("/ready", response_model=ReadinessResponse, responses={503: {"model": ReadinessResponse}})
+async def readiness_check():
+    """Readiness probe: 200 once warm-up has finished, 503 before that and while draining."""
+    status = dict(warm_up.status(), draining=inflight.draining)
+    status["ready"] = status["ready"] and not inflight.draining
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
 @app.post("/api/optimize", response_model=ResumeOptimizeResponse)
 async def optimize_resume(
     request: ResumeOptimizeRequest,
-    user_ip: str = Depends(rate_limit)
+    user_ip: str = Depends(optimize_rate_limit),
+    x_cache_bypass: Optional[str] = Header(None),
+    cache_control: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None),
+    include_pdf_base64: bool = False,
+    selected_fields: Set[str] = Depends(field_selection(ResumeOptimizeResponse)),
 ):
     start_time = time.time()
     logger.info("🔵 Optimizing resume with template-based generation...")
 
     try:
-        if not request.resume_text.strip() or not request.job_description.strip():
-            raise HTTPException(status_code=400, detail="Resume text and job description cannot be empty.")
-
-        # 1. Get structured analysis and optimized data from AI Service
-        analysis = await ai_service.analyze_resume(request.resume_text, request.job_description)
-        
-        optimized_data = analysis.get("optimized_resume_data")
-        if not optimized_data:
-            raise HTTPException(status_code=500, detail="AI service failed to return optimized resume data.")
-
-        # 2. Generate a new PDF using the template and the optimized data
-        pdf_bytes = await pdf_service.generate_resume_pdf(optimized_data)
-
-        # 3. Encode the PDF to base64 to send in JSON response
-        pdf_base64 = base64.b64encode(pdf_bytes).decode('utf-8')
-
-        return ResumeOptimizeResponse(
-            optimized_resume_pdf_base64=pdf_base64,
-            original_resume_text=request.resume_text,
-            optimized_resume_json=optimized_data,
-            match_score=analysis.get("overall_match_score", 0),
-            key_changes=analysis.get("key_improvement_areas", []),
-            suggestions=analysis.get("suggestions", []),
-            processing_time=time.time() - start_time
-        )
-    except HTTPException as he:
-        # Re-raise known HTTP exceptions
-        raise he
+        validate_optimize_request(request)
+        idempotency = idempotency_scope(user_ip, idempotency_key)
+
+        async with inflight.track():
+            result, cache_hit = await optimization_service.optimize(
+                request.resume_text,
+                request.job_description,
+                template_name=request.template,
+                bypass_cache=wants_cache_bypass(x_cache_bypass, cache_control),
+                idempotency=idempotency,
+            )
+        include_pdf_base64 = include_pdf_base64 and "optimized_resume_pdf_base64" in selected_fields
+        payload = await with_pdf_fields(result, include_pdf_base64)
+        local_match = result.get("local_match")
+
+        # The result was validated when it was produced, so it is serialized
+        # straight through orjson instead of being re-validated by the response model
+        content = {
+            "pdf_artifact_id": payload["pdf_artifact_id"],
+            "pdf_url": payload["pdf_url"],
+            "optimized_resume_pdf_base64": payload.get("optimized_resume_pdf_base64"),
+            "original_resume_text": request.resume_text,
+            "optimized_resume_json": result["optimized_resume_json"],
+            "match_score": result["match_score"],
+            "local_match_score": local_match["score"] if local_match else None,
+            "local_match": local_match,
+            "key_changes": result["key_changes"],
+            "suggestions": result["suggestions"],
+            "processing_time": time.time() - start_time,
+        }
+        with stage_timer("encode"):
+            return ORJSONResponse(
+                {name: value for name, value in content.items() if name in selected_fields},
+                headers={"X-Cache": "HIT" if cache_hit else "MISS"},
+            )
+    except (HTTPException, ServiceBusyError, IdempotencyKeyConflictError):
+        # Re-raise known HTTP, overload and idempotency errors
+        raise
     except Exception as e:
         logger.error(f"❌ Optimization failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to optimize resume: {str(e)}")
 
 
+@app.post("/api/optimize/stream")
+async def optimize_resume_stream(
+    request: ResumeOptimizeRequest,
+    user_ip: str = Depends(optimize_rate_limit),
+    x_cache_bypass: Optional[str] = Header(None),
+    cache_control: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None),
+    include_pdf_base64: bool = False,
+):
+    """
+    Server-Sent Events variant of /api/optimize.
+
+    Emits `section` events as each part of the optimized resume is generated,
+    a `status` event while the PDF renders, then a final `result` event with
+    the optimized resume, PDF and scores (or an `error` event).
+    """
+    validate_optimize_request(request)
+    idempotency = idempotency_scope(user_ip, idempotency_key)
+    inflight.ensure_accepting()
+
+    bypass_cache = wants_cache_bypass(x_cache_bypass, cache_control)
+    logger.info("🔵 Streaming resume optimization...")
+
+    async def event_stream():
+        start_time = time.time()
+        try:
+            async with inflight.track():
+                async for event in optimization_service.stream(
+                    request.resume_text,
+                    request.job_description,
+                    template_name=request.template,
+                    bypass_cache=bypass_cache,
+                    idempotency=idempotency,
+                ):
+                    if event["type"] == "result":
+                        # Copy so the cached entry itself is never mutated
+                        payload = await with_pdf_fields(event["result"], include_pdf_base64)
+                        payload["processing_time"] = time.time() - start_time
+                        event = dict(event, result=payload)
+                    yield format_sse(event["type"], event)
+        except ServiceBusyError as e:
+            yield format_sse("error", {"type": "error", "detail": str(e), "retry_after": e.retry_after})
+        except IdempotencyKeyConflictError as e:
+            yield format_sse("error", {"type": "error", "detail": str(e)})
+        except Exception as e:
+            logger.error(f"❌ Streaming optimization failed: {str(e)}")
+            yield format_sse("error", {"type": "error", "detail": f"Failed to optimize resume: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/optimize/batch")
+async def optimize_resume_batch(
+    request: BatchOptimizeRequest,
+    user_ip: str = Depends(optimize_rate_limit),
+    x_cache_bypass: Optional[str] = Header(None),
+    cache_control: Optional[str] = Header(None),
+):
+    """
+    Tailor one resume to many job descriptions.
+
+    Streams newline-delimited JSON: one `result` or `error` line per job
+    description, in completion order and tagged with its `index`, then a
+    final `done` line.
+    """
+    if not request.resume_text.strip():
+        raise HTTPException(status_code=400, detail="Resume text cannot be empty.")
+    if any(not jd.strip() for jd in request.job_descriptions):
+        raise HTTPException(status_code=400, detail="Job descriptions cannot be empty.")
+    if len(request.job_descriptions) > BATCH_MAX_JOBS:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {BATCH_MAX_JOBS} job descriptions.")
+    validate_template(request.template)
+    inflight.ensure_accepting()
+
+    concurrency = min(request.concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    bypass_cache = wants_cache_bypass(x_cache_bypass, cache_control)
+    logger.info(f"🔵 Batch optimizing resume against {len(request.job_descriptions)} job descriptions...")
+
+    async def result_stream():
+        start_time = time.time()
+        succeeded = failed = 0
+        async with inflight.track():
+            async for event in optimization_service.optimize_batch(
+                request.resume_text,
+                request.job_descriptions,
+                template_name=request.template,
+                concurrency=concurrency,
+                bypass_cache=bypass_cache,
+            ):
+                if event["type"] == "error":
+                    failed += 1
+                    error = event["error"]
+                    line = {"type": "error", "index": event["index"], "detail": f"Failed to optimize resume: {error}"}
+                    if isinstance(error, ServiceBusyError):
+                        line["retry_after"] = error.retry_after
+                else:
+                    succeeded += 1
+                    line = dict(event, result=await with_pdf_fields(event["result"], include_pdf_base64=False))
+                    line["result"]["processing_time"] = time.time() - start_time
+                yield format_ndjson(line)
+        yield format_ndjson({
+            "type": "done",
+            "succeeded": succeeded,
+            "failed": failed,
+            "processing_time": time.time() - start_time,
+        })
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+
+@app.post("/api/parse", response_model=ResumeParseResponse)
+async def parse_resume(
+    request: ResumeParseRequest,
+    response: Response,
+    user_ip: str = Depends(optimize_rate_limit),
+    x_cache_bypass: Optional[str] = Header(None),
+    cache_control: Optional[str] = Header(None),
+):
+    """
+    Parse resume text into the canonical structured resume JSON.
+
+    The result is cached by resume hash, so calling this right after
+    /api/upload warms the parse stage for every later /api/optimize call.
+    """
+    start_time = time.time()
+    try:
+        if not request.resume_text.strip():
+            raise HTTPException(status_code=400, detail="Resume text cannot be empty.")
+
+        async with inflight.track():
+            # Parsing ahead of time only warms the cache, so it yields to interactive work
+            structured_resume, cache_hit = await optimization_service.parse(
+                request.resume_text,
+                bypass_cache=wants_cache_bypass(x_cache_bypass, cache_control),
+                lane=LANE_BACKGROUND,
+            )
+        response.headers["X-Cache"] = "HIT" if cache_hit else "MISS"
+        return ResumeParseResponse(
+            structured_resume=structured_resume,
+            cached=cache_hit,
+            processing_time=time.time() - start_time,
+        )
+    except (HTTPException, ServiceBusyError):
+        raise
+    except Exception as e:
+        logger.error(f"❌ Resume parsing failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to parse resume: {str(e)}")
+
+
+@app.post("/api/jobs", response_model=JobResponse, status_code=202)
+async def create_job(
+    request: ResumeOptimizeRequest,
+    response: Response,
+    user_ip: str = Depends(optimize_rate_limit),
+    x_cache_bypass: Optional[str] = Header(None),
+    cache_control: Optional[str] = Header(None),
+):
+    """
+    Queue an optimization and return its job id immediately.
+
+    Poll GET /api/jobs/{id} or follow GET /api/jobs/{id}/events for
+    progress. Queued jobs are persisted and survive worker restarts.
+    """
+    validate_optimize_request(request)
+    job = await job_service.submit({
+        "resume_text": request.resume_text,
+        "job_description": request.job_description,
+        "template": request.template,
+        "bypass_cache": wants_cache_bypass(x_cache_bypass, cache_control),
+    })
+    response.headers["Location"] = f"/api/jobs/{job['id']}"
+    return JobResponse(**job)
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, user_ip: str = Depends(status_rate_limit)):
+    job = await job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return JobResponse(**await job_payload(job))
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str, user_ip: str = Depends(status_rate_limit)):
+    """
+    Server-Sent Events stream of a job's progress.
+
+    Emits a `status` event whenever the job's stage or section count
+    changes, then a final `result` or `error` event.
+    """
+    if await job_service.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+
+    async def event_stream():
+        async for job in job_service.events(job_id):
+            if job["status"] == JOB_SUCCEEDED:
+                yield format_sse("result", {"type": "result", "job": await job_payload(job)})
+            elif job["status"] == JOB_FAILED:
+                yield format_sse("error", {"type": "error", "job": job, "detail": job["error"]})
+            else:
+                yield format_sse("status", {"type": "status", "job": job})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/jobs/rank", response_model=RankResponse)
+async def rank_postings(request: RankRequest, user_ip: str = Depends(rank_rate_limit)):
+    """
+    Rank the job posting corpus against a resume, without calling the model.
+
+    Send only the best few postings on to /api/optimize or /api/optimize/batch.
+    """
+    if not request.resume_text.strip():
+        raise HTTPException(status_code=400, detail="Resume text cannot be empty.")
+    start_time = time.time()
+    ranked = await ranking_service.rank(request.resume_text, request.top_k)
+    return ORJSONResponse(dict(ranked, processing_time=time.time() - start_time))
+
+
+@app.post("/api/jobs/postings", response_model=PostingsResponse)
+async def add_postings(request: PostingsRequest, user_ip: str = Depends(postings_rate_limit)):
+    """Add or replace job postings in the ranking corpus; they are searchable immediately."""
+    changed = await ranking_service.add([posting.model_dump() for posting in request.postings])
+    return PostingsResponse(changed=changed, postings=ranking_service.stats()["postings"])
+
+
+@app.delete("/api/jobs/postings/{posting_id}", status_code=204)
+async def remove_posting(posting_id: str, user_ip: str = Depends(postings_rate_limit)):
+    if not await ranking_service.remove(posting_id):
+        raise HTTPException(status_code=404, detail="Posting not found.")
+    return Response(status_code=204)
+
+
+@app.post("/api/render", response_class=Response, responses={200: {"content": {"application/pdf": {}}}})
+async def render_resume(
+    request: RenderRequest,
+    http_request: Request,
+    user_ip: str = Depends(render_rate_limit),
+    x_cache_bypass: Optional[str] = Header(None),
+    cache_control: Optional[str] = Header(None),
+):
+    """
+    Render edited resume JSON to a PDF without calling the model.
+
+    The PDF comes from a render cache keyed by a hash of the data and
+    template; Content-Location gives its permanent artifact URL.
+    """
+    validate_template(request.template)
+    try:
+        async with inflight.track():
+            artifact_id, cached = await render_service.render(
+                request.optimized_resume_data,
+                request.template,
+                bypass_cache=wants_cache_bypass(x_cache_bypass, cache_control),
+            )
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid resume data: {e}")
+    except ServiceBusyError:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Render failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to render resume: {str(e)}")
+
+    response = await artifact_response(artifact_store, artifact_id, http_request, filename="optimized-resume.pdf")
+    response.headers["X-Cache"] = "HIT" if cached else "MISS"
+    response.headers["Content-Location"] = artifact_url(artifact_id)
+    return response
+
+
+@app.post("/api/preview", response_class=HTMLResponse)
+async def preview_resume(request: RenderRequest, user_ip: str = Depends(preview_rate_limit)):
+    """Return the template's HTML with inlined styles for live previews; no PDF layout is done."""
+    validate_template(request.template)
+    try:
+        html_out = render_service.preview(request.optimized_resume_data, request.template)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid resume data: {e}")
+    # Previews are user-controlled content: no scripts, no remote loads
+    return HTMLResponse(html_out, headers={
+        "Content-Security-Policy": "default-src 'none'; style-src 'unsafe-inline'; font-src 'self'; img-src data:",
+        "Cache-Control": "no-store",
+    })
+
+
+@app.post("/api/score", response_model=MatchScoreResponse)
+async def score_resume(request: MatchScoreRequest, user_ip: str = Depends(score_rate_limit)):
+    """
+    Score a resume against a job description locally, without calling the model.
+
+    Deterministic and fast enough to show as a pre-score while typing.
+    """
+    if not request.resume_text.strip() or not request.job_description.strip():
+        raise HTTPException(status_code=400, detail="Resume text and job description cannot be empty.")
+    start_time = time.time()
+    result = await asyncio.to_thread(match_scorer.score, request.resume_text, request.job_description)
+    return ORJSONResponse(dict(result, processing_time=time.time() - start_time))
+
+
+@app.get("/api/templates", response_model=TemplatesResponse)
+async def list_templates():
+    return TemplatesResponse(templates=available_templates(), default=DEFAULT_TEMPLATE)
+
+
+@app.get("/api/artifacts/{artifact_id}.pdf")
+async def get_pdf_artifact(artifact_id: str, request: Request):
+    """Stream a rendered PDF with ETag, Range and long-lived Cache-Control support."""
+    return await artifact_response(artifact_store, artifact_id, request, filename="optimized-resume.pdf")
+
+
+@app.get("/api/artifacts/{artifact_id}/thumbnail.{image_format}")
+async def get_pdf_thumbnail(artifact_id: str, image_format: str, request: Request, dpi: int = thumbnail_dpi_query()):
+    """First-page thumbnail of a rendered PDF (png or webp), with long-lived Cache-Control."""
+    validate_thumbnail_format(image_format)
+    thumbnails = await artifact_thumbnails(artifact_id, False, dpi, image_format)
+    if not thumbnails["thumbnails"]:
+        raise HTTPException(status_code=404, detail="PDF has no pages")
+    return await artifact_response(
+        artifact_store, thumbnails["thumbnails"][0], request,
+        extension=image_format, media_type=THUMBNAIL_MEDIA_TYPES[image_format],
+    )
+
+
+@app.get("/api/artifacts/{artifact_id}/thumbnails")
+async def list_pdf_thumbnails(
+    artifact_id: str, dpi: int = thumbnail_dpi_query(), image_format: str = Query(THUMBNAIL_FORMAT, alias="format")
+):
+    """Thumbnail URLs for every page of a rendered PDF (up to THUMBNAIL_MAX_PAGES)."""
+    validate_thumbnail_format(image_format)
+    thumbnails = await artifact_thumbnails(artifact_id, True, dpi, image_format)
+    return {
+        "page_count": thumbnails["page_count"],
+        "thumbnails": [thumbnail_url(thumbnail_id, image_format) for thumbnail_id in thumbnails["thumbnails"]],
+    }
+
+
+@app.get("/api/thumbnails/{thumbnail_id}.{image_format}")
+async def get_thumbnail(thumbnail_id: str, image_format: str, request: Request):
+    """Serve a stored thumbnail by its content hash."""
+    validate_thumbnail_format(image_format)
+    return await artifact_response(
+        artifact_store, thumbnail_id, request, extension=image_format, media_type=THUMBNAIL_MEDIA_TYPES[image_format]
+    )
+
+
+def require_ops_token(authorization: Optional[str] = Header(None)) -> None:
+    """Hide operational endpoints unless the caller presents OPS_TOKEN (when one is configured)."""
+    if OPS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {OPS_TOKEN}"):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@app.get("/api/admission/stats", include_in_schema=False, dependencies=[Depends(require_ops_token)])
+async def admission_stats(user_ip: str = Depends(status_rate_limit)):
+    """Model-call admission state: active calls, queue depth and wait times."""
+    return ai_service.admission.stats()
+
+
+@app.get("/api/cache/stats", include_in_schema=False, dependencies=[Depends(require_ops_token)])
+async def cache_stats(user_ip: str = Depends(status_rate_limit)):
+    stats = {cache.namespace: cache.stats() for cache in (result_cache, parse_cache, render_service.cache, thumbnail_service.cache, file_service.cache)}
+    stats["coalescing"] = dict(optimization_service.stats(), render=pdf_service.render_flights.stats())
+    stats["artifacts"] = artifact_store.stats()
+    return stats
+
+
+# Gauges read from the live services at scrape time
+REGISTRY.callback_gauge(
+    "tailorhire_optimizations_in_flight", "Optimizations being processed.",
+    lambda: [({}, inflight.count)],
+)
+REGISTRY.callback_gauge(
+    "tailorhire_cache_hit_ratio", "Cache hit ratio since startup.",
+    lambda: [({"cache": cache.namespace}, cache.stats()["hit_ratio"]) for cache in (result_cache, parse_cache, render_service.cache, thumbnail_service.cache, file_service.cache)],
+    ("cache",),
+)
+REGISTRY.callback_counter(
+    "tailorhire_cache_lookups_total", "Cache lookups since startup, by result.",
+    lambda: [
+        ({"cache": cache.namespace, "result": result}, cache.stats()[result])
+        for cache in (result_cache, parse_cache, render_service.cache, thumbnail_service.cache, file_service.cache)
+        for result in ("hits", "disk_hits", "misses")
+    ],
+    ("cache", "result"),
+)
+REGISTRY.callback_gauge(
+    "tailorhire_model_calls", "Model-call admission state.",
+    lambda: [({"state": state}, ai_service.admission.stats()[state]) for state in ("active", "queue_depth")],
+    ("state",),
+)
+REGISTRY.callback_gauge(
+    "tailorhire_model_slots", "Maximum concurrent model calls.",
+    lambda: [({}, ai_service.admission.max_concurrency)],
+)
+REGISTRY.callback_gauge(
+    "tailorhire_render_pending", "PDF renders running or queued.",
+    lambda: [({}, render_executor.stats()["pending"])],
+)
+REGISTRY.callback_gauge(
+    "tailorhire_render_workers", "PDF render workers.",
+    lambda: [({}, render_executor.workers)],
+)
+REGISTRY.callback_counter(
+    "tailorhire_log_records_dropped_total", "Log records dropped because the log queue was full.",
+    lambda: [({}, dropped_records())],
+)
+REGISTRY.callback_gauge(
+    "tailorhire_posting_index_postings", "Live postings in this worker's ranking index.",
+    lambda: [({}, ranking_service.stats()["postings"])],
+)
+REGISTRY.callback_gauge(
+    "tailorhire_jobs_running", "Background jobs being processed.",
+    lambda: [({}, job_service.stats()["running"])],
+)
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_ops_token)])
+async def metrics():
+    """Prometheus metrics for this worker process."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/api/upload")
-async def upload_resume(file: UploadFile = File(...), user_ip: str = Depends(rate_limit)):
+async def upload_resume(
+    file: UploadFile = File(...),
+    user_ip: str = Depends(upload_rate_limit),
+    thumbnail: bool = Query(False, description="Also return a first-page thumbnail URL for PDF uploads."),
+):
+    upload = None
     try:
         logger.info(f"📤 Upload started: {file.filename} ({file.content_type})")
+        upload = await file_service.ingest(file)
 
-        if not file.filename:
-            raise HTTPException(status_code=400, detail="No file provided")
-
-        if file.content_type not in ["application/pdf", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]:
-            raise HTTPException(status_code=400, detail="Only PDF and DOCX supported")
+        extraction = await file_service.extract_text(upload.source, upload.kind, upload.sha256)
+        extracted_text = extraction["text"]
 
-        resume_bytes = await file.read()
-        extracted_text = ai_service._extract_text_from_pdf(resume_bytes)
+        payload = {
+            "text": extracted_text,
+            "filename": file.filename,
+            "length": len(extracted_text),
+            "pages": extraction["pages"],
+            "truncated": extraction["truncated"],
+        }
+        if thumbnail and upload.kind == "pdf":
+            async def load_upload() -> Any:
+                # The shared rasterization holds the upload for as long as it runs
+                return upload.hold()
 
-        return {"text": extracted_text, "filename": file.filename, "length": len(extracted_text)}
+            try:
+                thumbnails = await thumbnail_service.thumbnails(upload.sha256, load_upload)
+            except ServiceBusyError as e:
+                # The thumbnail is optional: return the extracted text without it
+                logger.warning(f"⚠️ Upload thumbnail skipped: {e}")
+                thumbnails = None
+            if thumbnails and thumbnails["thumbnails"]:
+                payload["thumbnail_url"] = thumbnail_url(thumbnails["thumbnails"][0], THUMBNAIL_FORMAT)
+        return payload
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Upload failed: {e}")
         raise HTTPException(status_code=500, detail="File processing failed")
+    finally:
+        if upload is not None:
+            upload.close()
+
+
+@app.post("/api/upload/stream")
+async def upload_resume_stream(file: UploadFile = File(...), user_ip: str = Depends(upload_rate_limit)):
+    """
+    Stream extracted text page by page as newline-delimited JSON.
+
+    Emits one `page` line per page in order, then a `done` line (or an
+    `error` line if extraction fails part way).
+    """
+    logger.info(f"📤 Streaming upload started: {file.filename} ({file.content_type})")
+    upload = await file_service.ingest(file)
+
+    async def page_stream():
+        length = pages = total_pages = 0
+        try:
+            async for number, text, total_pages in file_service.iter_pages(upload.source, upload.kind):
+                pages += 1
+                length += len(text)
+                yield format_ndjson({"type": "page", "page": number, "text": text})
+            yield format_ndjson({
+                "type": "done",
+                "filename": file.filename,
+                "length": length,
+                "pages": pages,
+                "truncated": pages < total_pages,
+            })
+        except Exception as e:
+            logger.error(f"❌ Streaming upload failed: {e}")
+            yield format_ndjson({"type": "error", "detail": "File processing failed"})
+        finally:
+            upload.close()
+
+    return StreamingResponse(page_stream(), media_type="application/x-ndjson")
 
 # ----------------------
 # Startup
@@ -154,11 +912,38 @@ async def upload_resume(file: UploadFile = File(...), user_ip: str = Depends(rat
 @app.on_event("startup")
 async def startup_event():
     logger.info("🚀 TailorHire AI Backend starting up...") # Updated brand name
-    logger.info(f"📊 Rate limiting: {RATE_LIMIT_REQUESTS} requests / {RATE_LIMIT_WINDOW}s")
-    logger.info("✅ Backend ready to accept requests")
+    for limiter in (optimize_rate_limit, upload_rate_limit, render_rate_limit, preview_rate_limit, score_rate_limit, rank_rate_limit, postings_rate_limit, status_rate_limit):
+        limits = limiter.describe()
+        logger.info(f"📊 Rate limiting [{limits['scope']}]: {limits['requests']} requests / {limits['window']}s ({limits['backend']} backend)")
+    logger.info(f"🗄️ Result cache: {result_cache.max_entries} entries, TTL {result_cache.ttl}s, disk tier {'on' if result_cache.disk_dir else 'off'}")
+    logger.info("✅ Backend accepting connections, warming up before /ready")
+    render_executor.start()
+    file_service.start()
+    thumbnail_service.start()
+    job_service.start()
+    ranking_service.start()
+    # Warm up in the background so liveness checks pass while /ready stays 503
+    warm_up.start([
+        ("templates_and_render", pdf_service.warm_up, True),
+        ("model_client", ai_service.warm_up, False),
+        ("posting_index", ranking_service.warm_up, False),
+    ])
     logger.info("✅ PDF Service initialized")
     logger.info("✅ CORS configured")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Let running optimizations and jobs finish before their render/extract pools go away;
+    # jobs still running at the deadline are requeued for the next worker
+    warm_up.cancel()
+    await asyncio.gather(inflight.drain(SHUTDOWN_DRAIN_TIMEOUT), job_service.shutdown(SHUTDOWN_DRAIN_TIMEOUT))
+    await ranking_service.shutdown()
+    render_executor.shutdown()
+    file_service.shutdown()
+    thumbnail_service.shutdown()
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, log_level="info")
\ No newline at end of file
+    # Development server; production runs multi-worker via gunicorn.conf.py
+    reload = os.getenv("UVICORN_RELOAD", "false").lower() == "true"
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=reload, log_level="info")
\ No newline at end of file
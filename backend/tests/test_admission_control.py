@@ -0,0 +1,128 @@
+import asyncio
+import pytest
+from app.services.admission_control import (
+    LANE_BACKGROUND,
+    LANE_BATCH,
+    LANE_INTERACTIVE,
+    AdmissionController,
+    AdmissionRejectedError,
+)
+
+
+async def hold_slot(controller, lane, order, name, release):
+    async with controller.slot(lane):
+        order.append(name)
+        await release.wait()
+
+
+def test_calls_within_capacity_are_admitted_immediately():
+    controller = AdmissionController(max_concurrency=2)
+
+    async def scenario():
+        async with controller.slot():
+            async with controller.slot(LANE_BACKGROUND):
+                return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["active"] == 2
+    assert stats["queue_depth"] == 0
+    assert controller.stats()["active"] == 0
+    assert controller.admitted == 2
+
+
+def test_queued_calls_are_admitted_by_lane_then_arrival():
+    controller = AdmissionController(max_concurrency=1)
+    order = []
+
+    async def scenario():
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold_slot(controller, LANE_INTERACTIVE, order, "holder", release))
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.create_task(hold_slot(controller, lane, order, name, release))
+            for lane, name in (
+                (LANE_BACKGROUND, "background"),
+                (LANE_BATCH, "batch-1"),
+                (LANE_INTERACTIVE, "interactive"),
+                (LANE_BATCH, "batch-2"),
+            )
+        ]
+        await asyncio.sleep(0)
+        assert controller.stats()["queue_depth"] == 4
+        release.set()
+        await asyncio.gather(holder, *waiters)
+
+    asyncio.run(scenario())
+    assert order == ["holder", "interactive", "batch-1", "batch-2", "background"]
+
+
+def test_call_is_shed_when_the_estimated_wait_exceeds_its_deadline():
+    controller = AdmissionController(max_concurrency=1, deadlines={LANE_INTERACTIVE: 5, LANE_BATCH: 60})
+    controller.avg_hold = 4.0
+
+    async def scenario():
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold_slot(controller, LANE_INTERACTIVE, [], "holder", release))
+        queued = asyncio.create_task(hold_slot(controller, LANE_INTERACTIVE, [], "queued", release))
+        await asyncio.sleep(0)
+        # One call ahead plus this one: an estimated 8s against a 5s deadline
+        assert controller.estimate_wait(LANE_INTERACTIVE) == pytest.approx(8.0)
+        with pytest.raises(AdmissionRejectedError) as excinfo:
+            async with controller.slot(LANE_INTERACTIVE):
+                pass
+        # The batch lane's longer deadline still accepts the wait
+        batch = asyncio.create_task(hold_slot(controller, LANE_BATCH, [], "batch", release))
+        await asyncio.sleep(0)
+        assert controller.stats()["queue_depth"] == 2
+        release.set()
+        await asyncio.gather(holder, queued, batch)
+        return excinfo.value
+
+    error = asyncio.run(scenario())
+    assert error.retry_after == 8
+    assert controller.rejected == 1
+
+
+def test_full_queue_rejects_with_at_least_one_second_retry_after():
+    controller = AdmissionController(max_concurrency=1, max_queue=0)
+
+    async def scenario():
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold_slot(controller, LANE_INTERACTIVE, [], "holder", release))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejectedError) as excinfo:
+            async with controller.slot():
+                pass
+        release.set()
+        await holder
+        return excinfo.value
+
+    assert asyncio.run(scenario()).retry_after == 1
+
+
+def test_queued_call_expires_at_its_deadline_and_frees_its_place():
+    controller = AdmissionController(max_concurrency=1, deadlines={LANE_INTERACTIVE: 0.05})
+
+    async def scenario():
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold_slot(controller, LANE_INTERACTIVE, [], "holder", release))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejectedError):
+            async with controller.slot():
+                pass
+        release.set()
+        await holder
+
+    asyncio.run(scenario())
+    assert controller.expired == 1
+    assert controller.stats()["active"] == 0
+    assert controller.stats()["queue_depth"] == 0
+
+
+def test_unknown_lane_is_rejected():
+    async def scenario():
+        async with AdmissionController().slot("urgent"):
+            pass
+
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
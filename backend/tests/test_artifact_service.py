@@ -0,0 +1,86 @@
+import asyncio
+import os
+import pytest
+from app.services.artifact_service import ArtifactStore
+
+
+def memory_store(**kwargs):
+    return ArtifactStore(backend="memory", **kwargs)
+
+
+def disk_store(tmp_path, **kwargs):
+    return ArtifactStore(backend="disk", directory=str(tmp_path), **kwargs)
+
+
+async def read_all(reader):
+    try:
+        return b"".join([chunk async for chunk in reader.iter_range(0, reader.size - 1)])
+    finally:
+        await reader.close()
+
+
+def test_artifact_id_is_the_content_hash(tmp_path):
+    for store in (memory_store(), disk_store(tmp_path)):
+        artifact_id = asyncio.run(store.put(b"%PDF-1.7"))
+        assert artifact_id == asyncio.run(store.put(b"%PDF-1.7"))
+        assert asyncio.run(store.get(artifact_id)) == b"%PDF-1.7"
+        assert asyncio.run(store.size(artifact_id)) == 8
+
+
+def test_invalid_ids_are_rejected():
+    with pytest.raises(ValueError):
+        asyncio.run(memory_store().get("../etc/passwd"))
+
+
+def test_memory_store_evicts_the_least_recently_used():
+    store = memory_store(max_memory_bytes=10)
+
+    async def scenario():
+        first = await store.put(b"aaaa")
+        second = await store.put(b"bbbb")
+        await store.get(first)
+        third = await store.put(b"cccc")
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert asyncio.run(store.get(second)) is None
+    assert asyncio.run(store.get(first)) == b"aaaa"
+    assert asyncio.run(store.get(third)) == b"cccc"
+    assert store.stats()["bytes"] == 8
+
+
+def test_disk_sweep_removes_expired_then_least_recently_used(tmp_path):
+    store = disk_store(tmp_path, max_disk_bytes=8, disk_ttl=100)
+    old, recent, newest = (asyncio.run(store.put(data)) for data in (b"old!", b"rcnt", b"newe"))
+    now = os.path.getmtime(tmp_path / f"{newest}.pdf")
+    os.utime(tmp_path / f"{old}.pdf", (now - 200, now - 200))
+    os.utime(tmp_path / f"{recent}.pdf", (now - 50, now - 50))
+
+    assert store.sweep(now) == 1
+    assert asyncio.run(store.size(old)) is None
+    assert store.stats()["entries"] == 2
+
+    store.max_disk_bytes = 4
+    assert store.sweep(now) == 1
+    assert asyncio.run(store.size(recent)) is None
+    assert asyncio.run(store.size(newest)) == 4
+
+
+def test_opened_artifact_survives_eviction(tmp_path):
+    store = memory_store(max_memory_bytes=4)
+    artifact_id = asyncio.run(store.put(b"aaaa"))
+    reader = asyncio.run(store.open(artifact_id))
+    asyncio.run(store.put(b"bbbb"))
+    assert asyncio.run(store.get(artifact_id)) is None
+    assert asyncio.run(read_all(reader)) == b"aaaa"
+
+    store = disk_store(tmp_path)
+    artifact_id = asyncio.run(store.put(b"%PDF-1.7"))
+    reader = asyncio.run(store.open(artifact_id))
+    os.remove(tmp_path / f"{artifact_id}.pdf")
+    assert asyncio.run(read_all(reader)) == b"%PDF-1.7"
+
+
+def test_open_returns_none_for_unknown_artifacts(tmp_path):
+    for store in (memory_store(), disk_store(tmp_path)):
+        assert asyncio.run(store.open("0" * 64)) is None
@@ -0,0 +1,83 @@
+import asyncio
+import os
+from app.services.cache_service import ResultCache, make_cache_key, normalize_text
+
+
+def test_normalize_text_collapses_whitespace():
+    assert normalize_text("  Senior\tPython \n\n engineer ") == "Senior Python engineer"
+    assert normalize_text(None) == ""
+
+
+def test_cache_key_is_stable_and_content_addressed():
+    key = make_cache_key("resume", "job", "model")
+    assert key == make_cache_key("resume", "job", "model")
+    assert len(key) == 64
+    assert key != make_cache_key("resume", "job", "other-model")
+
+
+def test_cache_key_parts_cannot_collide_by_concatenation():
+    assert make_cache_key("ab", "c") != make_cache_key("a", "bc")
+    assert make_cache_key("", "x") != make_cache_key("x", "")
+
+
+def test_cache_key_ignores_cosmetic_whitespace_after_normalization():
+    assert make_cache_key(normalize_text("a  b\n")) == make_cache_key(normalize_text("a b"))
+
+
+def test_get_returns_what_was_set_and_counts_lookups():
+    cache = ResultCache(disk_dir="", namespace="test")
+
+    async def scenario():
+        missed = await cache.get("key")
+        await cache.set("key", {"value": 1})
+        return missed, await cache.get("key")
+
+    missed, hit = asyncio.run(scenario())
+    assert missed is None
+    assert hit == {"value": 1}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = ResultCache(ttl=0, disk_dir="", namespace="test")
+
+    async def scenario():
+        await cache.set("key", {"value": 1})
+        return await cache.get("key")
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2, disk_dir="", namespace="test")
+
+    async def scenario():
+        await cache.set("a", {"v": "a"})
+        await cache.set("b", {"v": "b"})
+        await cache.get("a")
+        await cache.set("c", {"v": "c"})
+        return [await cache.get(key) for key in ("a", "b", "c")]
+
+    assert asyncio.run(scenario()) == [{"v": "a"}, None, {"v": "c"}]
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    async def scenario():
+        await ResultCache(disk_dir=str(tmp_path), namespace="test").set("key", {"value": 1})
+        fresh = ResultCache(disk_dir=str(tmp_path), namespace="test")
+        return await fresh.get("key"), fresh.stats()
+
+    value, stats = asyncio.run(scenario())
+    assert value == {"value": 1}
+    assert stats["disk_hits"] == 1
+
+
+def test_unreadable_disk_entry_is_discarded(tmp_path):
+    cache = ResultCache(disk_dir=str(tmp_path), namespace="test")
+    path = os.path.join(cache.disk_dir, "key.json")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{not json")
+
+    assert asyncio.run(cache.get("key")) is None
+    assert not os.path.exists(path)
@@ -0,0 +1,125 @@
+import asyncio
+import gzip
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.utils import compression
+from app.utils.compression import CompressionMiddleware, negotiate_encoding
+
+LARGE_JSON = {"bullets": ["Built payment APIs serving millions of requests"] * 100}
+
+
+@pytest.fixture(autouse=True)
+def gzip_only(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+
+def call(app, accept_encoding="gzip", on_send=None):
+    messages = []
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+        if on_send is not None:
+            on_send(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "query_string": b"",
+        "headers": [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else [],
+    }
+    asyncio.run(CompressionMiddleware(app)(scope, receive, send))
+    headers = {name.decode(): value.decode() for name, value in messages[0]["headers"]}
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return headers, body
+
+
+def test_large_json_is_gzipped():
+    headers, body = call(JSONResponse(LARGE_JSON))
+    assert headers["content-encoding"] == "gzip"
+    assert headers["content-length"] == str(len(body))
+    assert headers["vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(body)) == LARGE_JSON
+
+
+def test_small_json_and_clients_without_gzip_are_left_alone():
+    headers, body = call(JSONResponse({"ok": True}))
+    assert "content-encoding" not in headers
+    assert json.loads(body) == {"ok": True}
+
+    headers, body = call(JSONResponse(LARGE_JSON), accept_encoding="identity")
+    assert "content-encoding" not in headers
+    assert json.loads(body) == LARGE_JSON
+
+
+@pytest.mark.parametrize("media_type", ["text/event-stream", "application/x-ndjson"])
+def test_stream_headers_are_sent_before_the_first_event(media_type):
+    sent_types = []
+    first_event = asyncio.Event()
+
+    async def events():
+        # The client must already have the headers while the first event is pending
+        assert sent_types == ["http.response.start"]
+        first_event.set()
+        yield "event: progress\ndata: {}\n\n" * 100
+        yield "event: done\ndata: {}\n\n"
+
+    headers, body = call(
+        StreamingResponse(events(), media_type=media_type), on_send=lambda message: sent_types.append(message["type"])
+    )
+    assert first_event.is_set()
+    assert "content-encoding" not in headers
+    assert body.endswith(b"event: done\ndata: {}\n\n")
+
+
+def test_streamed_json_passes_through_uncompressed():
+    async def chunks():
+        yield json.dumps(LARGE_JSON)[:2000]
+        yield json.dumps(LARGE_JSON)[2000:]
+
+    headers, body = call(StreamingResponse(chunks(), media_type="application/json"))
+    assert "content-encoding" not in headers
+    assert json.loads(body) == LARGE_JSON
+
+
+def test_partial_and_encoded_responses_are_not_compressed():
+    partial = JSONResponse(LARGE_JSON, status_code=206)
+    assert "content-encoding" not in call(partial)[0]
+
+    encoded = JSONResponse(LARGE_JSON, headers={"Content-Encoding": "identity"})
+    assert call(encoded)[0]["content-encoding"] == "identity"
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("*", "gzip"),
+    ("*;q=0.5, gzip;q=0", None),
+    ("deflate", None),
+    ("", None),
+])
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+def test_negotiate_prefers_brotli_when_installed(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert negotiate_encoding("gzip, br") == "br"
+    assert negotiate_encoding("gzip, br;q=0.5") == "gzip"
+
+
+def test_compression_wraps_a_fastapi_app():
+    app = FastAPI()
+
+    @app.get("/")
+    async def index():
+        return LARGE_JSON
+
+    headers, body = call(app)
+    assert headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body)) == LARGE_JSON
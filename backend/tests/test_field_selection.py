@@ -0,0 +1,68 @@
+import asyncio
+import json
+from typing import Optional
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from pydantic import BaseModel
+from app.utils.field_selection import field_selection
+
+
+class OptimizeResponse(BaseModel):
+    pdf_url: str
+    optimized_resume_pdf_base64: Optional[str] = None
+    match_score: int
+    suggestions: list = []
+
+
+RESULT = {
+    "pdf_url": "/api/artifacts/a.pdf", "optimized_resume_pdf_base64": "JVBERi0=", "match_score": 80, "suggestions": [],
+}
+
+select = field_selection(OptimizeResponse)
+
+
+def get(app, query):
+    messages = []
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "query_string": query.encode(), "headers": []}
+    asyncio.run(app(scope, receive, send))
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return messages[0]["status"], json.loads(body)
+
+
+def test_all_fields_by_default():
+    assert select(fields=None, exclude=None) == set(OptimizeResponse.model_fields)
+
+
+def test_fields_and_exclude_combine():
+    assert select(fields=" pdf_url, match_score ,", exclude=None) == {"pdf_url", "match_score"}
+    assert select(fields=None, exclude="optimized_resume_pdf_base64") == {"pdf_url", "match_score", "suggestions"}
+    assert select(fields="pdf_url,match_score", exclude="match_score") == {"pdf_url"}
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(HTTPException) as excinfo:
+        select(fields="pdf_url,resume_html", exclude="password")
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.detail == "Unknown fields: password, resume_html"
+
+
+def test_selection_is_read_from_the_query_string():
+    app = FastAPI()
+
+    @app.get("/")
+    async def optimize(selected=Depends(select)):
+        return {name: value for name, value in RESULT.items() if name in selected}
+
+    assert get(app, "fields=pdf_url,match_score") == (200, {"pdf_url": "/api/artifacts/a.pdf", "match_score": 80})
+    assert get(app, "exclude=optimized_resume_pdf_base64,suggestions") == (
+        200, {"pdf_url": "/api/artifacts/a.pdf", "match_score": 80}
+    )
+    assert get(app, "")[1] == RESULT
+    assert get(app, "fields=score") == (400, {"detail": "Unknown fields: score"})
@@ -0,0 +1,97 @@
+import asyncio
+import io
+import os
+import time
+import pytest
+from fastapi import HTTPException, UploadFile
+from app.services import file_service, thumbnail_service
+from app.services.artifact_service import ArtifactStore
+from app.services.cache_service import ResultCache
+from app.services.file_service import FileService
+from app.services.thumbnail_service import ThumbnailService
+from app.utils.upload_limits import UploadTooLargeError
+
+SMALL_PDF = b"%PDF-1.7\n" + b"x" * 1000
+LARGE_PDF = b"%PDF-1.7\n" + b"x" * (file_service.UPLOAD_MEMORY_MAX_BYTES + 100_000)
+
+
+@pytest.fixture(autouse=True)
+def temp_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_service.tempfile, "tempdir", str(tmp_path))
+    return tmp_path
+
+
+def ingest(content, **kwargs):
+    upload = UploadFile(io.BytesIO(content), filename="resume.pdf")
+    return asyncio.run(FileService(executor_kind="thread").ingest(upload, **kwargs))
+
+
+def test_small_upload_is_kept_in_memory(temp_dir):
+    upload = ingest(SMALL_PDF)
+    assert upload.kind == "pdf"
+    assert upload.size == len(SMALL_PDF)
+    assert upload.source == SMALL_PDF
+    assert os.listdir(temp_dir) == []
+    upload.close()
+
+
+def test_large_upload_is_copied_to_a_temp_file_until_the_last_close():
+    upload = ingest(LARGE_PDF)
+    path = upload.source
+    with open(path, "rb") as f:
+        assert f.read() == LARGE_PDF
+
+    assert upload.hold() is upload
+    upload.close()
+    assert os.path.exists(path)
+    upload.close()
+    assert not os.path.exists(path)
+    assert upload.hold() is None
+
+
+def test_oversized_upload_leaves_no_temp_file(temp_dir):
+    with pytest.raises(UploadTooLargeError):
+        ingest(LARGE_PDF, max_bytes=len(LARGE_PDF) - 1)
+    assert os.listdir(temp_dir) == []
+
+
+def test_unknown_document_type_is_rejected():
+    with pytest.raises(HTTPException) as excinfo:
+        ingest(b"GIF89a" + b"x" * 100)
+    assert excinfo.value.status_code == 400
+
+
+def test_thumbnail_flight_keeps_the_upload_after_the_request_closes_it(monkeypatch, tmp_path):
+    reads = []
+
+    def rasterize(source, max_pages, dpi, image_format, max_pixels):
+        time.sleep(0.1)
+        with open(source, "rb") as f:
+            reads.append(f.read())
+        return 1, [b"image"]
+
+    monkeypatch.setattr(thumbnail_service, "_rasterize", rasterize)
+    service = ThumbnailService(
+        ArtifactStore(backend="memory"), executor_kind="thread", cache=ResultCache(disk_dir="", namespace="thumbnail")
+    )
+    upload = ingest(LARGE_PDF)
+    path = upload.source
+
+    async def load():
+        return upload.hold()
+
+    async def scenario():
+        request = asyncio.create_task(service.thumbnails(upload.sha256, load))
+        await asyncio.sleep(0.02)
+        # The client goes away: the handler is cancelled and releases its reference
+        request.cancel()
+        upload.close()
+        # A second caller joins the running flight instead of loading again
+        return await service.thumbnails(upload.sha256, load)
+
+    result = asyncio.run(scenario())
+    service.shutdown()
+    assert result["page_count"] == 1
+    assert service.flights.stats()["coalesced"] == 1
+    assert reads == [LARGE_PDF]
+    assert not os.path.exists(path)
@@ -0,0 +1,123 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from app.services.artifact_service import ArtifactStore
+from app.utils.http_ranges import artifact_response, parse_range_header
+
+CONTENT = bytes(range(100))
+
+
+def make_request(**headers):
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+async def send_response(response):
+    messages = []
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    await response({"type": "http"}, receive, send)
+    headers = {name.decode(): value.decode() for name, value in messages[0]["headers"]}
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return messages[0]["status"], headers, body
+
+
+def serve(store, artifact_id, **headers):
+    async def scenario():
+        response = await artifact_response(store, artifact_id, make_request(**headers))
+        return await send_response(response)
+
+    return asyncio.run(scenario())
+
+
+@pytest.fixture(params=["memory", "disk"])
+def stored(request, tmp_path):
+    store = ArtifactStore(backend=request.param, directory=str(tmp_path))
+    return store, asyncio.run(store.put(CONTENT))
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-9", (0, 9)),
+    ("bytes=90-", (90, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=95-200", (95, 99)),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+])
+def test_parse_range_header(header, expected):
+    assert parse_range_header(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=9-3", "bytes=-0", "bytes=a-b"])
+def test_unsatisfiable_ranges_raise(header):
+    with pytest.raises(ValueError):
+        parse_range_header(header, 100)
+
+
+def test_full_response_has_validators_and_length(stored):
+    store, artifact_id = stored
+    status, headers, body = serve(store, artifact_id)
+    assert status == 200
+    assert body == CONTENT
+    assert headers["content-length"] == "100"
+    assert headers["etag"] == f'"{artifact_id}"'
+    assert headers["accept-ranges"] == "bytes"
+
+
+def test_range_request_returns_partial_content(stored):
+    store, artifact_id = stored
+    status, headers, body = serve(store, artifact_id, range="bytes=10-19")
+    assert status == 206
+    assert body == CONTENT[10:20]
+    assert headers["content-range"] == "bytes 10-19/100"
+    assert headers["content-length"] == "10"
+
+
+def test_unsatisfiable_range_returns_416(stored):
+    store, artifact_id = stored
+    status, headers, body = serve(store, artifact_id, range="bytes=200-")
+    assert status == 416
+    assert headers["content-range"] == "bytes */100"
+
+
+def test_stale_if_range_returns_the_whole_artifact(stored):
+    store, artifact_id = stored
+    status, _, body = serve(store, artifact_id, range="bytes=0-9", if_range='"other"')
+    assert status == 200
+    assert body == CONTENT
+
+
+def test_matching_etag_returns_304(stored):
+    store, artifact_id = stored
+    status, _, body = serve(store, artifact_id, if_none_match=f'"{artifact_id}"')
+    assert status == 304
+    assert body == b""
+
+
+def test_unknown_artifact_returns_404(stored):
+    store, _ = stored
+    with pytest.raises(HTTPException) as excinfo:
+        serve(store, "0" * 64)
+    assert excinfo.value.status_code == 404
+
+
+def test_eviction_after_the_headers_still_sends_every_byte():
+    store = ArtifactStore(backend="memory", max_memory_bytes=len(CONTENT))
+    artifact_id = asyncio.run(store.put(CONTENT))
+
+    async def scenario():
+        response = await artifact_response(store, artifact_id, make_request())
+        await store.put(b"x" * len(CONTENT))
+        assert await store.get(artifact_id) is None
+        return await send_response(response)
+
+    status, headers, body = asyncio.run(scenario())
+    assert status == 200
+    assert len(body) == int(headers["content-length"])
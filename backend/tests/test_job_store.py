@@ -0,0 +1,97 @@
+import sqlite3
+import time
+import pytest
+from app.services.job_store import JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(f"sqlite:///{tmp_path / 'jobs.sqlite3'}", lease_seconds=60, max_attempts=2)
+
+
+def lapse_lease(store, job_id):
+    with sqlite3.connect(store.url[len("sqlite:///"):]) as connection:
+        connection.execute("UPDATE jobs SET lease_until = ? WHERE id = ?", (time.time() - 1, job_id))
+
+
+def test_claim_takes_the_oldest_job_once_with_a_fresh_lease(store):
+    first = store.create({"n": 1})
+    second = store.create({"n": 2})
+
+    claimed = store.claim_next()
+    assert claimed.id == first["id"]
+    assert claimed.status == JOB_RUNNING
+    assert claimed.attempts == 1
+    assert claimed.lease_until > time.time()
+    assert claimed.lease_token
+
+    other = store.claim_next()
+    assert other.id == second["id"]
+    assert other.lease_token != claimed.lease_token
+    assert store.claim_next() is None
+
+
+def test_heartbeat_renews_the_lease_and_records_progress(store):
+    store.create({})
+    job = store.claim_next()
+    assert store.progress(job.id, job.lease_token, stage="tailoring", sections=2)
+    record = store.get(job.id)
+    assert record.lease_until >= job.lease_until
+    assert (record.stage, record.sections) == ("tailoring", 2)
+    assert not store.progress(job.id, "not-the-lease")
+
+
+def test_reclaimed_job_ignores_the_worker_whose_lease_lapsed(store):
+    store.create({})
+    stale = store.claim_next()
+    lapse_lease(store, stale.id)
+
+    assert store.recover_expired_leases() == 1
+    assert store.get(stale.id).status == JOB_QUEUED
+    fresh = store.claim_next()
+    assert fresh.id == stale.id
+    assert fresh.attempts == 2
+
+    # The stalled worker wakes up: none of its updates apply
+    assert not store.progress(stale.id, stale.lease_token, stage="rendering")
+    assert not store.complete(stale.id, stale.lease_token, {"from": "stale"}, None)
+    assert not store.fail(stale.id, stale.lease_token, "stale failure")
+    assert not store.release(stale.id, stale.lease_token)
+    assert store.get(stale.id).status == JOB_RUNNING
+
+    assert store.complete(fresh.id, fresh.lease_token, {"from": "fresh"}, b"%PDF")
+    record = store.get(fresh.id)
+    assert record.status == JOB_SUCCEEDED
+    assert record.result == {"from": "fresh"}
+    assert store.get_pdf(fresh.id) == b"%PDF"
+
+
+def test_job_out_of_attempts_fails_when_its_lease_lapses(store):
+    store.create({})
+    for _ in range(2):
+        job = store.claim_next()
+        lapse_lease(store, job.id)
+        store.recover_expired_leases()
+    record = store.get(job.id)
+    assert record.status == JOB_FAILED
+    assert record.lease_token is None
+    assert store.claim_next() is None
+
+
+def test_release_without_counting_an_attempt(store):
+    store.create({})
+    job = store.claim_next()
+    assert store.release(job.id, job.lease_token, delay=60, count_attempt=False)
+    record = store.get(job.id)
+    assert (record.status, record.attempts) == (JOB_QUEUED, 0)
+    # Not runnable again until the delay has passed
+    assert store.claim_next() is None
+
+
+def test_finished_jobs_expire(tmp_path):
+    store = JobStore(f"sqlite:///{tmp_path / 'jobs.sqlite3'}", result_ttl=0)
+    store.create({})
+    job = store.claim_next()
+    store.fail(job.id, job.lease_token, "boom")
+    assert store.get(job.id) is None
+    assert store.purge_expired() == 1
@@ -0,0 +1,55 @@
+import pytest
+from app.models.resume import ANALYSIS_RESPONSE_SCHEMA, ResumeAnalysis
+from app.utils.json_repair import JSONRepairError, repair_json, strip_code_fence
+
+
+def test_valid_json_is_returned_unchanged():
+    assert repair_json('{"a": [1, 2], "b": "x"}') == {"a": [1, 2], "b": "x"}
+
+
+def test_code_fence_is_stripped():
+    assert strip_code_fence('```json\n{"score": 80}\n```') == '{"score": 80}'
+
+
+def test_prose_around_the_document_is_ignored():
+    assert repair_json('Here you go:\n```json\n{"score": 80}\n```\nAnything else?') == {"score": 80}
+
+
+def test_trailing_commas_are_dropped():
+    assert repair_json('{"a": [1, 2,], "b": {"c": 3,},}') == {"a": [1, 2], "b": {"c": 3}}
+
+
+def test_commas_inside_strings_are_left_alone():
+    assert repair_json('{"a": "x,]", "b": [1,],}') == {"a": "x,]", "b": [1]}
+
+
+def test_truncated_string_is_closed():
+    assert repair_json('{"summary": "Built data pipel') == {"summary": "Built data pipel"}
+
+
+def test_truncated_document_is_cut_back_to_the_last_complete_element():
+    text = '{"skills": ["python", "sql"], "experience": [{"title": "Engineer"}, {"title": "Le'
+    repaired = repair_json(text)
+    assert repaired["skills"] == ["python", "sql"]
+    assert repaired["experience"][0] == {"title": "Engineer"}
+
+
+def test_truncated_after_key_falls_back_to_an_earlier_cut():
+    assert repair_json('{"a": 1, "b": ') == {"a": 1}
+
+
+def test_empty_response_raises():
+    with pytest.raises(JSONRepairError):
+        repair_json("   ")
+
+
+def test_unrepairable_text_raises_a_value_error():
+    with pytest.raises(ValueError):
+        repair_json("no json here")
+
+
+def test_analysis_schema_requests_every_analysis_field():
+    properties = ANALYSIS_RESPONSE_SCHEMA["properties"]
+    assert set(properties) == set(ResumeAnalysis.model_fields)
+    assert set(ANALYSIS_RESPONSE_SCHEMA["required"]) == set(properties)
+    assert properties["suggestions"] == {"type": "ARRAY", "items": {"type": "STRING"}}
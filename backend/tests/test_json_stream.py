@@ -0,0 +1,67 @@
+import json
+from app.utils.json_stream import IncrementalJSONParser
+
+DOCUMENT = {
+    "summary": "Engineer with \"quoted\" words, commas and } braces",
+    "score": 87,
+    "skills": ["python", "sql"],
+    "experience": [{"title": "Lead", "years": 3}, {"title": "Dev", "remote": True}],
+    "extra": None,
+}
+
+
+def top_level_and_entries(path):
+    return len(path) == 1 or (len(path) == 2 and path[0] == "experience")
+
+
+def feed_all(parser, text, chunk_size):
+    completed = []
+    for start in range(0, len(text), chunk_size):
+        completed.extend(parser.feed(text[start:start + chunk_size]))
+    return completed
+
+
+def test_values_are_emitted_in_order_whatever_the_chunking():
+    text = json.dumps(DOCUMENT)
+    expected = [
+        (("summary",), DOCUMENT["summary"]),
+        (("score",), 87),
+        (("skills",), ["python", "sql"]),
+        (("experience", 0), DOCUMENT["experience"][0]),
+        (("experience", 1), DOCUMENT["experience"][1]),
+        (("experience",), DOCUMENT["experience"]),
+        (("extra",), None),
+    ]
+    for chunk_size in (1, 3, 7, len(text)):
+        parser = IncrementalJSONParser(top_level_and_entries)
+        assert feed_all(parser, text, chunk_size) == expected
+        assert parser.done
+
+
+def test_a_field_is_emitted_as_soon_as_it_is_complete():
+    parser = IncrementalJSONParser(lambda path: len(path) == 1)
+    assert parser.feed('{"summary": "Hello') == []
+    assert parser.feed(' world", "score": 4') == [(("summary",), "Hello world")]
+    # A number is only complete once its delimiter arrives
+    assert parser.feed("2}") == [(("score",), 42)]
+
+
+def test_prose_before_the_object_and_after_it_is_ignored():
+    parser = IncrementalJSONParser(lambda path: len(path) == 1)
+    completed = feed_all(parser, '```json\n{"a": 1}\n``` trailing {"b": 2}', 4)
+    assert completed == [(("a",), 1)]
+
+
+def test_paths_not_accepted_are_not_emitted():
+    parser = IncrementalJSONParser(lambda path: path == ("wanted",))
+    assert parser.feed('{"other": [1, 2], "wanted": {"x": 1}}') == [(("wanted",), {"x": 1})]
+
+
+def test_root_path_can_be_emitted():
+    parser = IncrementalJSONParser(lambda path: path == ())
+    assert parser.feed('{"a": [1, {"b": 2}]}') == [((), {"a": [1, {"b": 2}]})]
+
+
+def test_malformed_fragments_are_skipped():
+    parser = IncrementalJSONParser(lambda path: len(path) == 1)
+    assert parser.feed('{"a": tru, "b": 2}') == [(("b",), 2)]
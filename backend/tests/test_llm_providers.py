@@ -0,0 +1,118 @@
+import asyncio
+import json
+import os
+import random
+import pytest
+from app.services.llm_providers import (
+    LLMProvider,
+    RecordingProvider,
+    ReplayProvider,
+    parse_latency,
+    prompt_key,
+    stub_from_schema,
+)
+
+SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "overall_match_score": {"type": "INTEGER"},
+        "suggestions": {"type": "ARRAY", "items": {"type": "STRING"}},
+    },
+}
+
+
+class FakeProvider(LLMProvider):
+    name = "fake"
+    model_name = "fake-model"
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.calls = 0
+
+    async def generate(self, prompt, schema=None):
+        self.calls += 1
+        return "".join(self.chunks)
+
+    async def stream(self, prompt, schema=None):
+        self.calls += 1
+        for chunk in self.chunks:
+            yield chunk
+
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def test_recorded_stream_replays_with_the_same_chunks(tmp_path):
+    inner = FakeProvider(['{"overall_match_score": ', "80, ", '"suggestions": []}'])
+    recorder = RecordingProvider(inner, directory=str(tmp_path))
+    replay = ReplayProvider(directory=str(tmp_path))
+
+    recorded = asyncio.run(collect(recorder.stream("tailor this", SCHEMA)))
+    replayed = asyncio.run(collect(replay.stream("tailor this", SCHEMA)))
+
+    assert replayed == recorded == inner.chunks
+    assert asyncio.run(replay.generate("tailor this", SCHEMA)) == "".join(inner.chunks)
+    assert inner.calls == 1
+
+    with open(tmp_path / f"{prompt_key('tailor this', SCHEMA)}.json", encoding="utf-8") as f:
+        record = json.load(f)
+    assert (record["model"], record["prompt"], record["schema"]) == ("fake-model", "tailor this", SCHEMA)
+
+
+def test_recordings_are_keyed_by_prompt_and_schema(tmp_path):
+    recorder = RecordingProvider(FakeProvider(["plain"]), directory=str(tmp_path))
+    asyncio.run(recorder.generate("tailor this"))
+    replay = ReplayProvider(directory=str(tmp_path))
+
+    assert asyncio.run(replay.generate("tailor this")) == "plain"
+    with pytest.raises(ValueError):
+        asyncio.run(replay.generate("tailor this", SCHEMA))
+
+
+def test_empty_recorded_response_replays_as_empty_text(tmp_path):
+    recorder = RecordingProvider(FakeProvider([]), directory=str(tmp_path))
+    assert asyncio.run(collect(recorder.stream("say nothing"))) == []
+    replay = ReplayProvider(directory=str(tmp_path))
+
+    assert asyncio.run(replay.generate("say nothing")) == ""
+    assert "".join(asyncio.run(collect(replay.stream("say nothing")))) == ""
+
+
+def test_failed_stream_is_not_recorded(tmp_path):
+    class BrokenProvider(FakeProvider):
+        async def stream(self, prompt, schema=None):
+            yield "partial"
+            raise RuntimeError("connection reset")
+
+    recorder = RecordingProvider(BrokenProvider([]), directory=str(tmp_path))
+    with pytest.raises(RuntimeError):
+        asyncio.run(collect(recorder.stream("tailor this")))
+    assert os.listdir(tmp_path) == []
+
+
+def test_empty_recordings_directory_misses_or_falls_back_to_stub(tmp_path):
+    with pytest.raises(ValueError):
+        asyncio.run(ReplayProvider(directory=str(tmp_path)).generate("tailor this", SCHEMA))
+
+    replay = ReplayProvider(directory=str(tmp_path), fallback_to_stub=True)
+    assert json.loads(asyncio.run(replay.generate("tailor this", SCHEMA))) == stub_from_schema(SCHEMA)
+
+
+def test_stub_stream_is_chunked_from_the_schema():
+    stub = ReplayProvider(directory=None, chunk_chars=10)
+    chunks = asyncio.run(collect(stub.stream("anything", SCHEMA)))
+    assert len(chunks) > 1
+    assert json.loads("".join(chunks)) == {"overall_match_score": 75, "suggestions": ["Stub suggestions"] * 2}
+    with pytest.raises(ValueError):
+        asyncio.run(stub.generate("anything"))
+
+
+def test_latency_specs():
+    assert parse_latency("fixed:0.5")(None) == 0.5
+    sample = parse_latency("uniform:1,3")
+    assert 1 <= sample(random.Random(0)) <= 3
+    with pytest.raises(ValueError):
+        parse_latency("uniform:1")
+    with pytest.raises(ValueError):
+        parse_latency("poisson:2")
@@ -0,0 +1,33 @@
+import logging
+from logging.handlers import WatchedFileHandler
+from app.utils import logger
+
+
+def start_pipeline(monkeypatch, tmp_path, to_files):
+    monkeypatch.setattr(logger, "LOG_TO_FILES", to_files)
+    monkeypatch.setattr(logger, "LOG_DIR", str(tmp_path / "logs"))
+    pipeline = logger._LogPipeline()
+    pipeline.start()
+    return pipeline
+
+
+def test_log_files_are_shared_by_appending_and_never_rotated_in_process(monkeypatch, tmp_path):
+    pipeline = start_pipeline(monkeypatch, tmp_path, to_files=True)
+    file_handlers = pipeline.listener.handlers[1:]
+    record = logging.LogRecord("test", logging.ERROR, __file__, 1, "disk full", None, None)
+    pipeline.handler.handle(record)
+    pipeline.stop()
+
+    assert [type(handler) for handler in file_handlers] == [WatchedFileHandler, WatchedFileHandler]
+    assert all(handler.mode == "a" for handler in file_handlers)
+    for name in ("app.log", "error.log"):
+        assert "disk full" in (tmp_path / "logs" / name).read_text(encoding="utf-8")
+
+
+def test_stdout_only_without_log_files(monkeypatch, tmp_path):
+    pipeline = start_pipeline(monkeypatch, tmp_path, to_files=False)
+    handlers = pipeline.listener.handlers
+    pipeline.stop()
+
+    assert [type(handler) for handler in handlers] == [logging.StreamHandler]
+    assert not (tmp_path / "logs").exists()
@@ -0,0 +1,140 @@
+import asyncio
+import pytest
+from app.utils.metrics import (
+    STAGE_SECONDS,
+    MetricsMiddleware,
+    MetricsRegistry,
+    _Metric,
+    format_server_timing,
+    record_stage,
+    stage_timer,
+)
+
+
+def run_app(app, registry):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+    asyncio.run(MetricsMiddleware(app, registry)(scope, receive, send))
+    return sent
+
+
+def server_timing(message):
+    return dict(message["headers"])[b"server-timing"].decode()
+
+
+def test_metric_without_samples_cannot_be_built():
+    class Broken(_Metric):
+        pass
+
+    with pytest.raises(TypeError):
+        Broken("broken", "Never rendered.")
+
+
+def test_counter_and_gauge_exposition():
+    registry = MetricsRegistry()
+    requests = registry.counter("app_requests_total", "Requests served.", ("route",))
+    requests.inc(route="/a")
+    requests.inc(2, route='/b"quoted"')
+    depth = registry.gauge("app_queue_depth", "Queued jobs.")
+    depth.set(5)
+    depth.dec()
+    registry.counter("app_unused_total", "Never incremented.")
+
+    assert registry.render() == (
+        "# HELP app_requests_total Requests served.\n"
+        "# TYPE app_requests_total counter\n"
+        'app_requests_total{route="/a"} 1.0\n'
+        'app_requests_total{route="/b\\"quoted\\""} 2.0\n'
+        "# HELP app_queue_depth Queued jobs.\n"
+        "# TYPE app_queue_depth gauge\n"
+        "app_queue_depth 4.0\n"
+    )
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    registry = MetricsRegistry()
+    latency = registry.histogram("app_latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, stage="parse")
+
+    assert latency.samples() == [
+        'app_latency_seconds_bucket{stage="parse",le="0.1"} 2.0',
+        'app_latency_seconds_bucket{stage="parse",le="1.0"} 3.0',
+        'app_latency_seconds_bucket{stage="parse",le="+Inf"} 4.0',
+        'app_latency_seconds_sum{stage="parse"} 3.65',
+        'app_latency_seconds_count{stage="parse"} 4.0',
+    ]
+
+
+def test_callback_gauge_reads_live_values_and_registration_is_idempotent():
+    registry = MetricsRegistry()
+    values = {"thread": 2}
+    gauge = registry.callback_gauge(
+        "app_workers", "Pool workers.", lambda: [({"kind": k}, v) for k, v in values.items()], ("kind",)
+    )
+    assert registry.callback_gauge("app_workers", "Pool workers.", lambda: []) is gauge
+    values["process"] = 4
+    assert gauge.samples() == ['app_workers{kind="thread"} 2', 'app_workers{kind="process"} 4']
+
+
+def test_server_timing_lists_stages_timed_before_the_response_starts():
+    registry = MetricsRegistry()
+
+    async def app(scope, receive, send):
+        with stage_timer("parse"):
+            pass
+        record_stage("llm", 0.25)
+        record_stage("llm", 0.5)
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        record_stage("render", 1.0)
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    start, body = run_app(app, registry)
+    entries = server_timing(start).split(", ")
+    assert entries[0].startswith("parse;dur=")
+    assert entries[1] == "llm;dur=750.0"
+    assert entries[2].startswith("total;dur=")
+    assert (b"content-type", b"text/plain") in start["headers"]
+    assert body == {"type": "http.response.body", "body": b"ok"}
+
+
+def test_request_duration_and_in_flight_are_recorded():
+    registry = MetricsRegistry()
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 404, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    run_app(app, registry)
+    exposition = registry.render()
+    assert "tailorhire_http_requests_in_flight 0.0" in exposition
+    assert 'tailorhire_http_request_duration_seconds_count{method="GET",route="unmatched",status="404"} 1.0' in exposition
+
+
+def test_failed_request_is_recorded_as_a_server_error():
+    registry = MetricsRegistry()
+
+    async def app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        run_app(app, registry)
+    assert 'status="500"} 1.0' in registry.render()
+
+
+def test_stages_outside_a_request_only_reach_the_histogram():
+    before = sum(series[-1] for series in STAGE_SECONDS._series.values())
+    record_stage("outside", 0.1)
+    assert sum(series[-1] for series in STAGE_SECONDS._series.values()) == before + 1
+
+
+def test_format_server_timing():
+    assert format_server_timing({"a": 0.0012, "b": 1}) == "a;dur=1.2, b;dur=1000.0"
+    assert format_server_timing({}, total=0.5) == "total;dur=500.0"
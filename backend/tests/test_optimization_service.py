@@ -0,0 +1,136 @@
+import asyncio
+import pytest
+from app.services.cache_service import ResultCache
+from app.services.idempotency_service import IdempotencyStore
+from app.services.optimization_service import OptimizationService
+
+ANALYSIS = {"optimized_resume_data": {"summary": "Python engineer"}, "overall_match_score": 80}
+
+
+class FakeAIService:
+    model_name = "fake-model"
+    PROMPT_VERSION = "1"
+    PARSE_PROMPT_VERSION = "1"
+
+    def __init__(self, analysis=ANALYSIS, delay=0.05):
+        self.analysis = analysis
+        self.delay = delay
+        self.model_calls = 0
+        self.lanes = []
+
+    async def parse_resume(self, resume_text, lane):
+        self.lanes.append(lane)
+        return {"resume": resume_text}
+
+    async def tailor_resume(self, structured_resume, job_description, lane):
+        self.model_calls += 1
+        self.lanes.append(lane)
+        await asyncio.sleep(self.delay)
+        return self.analysis
+
+    async def stream_tailored_resume(self, structured_resume, job_description, lane):
+        self.model_calls += 1
+        self.lanes.append(lane)
+        yield {"type": "section", "path": ["summary"], "value": "Python engineer"}
+        await asyncio.sleep(self.delay)
+        if self.analysis is not None:
+            yield {"type": "analysis", "analysis": self.analysis}
+
+
+class FakePDFService:
+    async def generate_resume_pdf(self, data, template_name):
+        return b"%PDF-1.7"
+
+
+class FakeArtifactStore:
+    async def put(self, data, extension="pdf"):
+        return "0" * 64
+
+    async def size(self, artifact_id, extension="pdf"):
+        return 8
+
+
+class FakeScorer:
+    def score(self, resume_text, job_description):
+        return {"score": 50}
+
+
+def make_service(ai_service):
+    def cache(namespace):
+        return ResultCache(disk_dir="", namespace=namespace)
+
+    return OptimizationService(
+        ai_service, FakePDFService(), cache("optimize"), FakeArtifactStore(),
+        cache("parse"), IdempotencyStore(cache("idempotency")), FakeScorer(),
+    )
+
+
+async def collect(service, **kwargs):
+    return [event async for event in service.stream("resume", "job", **kwargs)]
+
+
+def test_cache_key_depends_on_content_model_and_template():
+    service = make_service(FakeAIService())
+    key = service.cache_key("resume  text", "job")
+    assert key == service.cache_key("resume text\n", " job")
+    assert key != service.cache_key("resume text", "other job")
+    assert key != service.cache_key("resume text", "job", template_name="other")
+    other_model = FakeAIService()
+    other_model.model_name = "other-model"
+    assert key != make_service(other_model).cache_key("resume text", "job")
+
+
+def test_stream_emits_progress_then_result():
+    service = make_service(FakeAIService())
+    events = asyncio.run(collect(service))
+    assert [event.get("stage", event["type"]) for event in events] == [
+        "parsing", "tailoring", "section", "rendering", "result",
+    ]
+    assert events[-1]["result"]["match_score"] == 80
+
+
+def test_stream_uses_the_requested_lane():
+    ai_service = FakeAIService()
+    asyncio.run(collect(make_service(ai_service), lane="batch"))
+    assert ai_service.lanes == ["batch", "batch"]
+
+
+def test_stream_without_analysis_raises_value_error():
+    service = make_service(FakeAIService(analysis=None))
+    with pytest.raises(ValueError, match="optimized resume data"):
+        asyncio.run(collect(service))
+
+
+def test_optimize_joins_a_running_stream():
+    ai_service = FakeAIService()
+    service = make_service(ai_service)
+
+    async def scenario():
+        stream = asyncio.create_task(collect(service, bypass_cache=True))
+        await asyncio.sleep(0.01)
+        optimized = asyncio.create_task(service.optimize("resume", "job", bypass_cache=True))
+        second_stream = asyncio.create_task(collect(service, bypass_cache=True))
+        return await asyncio.gather(stream, optimized, second_stream)
+
+    events, (result, cached), second_events = asyncio.run(scenario())
+    assert ai_service.model_calls == 1
+    assert service.stats()["optimize"]["coalesced"] == 2
+    assert result == events[-1]["result"]
+    assert [event.get("stage", event["type"]) for event in second_events] == ["waiting", "result"]
+
+
+def test_cancelled_stream_does_not_cancel_the_shared_run():
+    ai_service = FakeAIService()
+    service = make_service(ai_service)
+
+    async def scenario():
+        stream = asyncio.create_task(collect(service, bypass_cache=True))
+        await asyncio.sleep(0.01)
+        optimized = asyncio.create_task(service.optimize("resume", "job", bypass_cache=True))
+        await asyncio.sleep(0)
+        stream.cancel()
+        return await optimized
+
+    result, _ = asyncio.run(scenario())
+    assert result["match_score"] == 80
+    assert ai_service.model_calls == 1
@@ -0,0 +1,127 @@
+import pytest
+from app.services.posting_index import PostingIndex
+from app.services.posting_store import PostingStore, parse_posting
+from app.services.scoring_service import MatchScorer, SkillsLexicon
+
+SKILLS = {
+    "languages": {"Python": ["python"], "Java": ["java"], "Swift": ["swift"]},
+    "data": {"PostgreSQL": ["postgresql", "postgres"], "Spark": ["spark", "apache spark"]},
+    "cloud": {"Kubernetes": ["kubernetes", "k8s"]},
+}
+
+POSTINGS = [
+    {"id": "backend", "title": "Backend Engineer", "description": "Python and PostgreSQL services on Kubernetes."},
+    {"id": "data", "title": "Data Engineer", "description": "Spark and Python data pipelines, data pipelines daily."},
+    {"id": "ios", "title": "iOS Engineer", "description": "Swift mobile apps."},
+    {"id": "java", "title": "Java Engineer", "description": "Java services with PostgreSQL."},
+]
+
+RESUME = "Python developer running PostgreSQL on Kubernetes"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PostingStore(f"sqlite:///{tmp_path / 'postings.sqlite3'}")
+    store.upsert(POSTINGS)
+    return store
+
+
+@pytest.fixture
+def scorer():
+    return MatchScorer(SkillsLexicon(SKILLS))
+
+
+def make_index(store, scorer, tmp_path, **kwargs):
+    index = PostingIndex(store, scorer, index_dir=str(tmp_path / "index"), **kwargs)
+    index.refresh()
+    return index
+
+
+def ranked_ids(index, top_k=10):
+    matches, _ = index.search(RESUME, top_k)
+    return [posting_id for posting_id, _ in matches]
+
+
+def test_store_upsert_is_idempotent(store):
+    assert store.upsert(POSTINGS) == 0
+    assert store.upsert([dict(POSTINGS[0], description="Go services.")]) == 1
+    assert store.count() == len(POSTINGS)
+
+
+def test_store_changes_follow_the_sequence(store):
+    changes = store.changes_since(0)
+    assert [record.seq for record in changes] == [1, 2, 3, 4]
+    store.remove("ios")
+    (tombstone,) = store.changes_since(changes[-1].seq)
+    assert tombstone.id == "ios"
+    assert tombstone.deleted
+
+
+def test_parse_posting_validates_input():
+    assert parse_posting({"text": "Python", "id": 7})["id"] == "7"
+    with pytest.raises(ValueError):
+        parse_posting({"id": "x"})
+    with pytest.raises(ValueError):
+        parse_posting({"id": "", "description": "Python"})
+
+
+def test_best_matching_postings_rank_first(store, scorer, tmp_path):
+    index = make_index(store, scorer, tmp_path)
+    matches, searched = index.search(RESUME, 10)
+    assert searched == len(POSTINGS)
+    ids = [posting_id for posting_id, _ in matches]
+    assert ids[0] == "backend"
+    assert "ios" not in ids
+    assert all(0 < score <= 100 for _, score in matches)
+    assert [score for _, score in matches] == sorted((score for _, score in matches), reverse=True)
+
+
+def test_top_k_limits_results(store, scorer, tmp_path):
+    index = make_index(store, scorer, tmp_path)
+    assert ranked_ids(index, top_k=1) == ["backend"]
+
+
+def test_removed_and_replaced_postings_are_reflected(store, scorer, tmp_path):
+    index = make_index(store, scorer, tmp_path)
+    store.remove("backend")
+    store.upsert([{"id": "ios", "description": "Python, PostgreSQL and Kubernetes platform work."}])
+    index.refresh()
+    ids = ranked_ids(index)
+    assert "backend" not in ids
+    assert ids[0] == "ios"
+    assert index.stats()["postings"] == len(POSTINGS) - 1
+
+
+def test_compaction_keeps_rankings(store, scorer, tmp_path):
+    index = make_index(store, scorer, tmp_path)
+    store.remove("java")
+    index.refresh()
+    before = index.search(RESUME, 10)
+    assert index.compact()
+    stats = index.stats()
+    assert stats["segment"] is not None
+    assert stats["delta_postings"] == 0
+    assert stats["segment_postings"] == len(POSTINGS) - 1
+    assert index.search(RESUME, 10) == before
+
+
+def test_refresh_compacts_past_the_threshold(store, scorer, tmp_path):
+    index = make_index(store, scorer, tmp_path, compact_threshold=2)
+    assert index.stats()["segment_postings"] == len(POSTINGS)
+
+
+def test_another_worker_loads_the_shared_segment(store, scorer, tmp_path):
+    index = make_index(store, scorer, tmp_path)
+    index.compact()
+    store.upsert([{"id": "late", "description": "Python and Kubernetes."}])
+
+    other = make_index(store, scorer, tmp_path)
+    assert other.stats()["segment"] == index.stats()["segment"]
+    index.refresh()
+    assert other.search(RESUME, 10) == index.search(RESUME, 10)
+    assert "late" in ranked_ids(other)
+
+
+def test_resume_without_known_terms_matches_nothing(store, scorer, tmp_path):
+    index = make_index(store, scorer, tmp_path)
+    assert index.search("woodworking and pottery", 10) == ([], len(POSTINGS))
@@ -0,0 +1,123 @@
+import asyncio
+import pytest
+from app.utils import rate_limiter
+from app.utils.rate_limiter import InMemoryBackend, RateLimitBackend, SQLiteBackend, _gcra
+
+WINDOW = 60.0
+REQUESTS = 3
+INTERVAL = WINDOW / REQUESTS
+
+
+def run_requests(count, now=1000.0, tat=None):
+    decisions = []
+    for _ in range(count):
+        decision, new_tat = _gcra(tat, now, INTERVAL, WINDOW)
+        decisions.append(decision)
+        tat = new_tat if new_tat is not None else tat
+    return decisions, tat
+
+
+def test_gcra_allows_a_full_burst_then_denies():
+    decisions, _ = run_requests(REQUESTS + 1)
+    assert [allowed for allowed, _, _ in decisions] == [True, True, True, False]
+    assert [remaining for _, _, remaining in decisions] == [2, 1, 0, 0]
+    allowed, retry_after, _ = decisions[-1]
+    assert retry_after == pytest.approx(INTERVAL)
+
+
+def test_gcra_refills_one_request_per_interval():
+    _, tat = run_requests(REQUESTS)
+    (allowed, _, _), _ = _gcra(tat, 1000.0 + INTERVAL / 2, INTERVAL, WINDOW)
+    assert not allowed
+    (allowed, _, remaining), _ = _gcra(tat, 1000.0 + INTERVAL, INTERVAL, WINDOW)
+    assert allowed
+    assert remaining == 0
+
+
+def test_gcra_has_no_double_burst_at_window_edges():
+    # Half a window after a full burst only half the budget is back
+    _, tat = run_requests(REQUESTS)
+    allowed = 0
+    now = 1000.0 + WINDOW / 2
+    for _ in range(REQUESTS):
+        (ok, _, _), new_tat = _gcra(tat, now, INTERVAL, WINDOW)
+        if ok:
+            allowed += 1
+            tat = new_tat
+    assert allowed == 1
+
+
+def test_gcra_ignores_a_tat_in_the_past():
+    (allowed, _, remaining), new_tat = _gcra(10.0, 1000.0, INTERVAL, WINDOW)
+    assert allowed
+    assert remaining == REQUESTS - 1
+    assert new_tat == pytest.approx(1000.0 + INTERVAL)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, "time", lambda: now[0])
+    return now
+
+
+def test_memory_backend_keeps_budgets_per_key(clock):
+    backend = InMemoryBackend()
+
+    async def scenario():
+        first = [await backend.acquire("a", INTERVAL, WINDOW) for _ in range(REQUESTS + 1)]
+        other = await backend.acquire("b", INTERVAL, WINDOW)
+        return first, other
+
+    first, other = asyncio.run(scenario())
+    assert [allowed for allowed, _, _ in first] == [True, True, True, False]
+    assert other[0]
+    assert backend.size() == 2
+
+
+def test_memory_backend_evicts_expired_keys(clock):
+    backend = InMemoryBackend()
+    asyncio.run(backend.acquire("a", INTERVAL, WINDOW))
+    asyncio.run(backend.acquire("b", INTERVAL, WINDOW))
+    clock[0] += WINDOW
+    asyncio.run(backend.acquire("c", INTERVAL, WINDOW))
+    assert backend.size() == 1
+
+
+def test_memory_backend_sweeps_keys_behind_a_long_lived_one(clock):
+    backend = InMemoryBackend(sweep_every=10)
+
+    async def scenario():
+        # A long window keeps the oldest key alive at the front of the dict
+        await backend.acquire("upload:a", 3600.0, 3600.0 * 10)
+        for client in range(8):
+            await backend.acquire(f"optimize:{client}", INTERVAL, WINDOW)
+        clock[0] += WINDOW
+        await backend.acquire("optimize:late", INTERVAL, WINDOW)
+
+    asyncio.run(scenario())
+    assert backend.size() == 2
+
+
+def test_sqlite_backends_share_one_budget(clock, tmp_path):
+    path = str(tmp_path / "limits.sqlite3")
+    first, second = SQLiteBackend(path), SQLiteBackend(path)
+
+    async def scenario():
+        decisions = []
+        for backend in (first, second, first, second):
+            decisions.append(await backend.acquire("client", INTERVAL, WINDOW))
+        return decisions
+
+    decisions = asyncio.run(scenario())
+    assert [allowed for allowed, _, _ in decisions] == [True, True, True, False]
+    assert first.size() == 1
+
+
+def test_incomplete_backend_cannot_be_created():
+    class Incomplete(RateLimitBackend):
+        async def acquire(self, key, emission_interval, window):
+            return True, 0.0, 0
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,87 @@
+import asyncio
+import time
+import pytest
+from app.services import render_pipeline
+from app.services.render_executor import RenderExecutor, RenderQueueFullError
+
+
+@pytest.fixture
+def slow_render(monkeypatch):
+    def render_pdf(html, template_name=render_pipeline.DEFAULT_TEMPLATE):
+        time.sleep(0.2)
+        return f"%PDF {template_name} {html}".encode()
+
+    monkeypatch.setattr(render_pipeline, "render_pdf", render_pdf)
+
+
+def make_executor(**kwargs):
+    kwargs.setdefault("mode", "thread")
+    kwargs.setdefault("workers", 1)
+    return RenderExecutor(**kwargs)
+
+
+def test_render_returns_the_layout_result(slow_render):
+    executor = make_executor()
+    try:
+        assert asyncio.run(executor.render("<p>x</p>", "classic")) == b"%PDF classic <p>x</p>"
+        assert executor.stats()["completed"] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_render_does_not_block_the_event_loop(slow_render):
+    executor = make_executor()
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await executor.render("<p>x</p>")
+        task.cancel()
+        return ticks
+
+    try:
+        assert asyncio.run(scenario()) >= 5
+    finally:
+        executor.shutdown()
+
+
+def test_full_queue_rejects_with_retry_after(slow_render):
+    executor = make_executor(queue_size=0)
+
+    async def scenario():
+        first = asyncio.create_task(executor.render("<p>1</p>"))
+        await asyncio.sleep(0)
+        with pytest.raises(RenderQueueFullError) as excinfo:
+            await executor.render("<p>2</p>")
+        await first
+        return excinfo.value
+
+    try:
+        error = asyncio.run(scenario())
+        assert error.retry_after == 5
+        assert executor.stats()["rejected"] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_slow_render_times_out(slow_render):
+    executor = make_executor(timeout=0.05)
+    try:
+        with pytest.raises(ValueError, match="timed out"):
+            asyncio.run(executor.render("<p>x</p>"))
+        assert executor.stats()["timed_out"] == 1
+        assert executor.stats()["pending"] == 0
+    finally:
+        executor.shutdown()
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        RenderExecutor(mode="fork")
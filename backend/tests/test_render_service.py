@@ -0,0 +1,115 @@
+import asyncio
+import pytest
+from pydantic import ValidationError
+from app.services import render_pipeline
+from app.services.artifact_service import ArtifactStore
+from app.services.cache_service import ResultCache
+from app.services.pdf_service import PDFService
+from app.services.render_service import RenderService
+
+RESUME = {
+    "name": "Jane Doe",
+    "contact_info": {"email": "jane@example.com"},
+    "summary": "Backend engineer.",
+    "experience": [{"title": "Software Engineer", "company": "Acme", "description": ["Built payment APIs"]}],
+    "skills": {"Languages": ["Python", "Go"]},
+}
+
+
+class FakeRenderExecutor:
+    """Stands in for WeasyPrint layout: records each render and returns the HTML as the 'PDF'."""
+
+    def __init__(self):
+        self.renders = []
+
+    async def render(self, html, template_name=render_pipeline.DEFAULT_TEMPLATE):
+        self.renders.append(html)
+        return b"%PDF " + html.encode()
+
+
+@pytest.fixture
+def executor():
+    return FakeRenderExecutor()
+
+
+@pytest.fixture
+def service(executor):
+    return RenderService(
+        PDFService(render_executor=executor),
+        ArtifactStore(backend="memory"),
+        cache=ResultCache(disk_dir="", namespace="render"),
+    )
+
+
+def render(service, resume_data, **kwargs):
+    return asyncio.run(service.render(resume_data, **kwargs))
+
+
+def test_second_render_of_the_same_data_is_a_cache_hit(service, executor):
+    artifact_id, cached = render(service, RESUME)
+    assert not cached
+    assert asyncio.run(service.artifact_store.get(artifact_id)).startswith(b"%PDF ")
+
+    assert render(service, RESUME) == (artifact_id, True)
+    assert len(executor.renders) == 1
+
+
+def test_equivalent_data_shares_the_cache_entry(service, executor):
+    artifact_id, _ = render(service, RESUME)
+    spelled_out = dict(reversed(list(RESUME.items())), projects=[], education=None, certifications=[])
+    assert render(service, spelled_out) == (artifact_id, True)
+    assert len(executor.renders) == 1
+
+
+def test_an_edit_changes_the_key_and_renders_again(service, executor):
+    artifact_id, _ = render(service, RESUME)
+    edited = dict(RESUME, summary="Backend engineer who ships.")
+    keys = {service.render_key(service.normalize(data), "classic") for data in (RESUME, edited)}
+    assert len(keys) == 2
+
+    edited_id, cached = render(service, edited)
+    assert not cached
+    assert edited_id != artifact_id
+    assert "Backend engineer who ships." in executor.renders[-1]
+    # Undoing the edit returns the first artifact without a layout
+    assert render(service, RESUME) == (artifact_id, True)
+    assert len(executor.renders) == 2
+
+
+def test_bypass_and_a_missing_artifact_render_again(service, executor):
+    artifact_id, _ = render(service, RESUME)
+    assert render(service, RESUME, bypass_cache=True) == (artifact_id, False)
+
+    # The cache still points at the artifact, but the store no longer has it
+    service.artifact_store = ArtifactStore(backend="memory")
+    assert render(service, RESUME) == (artifact_id, False)
+    assert len(executor.renders) == 3
+
+
+def test_invalid_data_is_rejected_before_rendering(service, executor):
+    with pytest.raises(ValidationError):
+        render(service, dict(RESUME, experience="ten years"))
+    with pytest.raises(ValidationError):
+        service.preview(dict(RESUME, contact_info=42))
+    assert executor.renders == []
+
+
+def test_unknown_template_is_rejected(service, executor):
+    with pytest.raises(ValueError):
+        render(service, RESUME, template_name="baroque")
+    assert executor.renders == []
+
+
+def test_preview_is_html_with_the_template_styles_inlined(service, executor):
+    html = service.preview(RESUME)
+    head, _, body = html.partition("</head>")
+    assert f"<style>\n{render_pipeline.stylesheet_text('classic')}\n</style>" in head
+    assert "Jane Doe" in body
+    assert "Built payment APIs" in body
+    assert executor.renders == []
+
+
+def test_preview_escapes_edited_text(service):
+    html = service.preview(dict(RESUME, summary="<script>alert(1)</script>"))
+    assert "<script>alert(1)</script>" not in html
+    assert "&lt;script&gt;" in html
@@ -0,0 +1,105 @@
+import pytest
+from app.services.scoring_service import SKILL_TERM_PREFIX, MatchScorer, SkillsLexicon, resume_data_text
+from app.utils import tokenizer
+
+SKILLS = {
+    "languages": {"Python": ["python"], "Go": ["golang"]},
+    "data": {"Machine Learning": ["machine learning", "ml"], "PostgreSQL": ["postgresql", "postgres"]},
+    "cloud": {"Kubernetes": ["kubernetes", "k8s"]},
+}
+
+JOB = """
+Senior backend engineer. Python and PostgreSQL required; Kubernetes is a plus.
+You will design data pipelines and data pipelines monitoring, and mentor engineers.
+"""
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return MatchScorer(SkillsLexicon(SKILLS))
+
+
+def test_tokenizer_normalizes_accents_and_dotnet():
+    assert tokenizer.tokenize("Résumé: C++, C# and .NET") == ["resume", "c++", "c#", "and", "dotnet"]
+
+
+def test_stem_strips_plurals_only():
+    assert tokenizer.stem("apis") == "api"
+    assert tokenizer.stem("libraries") == "library"
+    assert tokenizer.stem("pipelines") == "pipeline"
+    assert tokenizer.stem("analysis") == "analysis"
+    assert tokenizer.stem("redis") == "redis"
+    assert tokenizer.stem("status") == "status"
+    assert tokenizer.stem("k8s") == "k8s"
+
+
+def test_lexicon_matches_the_longest_alias():
+    lexicon = SkillsLexicon(SKILLS)
+    skills, covered = lexicon.extract(tokenizer.terms("machine learning and ml on k8s"))
+    assert skills == {"Machine Learning": 2, "Kubernetes": 1}
+    assert covered == [True, True, False, True, False, True]
+
+
+def test_bundled_lexicon_loads():
+    lexicon = SkillsLexicon.load()
+    assert lexicon.categories
+    assert ("python",) in lexicon.phrases
+
+
+def test_matching_resume_scores_higher_than_a_partial_one(scorer):
+    full = scorer.score("Python and PostgreSQL engineer on Kubernetes building data pipelines", JOB)
+    partial = scorer.score("Python developer", JOB)
+    assert full["score"] > partial["score"] > 0
+    assert full["missing_skills"] == []
+    assert set(partial["missing_skills"]) == {"PostgreSQL", "Kubernetes"}
+    assert partial["matched_skills"] == ["Python"]
+
+
+def test_score_is_deterministic(scorer):
+    resume = "Go and postgres, data pipelines"
+    assert scorer.score(resume, JOB) == scorer.score(resume, JOB)
+
+
+def test_repeated_keyword_pairs_become_phrases(scorer):
+    job = scorer.profile(JOB)
+    terms = scorer.query_terms(job)
+    assert "data pipeline" in terms
+    assert SKILL_TERM_PREFIX + "Python" in terms
+    # Words inside skill aliases are scored as the skill, not as keywords
+    assert "postgresql" not in terms
+
+
+def test_alias_spellings_count_as_the_same_skill(scorer):
+    result = scorer.score("postgres and k8s", "PostgreSQL on Kubernetes")
+    assert result["matched_skills"] == ["PostgreSQL", "Kubernetes"]
+    assert result["missing_skills"] == []
+
+
+def test_empty_job_description_scores_zero(scorer):
+    result = scorer.score("Python", "")
+    assert result["score"] == 0
+    assert result["skill_score"] is None
+    assert result["keyword_score"] is None
+
+
+def test_idf_shifts_weight_to_rare_terms():
+    lexicon = SkillsLexicon(SKILLS)
+    job = "Python and Kubernetes"
+    plain = MatchScorer(lexicon).score("Python", job)["score"]
+    weighted = MatchScorer(lexicon, idf={SKILL_TERM_PREFIX + "Kubernetes": 5.0})
+    assert weighted.score("Python", job)["score"] < plain
+    assert weighted.score("Kubernetes", job)["score"] > plain
+
+
+def test_credit_grows_with_mentions_and_saturates(scorer):
+    terms = ["pipeline"]
+    once = scorer.credit(scorer.profile("pipeline"), terms)[0]
+    often = scorer.credit(scorer.profile("pipeline " * 20), terms)[0]
+    absent = scorer.credit(scorer.profile("nothing relevant"), terms)[0]
+    assert absent == 0
+    assert 0.8 <= once < often <= 1.0
+
+
+def test_resume_data_text_flattens_values_only():
+    data = {"name": "Ada", "skills": {"languages": ["Python", "Go"]}, "years": 5, "summary": None}
+    assert resume_data_text(data) == "Ada\nPython\nGo"
@@ -0,0 +1,141 @@
+import asyncio
+import pytest
+from app.utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_task():
+    async def scenario():
+        flights = SingleFlight("test")
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flights.do("key", work) for _ in range(3)))
+        return results, calls, flights.stats()
+
+    results, calls, stats = asyncio.run(scenario())
+    assert results == ["result"] * 3
+    assert calls == 1
+    assert stats == {"in_flight": 0, "started": 1, "coalesced": 2}
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flights = SingleFlight("test")
+
+        async def work(value):
+            await asyncio.sleep(0)
+            return value
+
+        return await asyncio.gather(flights.do("a", lambda: work(1)), flights.do("b", lambda: work(2))), flights.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert results == [1, 2]
+    assert stats["started"] == 2
+    assert stats["coalesced"] == 0
+
+
+def test_cancelling_one_waiter_does_not_cancel_the_shared_task():
+    async def scenario():
+        flights = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(flights.do("key", work))
+        second = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        shared = flights._calls["key"]
+
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        release.set()
+        return first, await second, shared
+
+    first, second_result, shared = asyncio.run(scenario())
+    assert first.cancelled()
+    assert second_result == "done"
+    assert not shared.cancelled()
+    assert shared.result() == "done"
+
+
+def test_work_finishes_after_every_waiter_is_cancelled():
+    async def scenario():
+        flights = SingleFlight("test")
+        finished = asyncio.Event()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            finished.set()
+            return "done"
+
+        waiter = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await asyncio.wait_for(finished.wait(), timeout=1)
+        await asyncio.sleep(0)
+        return flights.running("key")
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_errors_reach_every_waiter_and_the_key_is_released():
+    async def scenario():
+        flights = SingleFlight("test")
+
+        async def failing():
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            flights.do("key", failing), flights.do("key", failing), return_exceptions=True
+        )
+        retried = await flights.do("key", lambda: asyncio.sleep(0, result="ok"))
+        return results, retried, flights.stats()
+
+    results, retried, stats = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert retried == "ok"
+    assert stats["started"] == 2
+
+
+def test_join_returns_the_running_task_without_starting_another():
+    async def scenario():
+        flights = SingleFlight("test")
+        release = asyncio.Event()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return calls
+
+        task = flights.join("key", work)
+        joined = flights.join("key", work)
+        release.set()
+        return task is joined, await asyncio.shield(task), calls
+
+    same, result, calls = asyncio.run(scenario())
+    assert same
+    assert result == 1
+    assert calls == 1
+
+
+def test_cancelled_waiter_raises_cancelled_error():
+    async def scenario():
+        flights = SingleFlight("test")
+        waiter = asyncio.create_task(flights.do("key", lambda: asyncio.sleep(1)))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await waiter
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(scenario())
@@ -0,0 +1,71 @@
+from app.utils.text_compaction import (
+    PAGE_BREAK,
+    compact_job_description,
+    compact_resume_text,
+    drop_noise_lines,
+    enforce_budget,
+    estimate_tokens,
+    normalize_lines,
+)
+
+RESUME = PAGE_BREAK.join([
+    "Jane Doe\njane@example.com\n"
+    "Software Engineer\nAcme Corp\nNew York, NY\n- Built payment APIs\n"
+    "Software Engineer\nGlobex\nNew York, NY\n- Scaled search\nPage 1 of 2\n",
+    "Jane Doe\n"
+    "Software Engineer\nInitech\nNew York, NY\n- Led migrations\nPage 2 of 2\n",
+])
+
+
+def compact_lines(text):
+    return drop_noise_lines(normalize_lines(text))
+
+
+def test_repeated_job_titles_and_locations_survive():
+    lines = compact_lines(RESUME)
+    assert lines.count("Software Engineer") == 3
+    assert lines.count("New York, NY") == 3
+    assert lines.count("Acme Corp") == lines.count("Globex") == lines.count("Initech") == 1
+
+
+def test_running_header_is_dropped_at_page_edges_only():
+    lines = compact_lines(RESUME)
+    assert lines.count("Jane Doe") == 1
+    assert not any(line.startswith("Page ") for line in lines)
+
+
+def test_repeats_without_page_breaks_are_kept():
+    text = "Software Engineer\nAcme\n\nSoftware Engineer\nGlobex\n\nSoftware Engineer\nInitech"
+    assert compact_lines(text).count("Software Engineer") == 3
+
+
+def test_consecutive_duplicates_and_extra_blank_lines_are_dropped():
+    assert compact_lines("Skills\nSkills\n\n\n\nPython\n\n") == ["Skills", "", "Python"]
+
+
+def test_normalize_rejoins_hyphenated_breaks_and_collapses_spaces():
+    assert normalize_lines("micro-\nservices  and APIs") == ["microservices and APIs"]
+
+
+def test_job_description_boilerplate_is_trimmed():
+    text = (
+        "Responsibilities:\n- Build APIs in Python\n"
+        "Benefits:\n- Free lunch\n- Gym\n"
+        "Requirements:\n- 3 years of Go\n"
+        "We are an equal opportunity employer."
+    )
+    compacted = compact_job_description(text)
+    assert "Build APIs in Python" in compacted
+    assert "3 years of Go" in compacted
+    assert "lunch" not in compacted
+    assert "equal opportunity" not in compacted
+
+
+def test_budget_keeps_whole_lines_from_the_top():
+    lines = ["alpha beta", "gamma delta", "epsilon zeta"]
+    assert enforce_budget(lines, estimate_tokens("alpha beta gamma delta") + 2) == lines[:2]
+
+
+def test_resume_is_truncated_to_its_budget():
+    text = "\n".join(f"Achievement number {n}" for n in range(500))
+    assert estimate_tokens(compact_resume_text(text, max_tokens=100)) <= 100
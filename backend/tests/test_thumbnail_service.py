@@ -0,0 +1,101 @@
+import asyncio
+import time
+import fitz
+import pytest
+from app.services import thumbnail_service
+from app.services.artifact_service import ArtifactStore
+from app.services.cache_service import ResultCache
+from app.services.thumbnail_service import ThumbnailService, ThumbnailTimeoutError, _rasterize
+
+LETTER = (612, 792)
+
+
+def make_pdf(*page_sizes):
+    doc = fitz.open()
+    for width, height in page_sizes:
+        doc.new_page(width=width, height=height).insert_text((72, 72), "Jane Doe")
+    return doc.tobytes()
+
+
+def image_size(png):
+    pixmap = fitz.Pixmap(png)
+    return pixmap.width, pixmap.height
+
+
+def make_service(**kwargs):
+    return ThumbnailService(
+        ArtifactStore(backend="memory"),
+        executor_kind="thread",
+        cache=ResultCache(disk_dir="", namespace="thumbnail"),
+        **kwargs,
+    )
+
+
+def test_pages_are_rasterized_at_the_requested_dpi():
+    page_count, images = _rasterize(make_pdf(LETTER, LETTER, LETTER), 2, 48, "png")
+    assert page_count == 3
+    assert [image_size(image) for image in images] == [(408, 528), (408, 528)]
+
+
+def test_huge_pages_are_rasterized_within_the_pixel_budget():
+    # A 200 x 200 inch page would be 9600 x 9600 pixels at 48 DPI
+    _, images = _rasterize(make_pdf((14400, 14400), LETTER), 2, 48, "png", max_pixels=250_000)
+    width, height = image_size(images[0])
+    assert width * height <= 250_000
+    assert width == height > 0
+    # Pages that fit keep the requested DPI
+    assert image_size(images[1]) == (408, 528)
+
+
+def test_slow_rasterization_times_out_and_is_not_cached(monkeypatch):
+    loads = []
+
+    def rasterize(source, max_pages, dpi, image_format, max_pixels):
+        time.sleep(0.3)
+        return 1, [b"image"]
+
+    monkeypatch.setattr(thumbnail_service, "_rasterize", rasterize)
+    service = make_service(timeout=0.05)
+
+    async def load():
+        loads.append(1)
+        return b"%PDF-1.7"
+
+    async def scenario():
+        with pytest.raises(ThumbnailTimeoutError) as excinfo:
+            await service.thumbnails("a" * 64, load)
+        with pytest.raises(ThumbnailTimeoutError):
+            await service.thumbnails("a" * 64, load)
+        return excinfo.value
+
+    try:
+        error = asyncio.run(scenario())
+    finally:
+        service.shutdown()
+    assert error.retry_after >= 1
+    # The failure was not cached: the second request tried again
+    assert loads == [1, 1]
+
+
+def test_thumbnails_are_stored_and_served_from_the_cache():
+    service = make_service()
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return make_pdf(LETTER, LETTER)
+
+    async def scenario():
+        first = await service.thumbnails("b" * 64, load, all_pages=True)
+        second = await service.thumbnails("b" * 64, load, all_pages=True)
+        images = [await service.artifact_store.get(artifact_id, "png") for artifact_id in first["thumbnails"]]
+        return first, second, images
+
+    try:
+        first, second, images = asyncio.run(scenario())
+    finally:
+        service.shutdown()
+    assert first == second
+    assert first["page_count"] == 2
+    assert [image_size(image) for image in images] == [(408, 528), (408, 528)]
+    assert loads == [1]
@@ -22,15 +22,50 @@ export interface OptimizeRequest {
 }
 
 export interface OptimizeResponse {
+  pdf_artifact_id: string
+  pdf_url: string
   optimized_resume_pdf_base64: string
   original_resume_text: string
   optimized_resume_json: Record<string, any>
   match_score: number
+  local_match_score: number | null
+  local_match: ScoreResponse | null
   key_changes: string[]
   suggestions: string[]
   processing_time: number
 }
 
+export interface ScoreRequest {
+  resume_text: string
+  job_description: string
+}
+
+export interface ScoreResponse {
+  score: number
+  skill_score: number | null
+  keyword_score: number | null
+  matched_skills: string[]
+  missing_skills: string[]
+  matched_keywords: string[]
+  missing_keywords: string[]
+  processing_time?: number
+}
+
+export interface RankedPosting {
+  id: string
+  title: string | null
+  company: string | null
+  location: string | null
+  url: string | null
+  score: number
+}
+
+export interface RankResponse {
+  results: RankedPosting[]
+  postings: number
+  processing_time: number
+}
+
 export interface UploadResponse {
   text: string
   filename: string
@@ -40,7 +75,10 @@ export interface UploadResponse {
 // API functions
 export const optimizeResume = async (data: OptimizeRequest): Promise<OptimizeResponse> => {
   try {
-    const response = await api.post('/optimize', data)
+    // The preview embeds the PDF inline, so opt in to the base64 copy
+    const response = await api.post('/optimize', data, {
+      params: { include_pdf_base64: true },
+    })
     return response.data
   } catch (error: any) {
     if (error.response?.data?.detail) {
@@ -50,6 +88,32 @@ export const optimizeResume = async (data: OptimizeRequest): Promise<OptimizeRes
   }
 }
 
+// Local keyword match, no AI call: cheap enough to refresh while the user types
+export const scoreResume = async (data: ScoreRequest): Promise<ScoreResponse> => {
+  try {
+    const response = await api.post('/score', data, { timeout: 10000 })
+    return response.data
+  } catch (error: any) {
+    if (error.response?.data?.detail) {
+      throw new Error(error.response.data.detail)
+    }
+    throw new Error('Failed to score resume. Please try again.')
+  }
+}
+
+// Best-matching postings from the job corpus, no AI call: pick which ones to optimize for
+export const rankJobs = async (resumeText: string, topK: number = 10): Promise<RankResponse> => {
+  try {
+    const response = await api.post('/jobs/rank', { resume_text: resumeText, top_k: topK }, { timeout: 10000 })
+    return response.data
+  } catch (error: any) {
+    if (error.response?.data?.detail) {
+      throw new Error(error.response.data.detail)
+    }
+    throw new Error('Failed to rank job postings. Please try again.')
+  }
+}
+
 export const uploadFile = async (file: File): Promise<UploadResponse> => {
   try {
     const formData = new FormData()